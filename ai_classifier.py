@@ -3,16 +3,53 @@ Sistema de clasificación con IA para fauna mexicana.
 Incluye detección de GPU CUDA y modo fallback a CPU/manual.
 """
 
-import torch
-from typing import Optional, Dict, Tuple, List
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from PIL import Image
+from typing import Optional, Dict, Iterable, Iterator, Mapping, Tuple, List
 from pathlib import Path
+from analysis_engine import IndependentEventDetector
+from config_manager import get_config
+from database_manager import DatabaseManager, get_database
+from duplicate_detector import DuplicatePhotoDetector
 from logger import get_logger
+from model_server import connect_model_server
 
 logger = get_logger()
 
 
 class CUDADetector:
-    """Detector de GPU CUDA."""
+    """
+    Detector de GPU CUDA.
+    
+    torch tarda varios segundos en importarse, así que solo se importa si la
+    IA está habilitada y hay un controlador NVIDIA instalado.
+    """
+    
+    @staticmethod
+    def has_nvidia_driver() -> bool:
+        """Verifica (sin importar torch) si hay un controlador NVIDIA instalado."""
+        return (
+            shutil.which('nvidia-smi') is not None
+            or Path('/proc/driver/nvidia/version').exists()
+            or Path(os.environ.get('ProgramFiles', ''), 'NVIDIA Corporation', 'NVSMI', 'nvidia-smi.exe').exists()
+        )
+    
+    @staticmethod
+    def _import_torch():
+        """Importa torch si puede haber GPU CUDA (None si no hace falta o no está instalado)."""
+        if not get_config().is_ai_enabled() or not CUDADetector.has_nvidia_driver():
+            return None
+        try:
+            import torch
+            return torch
+        except ImportError:
+            logger.info("PyTorch no está instalado: modo CPU")
+            return None
     
     @staticmethod
     def detect_cuda() -> Tuple[bool, Optional[str], Optional[str]]:
@@ -22,6 +59,11 @@ class CUDADetector:
         Returns:
             Tupla (disponible, nombre_gpu, version_cuda)
         """
+        torch = CUDADetector._import_torch()
+        if torch is None:
+            logger.log_gpu_detection(False)
+            return False, None, None
+        
         try:
             if torch.cuda.is_available():
                 gpu_name = torch.cuda.get_device_name(0)
@@ -38,7 +80,8 @@ class CUDADetector:
     @staticmethod
     def get_gpu_info() -> Dict:
         """Obtiene información detallada de la GPU."""
-        if not torch.cuda.is_available():
+        torch = CUDADetector._import_torch()
+        if torch is None or not torch.cuda.is_available():
             return {
                 'available': False,
                 'message': 'GPU CUDA no disponible. La plataforma funcionará en modo asistido manual.'
@@ -54,6 +97,690 @@ class CUDADetector:
         }
 
 
+class ImagePreprocessor:
+    """Decodificación y redimensionado de imágenes para el detector."""
+    
+    PAD_VALUE = 114
+    
+    @staticmethod
+    def load(image_path: Path, input_size: int) -> np.ndarray:
+        """
+        Decodifica una imagen y la ajusta a input_size x input_size sin deformarla
+        (letterbox con relleno gris, como en YOLOv5/MegaDetector).
+        
+        Args:
+            image_path: Ruta a la imagen
+            input_size: Lado de la imagen de entrada del modelo
+        
+        Returns:
+            Arreglo uint8 (input_size, input_size, 3)
+        """
+        with Image.open(image_path) as img:
+            # En JPEG el decodificador reduce la escala directamente (mucho más rápido)
+            img.draft('RGB', (input_size, input_size))
+            img = img.convert('RGB')
+        
+        scale = input_size / max(img.size)
+        width = max(1, round(img.width * scale))
+        height = max(1, round(img.height * scale))
+        img = img.resize((width, height), Image.BILINEAR)
+        
+        canvas = np.full((input_size, input_size, 3), ImagePreprocessor.PAD_VALUE, dtype=np.uint8)
+        top = (input_size - height) // 2
+        left = (input_size - width) // 2
+        canvas[top:top + height, left:left + width] = np.asarray(img)
+        return canvas
+
+
+class EmptyFramePrefilter:
+    """
+    Prefiltro barato de fotos vacías por diferencia entre fotos de una ráfaga.
+    
+    Las fotos de cada cámara se agrupan en ráfagas (separadas por más de
+    burst_gap_seconds) y se comparan miniaturas en escala de grises
+    decodificadas a escala reducida. Si ninguna pareja consecutiva de la
+    ráfaga cambia en más de motion_threshold de sus píxeles, la ráfaga se
+    marca vacía y no pasa por el modelo. Las ráfagas de una sola foto o con
+    fotos ilegibles nunca se descartan.
+    """
+    
+    THUMBNAIL_SIZE = (64, 48)
+    # Diferencia mínima (0-255) para considerar que un píxel cambió
+    PIXEL_THRESHOLD = 24
+    
+    def __init__(self, burst_gap_seconds: float = 10, motion_threshold: float = 0.005, decode_workers: int = 4):
+        """
+        Args:
+            burst_gap_seconds: Segundos sin fotos que separan dos ráfagas
+            motion_threshold: Fracción de píxeles que deben cambiar para que haya movimiento
+            decode_workers: Hilos de decodificación
+        """
+        self.burst_gap_seconds = burst_gap_seconds
+        self.motion_threshold = motion_threshold
+        self.decode_workers = max(1, int(decode_workers))
+    
+    @staticmethod
+    def load_thumbnail(image_path: str) -> Optional[np.ndarray]:
+        """Miniatura en escala de grises (None si no se puede leer)."""
+        width, height = EmptyFramePrefilter.THUMBNAIL_SIZE
+        try:
+            with Image.open(image_path) as img:
+                # JPEG: el decodificador entrega directamente 1/2, 1/4 u 1/8 de escala
+                img.draft('L', (width * 2, height * 2))
+                return np.asarray(img.convert('L').resize((width, height), Image.BOX), dtype=np.uint8)
+        except (OSError, ValueError):
+            return None
+    
+    def _motion_scores(self, paths: List[str], bursts: np.ndarray, pool: ThreadPoolExecutor) -> np.ndarray:
+        """Movimiento máximo de la ráfaga de cada foto (paths ordenados por tiempo, una cámara)."""
+        width, height = self.THUMBNAIL_SIZE
+        thumbnails = list(pool.map(self.load_thumbnail, paths))
+        readable = np.array([t is not None for t in thumbnails])
+        
+        frames = np.zeros((len(paths), height, width), dtype=np.float32)
+        if readable.any():
+            frames[readable] = np.stack([t for t in thumbnails if t is not None])
+        # Restar el brillo medio: cambios de exposición o nubes no cuentan como movimiento
+        frames -= frames.mean(axis=(1, 2), keepdims=True)
+        
+        changed = (np.abs(frames[1:] - frames[:-1]) > self.PIXEL_THRESHOLD).mean(axis=(1, 2))
+        same_burst = bursts[1:] == bursts[:-1]
+        
+        burst_ids, first_index, sizes = np.unique(bursts, return_index=True, return_counts=True)
+        scores = np.full(len(burst_ids), -np.inf)
+        pair_bursts = np.searchsorted(burst_ids, bursts[1:][same_burst])
+        np.maximum.at(scores, pair_bursts, changed[same_burst])
+        
+        # Sin pareja para comparar o con fotos ilegibles: no se puede descartar
+        scores[sizes < 2] = np.inf
+        unreadable = np.searchsorted(burst_ids, bursts[~readable])
+        scores[unreadable] = np.inf
+        
+        return scores[np.searchsorted(burst_ids, bursts)]
+    
+    def find_empty(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Marca las fotos de ráfagas sin movimiento.
+        
+        Args:
+            df: DataFrame con RUTA, SITIO, CAMARA, FECHA, HORA
+        
+        Returns:
+            DataFrame alineado con df con RAFAGA, MOVIMIENTO y VACIA
+        """
+        detector = IndependentEventDetector(time_threshold_minutes=self.burst_gap_seconds / 60)
+        bursts = detector.assign_event_ids(df, ('SITIO', 'CAMARA'))
+        motion = pd.Series(np.inf, index=df.index)
+        
+        if len(df):
+            taken_at = pd.to_datetime(df['FECHA'] + ' ' + df['HORA'])
+            order = pd.DataFrame({'SITIO': df['SITIO'], 'CAMARA': df['CAMARA'], '_DT': taken_at})
+            order = order.sort_values(['SITIO', 'CAMARA', '_DT'], kind='stable')
+            
+            with ThreadPoolExecutor(max_workers=self.decode_workers, thread_name_prefix="prefilter") as pool:
+                # Una cámara a la vez: la memoria depende de la cámara más grande
+                for _, camera in order.groupby(['SITIO', 'CAMARA'], sort=False):
+                    index = camera.index
+                    motion[index] = self._motion_scores(
+                        df.loc[index, 'RUTA'].astype(str).tolist(), bursts[index].to_numpy(), pool
+                    )
+        
+        result = pd.DataFrame({'RAFAGA': bursts, 'MOVIMIENTO': motion, 'VACIA': motion < self.motion_threshold})
+        if len(df):
+            logger.info(
+                f"Prefiltro de vacías: {int(result['VACIA'].sum())} de {len(df)} fotos "
+                f"({result['VACIA'].mean():.1%}) sin movimiento"
+            )
+        return result
+    
+    def empty_result(self, motion: float) -> Dict:
+        """Predicción para una foto descartada por el prefiltro."""
+        return {
+            'species': 'VACIO',
+            'confidence': round(1.0 - float(motion) / self.motion_threshold, 4),
+            'is_empty': True,
+            'is_human': False,
+            'is_vehicle': False,
+            'requires_manual_classification': False,
+            'prefiltered': True,
+            'motion': round(float(motion), 5)
+        }
+    
+    @staticmethod
+    def evaluate(df: pd.DataFrame, screening: pd.DataFrame) -> Dict:
+        """
+        Compara el prefiltro con las etiquetas de carpeta (ESPECIE).
+        
+        Args:
+            df: DataFrame con ESPECIE
+            screening: Resultado de find_empty
+        
+        Returns:
+            Dict con fotos, descartadas, tasa de descarte, recall de fotos con
+            fauna (no descartadas / etiquetadas no vacías) y precisión del descarte
+        """
+        labels = df['ESPECIE'].astype(str)
+        labeled = labels != 'CLASIFICACION_PENDIENTE'
+        empty_label = labels == 'VACIO'
+        skipped = screening['VACIA']
+        with_content = labeled & ~empty_label
+        
+        return {
+            'fotos': len(df),
+            'descartadas': int(skipped.sum()),
+            'tasa_descarte': round(float(skipped.mean()), 4) if len(df) else 0.0,
+            'recall_no_vacias': (
+                round(float((~skipped[with_content]).mean()), 4) if with_content.any() else 1.0
+            ),
+            'precision_vacias': (
+                round(float(empty_label[skipped & labeled].mean()), 4) if (skipped & labeled).any() else 1.0
+            ),
+        }
+
+
+class BatchDetectorClassifier:
+    """
+    Clasificación por lotes con un detector tipo MegaDetector (animal, persona, vehículo).
+    
+    Las imágenes se decodifican en un pool de hilos mientras el modelo procesa
+    el lote anterior. Las subclases solo implementan _forward.
+    """
+    
+    CATEGORIES = ('animal', 'person', 'vehicle')
+    CATEGORY_LABELS = {
+        'animal': 'CLASIFICACION_PENDIENTE',
+        'person': 'HUMANO',
+        'vehicle': 'VEHICULO'
+    }
+    
+    # Hash de cada archivo de modelo por (ruta, tamaño, mtime): se calcula una vez por versión
+    _model_versions: Dict[Tuple[str, int, int], str] = {}
+    
+    def __init__(self, batch_size: int = 32, input_size: int = 640, decode_workers: int = 4,
+                 detection_threshold: float = 0.20, confidence_threshold: float = 0.80):
+        """
+        Args:
+            batch_size: Imágenes por lote
+            input_size: Lado de la imagen de entrada del modelo
+            decode_workers: Hilos de decodificación
+            detection_threshold: Confianza mínima para considerar una detección
+            confidence_threshold: Confianza bajo la cual se pide validación manual
+        """
+        self.batch_size = max(1, int(batch_size))
+        self.input_size = int(input_size)
+        self.decode_workers = max(1, int(decode_workers))
+        self.detection_threshold = detection_threshold
+        self.confidence_threshold = confidence_threshold
+        self.last_stats: Dict[str, float] = {}
+        self.model_path: Optional[Path] = None
+    
+    def model_identity(self) -> Tuple[str, str, str]:
+        """
+        Nombre, versión y ajustes del modelo: identifican sus predicciones en el caché.
+        
+        La versión es el hash del archivo del modelo, así que reemplazarlo
+        invalida sus predicciones sin tocar las de otros modelos. El hash se
+        recalcula solo si cambian el tamaño o la fecha de modificación.
+        """
+        try:
+            stat = os.stat(self.model_path)
+        except OSError:
+            raise OSError(f"No se pudo leer el modelo: {self.model_path}")
+        
+        key = (str(Path(self.model_path).resolve()), stat.st_size, stat.st_mtime_ns)
+        version = BatchDetectorClassifier._model_versions.get(key)
+        if version is None:
+            version = DuplicatePhotoDetector.full_hash(str(self.model_path))
+            if version is None:
+                raise OSError(f"No se pudo leer el modelo: {self.model_path}")
+            BatchDetectorClassifier._model_versions[key] = version
+        settings = (
+            f"{type(self).__name__};input={self.input_size};"
+            f"detection={self.detection_threshold};confidence={self.confidence_threshold}"
+        )
+        return self.model_path.name, version, settings
+    
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Ejecuta el modelo.
+        
+        Args:
+            batch: Lote uint8 (N, input_size, input_size, 3)
+        
+        Returns:
+            Salida cruda (N, cajas, 5 + clases): cx, cy, w, h, objectness, clases
+        """
+        raise NotImplementedError
+    
+    def _decode(self, image_path: Path) -> Tuple[Optional[np.ndarray], Optional[str], float]:
+        start = time.perf_counter()
+        try:
+            image, error = ImagePreprocessor.load(image_path, self.input_size), None
+        except (OSError, ValueError) as e:
+            image, error = None, str(e)
+        return image, error, time.perf_counter() - start
+    
+    def _postprocess(self, output: np.ndarray) -> List[Dict]:
+        """Convierte la salida del detector en una predicción por imagen."""
+        output = np.asarray(output, dtype=np.float32)
+        # Confianza por caja y clase; por imagen se toma la mejor caja de cada clase
+        best = (output[..., 4:5] * output[..., 5:]).max(axis=1)
+        
+        predictions = []
+        for scores in best:
+            detections = {
+                name: round(float(scores[i]), 4) if i < len(scores) else 0.0
+                for i, name in enumerate(self.CATEGORIES)
+            }
+            category, confidence = max(detections.items(), key=lambda item: item[1])
+            is_empty = confidence < self.detection_threshold
+            if is_empty:
+                confidence = round(1.0 - confidence, 4)
+            
+            predictions.append({
+                'species': 'VACIO' if is_empty else self.CATEGORY_LABELS[category],
+                'confidence': confidence,
+                'is_empty': is_empty,
+                'is_human': not is_empty and category == 'person',
+                'is_vehicle': not is_empty and category == 'vehicle',
+                # El detector no identifica especies: los animales siempre se validan
+                'requires_manual_classification': (
+                    (not is_empty and category == 'animal') or confidence < self.confidence_threshold
+                ),
+                'detections': detections
+            })
+        
+        return predictions
+    
+    @staticmethod
+    def _error_result(error: str) -> Dict:
+        return {
+            'species': 'CLASIFICACION_PENDIENTE',
+            'confidence': 0.0,
+            'is_empty': False,
+            'is_human': False,
+            'is_vehicle': False,
+            'requires_manual_classification': True,
+            'message': f'No se pudo leer la imagen: {error}'
+        }
+    
+    def iter_classify(self, image_paths: Iterable[Path]) -> Iterator[Dict]:
+        """
+        Clasifica imágenes por lotes y entrega cada predicción en cuanto está lista.
+        
+        Todos los lotes tienen batch_size imágenes (el último se rellena) para
+        que el modelo reciba siempre la misma forma; con menos imágenes que un
+        lote se usa un solo lote del tamaño justo. Al terminar, last_stats tiene
+        las imágenes/seg de cada etapa.
+        
+        Args:
+            image_paths: Rutas a las imágenes
+        
+        Yields:
+            Predicción por imagen (con 'image_path'), en el orden recibido
+        """
+        paths = [Path(p) for p in image_paths]
+        batches = [paths[i:i + self.batch_size] for i in range(0, len(paths), self.batch_size)]
+        batch_rows = self.batch_size if len(batches) > 1 else len(paths)
+        seconds = {'decode': 0.0, 'inference': 0.0, 'postprocess': 0.0}
+        start = time.perf_counter()
+        
+        with ThreadPoolExecutor(max_workers=self.decode_workers, thread_name_prefix="decode") as pool:
+            pending = [pool.submit(self._decode, p) for p in batches[0]] if batches else []
+            
+            for index, batch_paths in enumerate(batches):
+                decoded = [future.result() for future in pending]
+                # Adelantar la decodificación del siguiente lote mientras corre el modelo
+                if index + 1 < len(batches):
+                    pending = [pool.submit(self._decode, p) for p in batches[index + 1]]
+                
+                batch = np.zeros((batch_rows, self.input_size, self.input_size, 3), dtype=np.uint8)
+                for slot, (image, _, decode_seconds) in enumerate(decoded):
+                    seconds['decode'] += decode_seconds
+                    if image is not None:
+                        batch[slot] = image
+                
+                stage_start = time.perf_counter()
+                output = self._forward(batch)
+                seconds['inference'] += time.perf_counter() - stage_start
+                
+                stage_start = time.perf_counter()
+                predictions = self._postprocess(output[:len(batch_paths)])
+                seconds['postprocess'] += time.perf_counter() - stage_start
+                
+                for path, (_, error, _), prediction in zip(batch_paths, decoded, predictions):
+                    if error is not None:
+                        prediction = self._error_result(error)
+                    prediction['image_path'] = str(path)
+                    yield prediction
+        
+        self.last_stats = self._throughput(len(paths), seconds, time.perf_counter() - start)
+    
+    def _throughput(self, total: int, seconds: Dict[str, float], elapsed: float) -> Dict[str, float]:
+        """Imágenes/seg por etapa (la decodificación se reparte entre los hilos)."""
+        def rate(stage_seconds: float) -> float:
+            return round(total / stage_seconds, 1) if stage_seconds > 0 else 0.0
+        
+        stats = {
+            'images': total,
+            'decode': rate(seconds['decode'] / self.decode_workers),
+            'inference': rate(seconds['inference']),
+            'postprocess': rate(seconds['postprocess']),
+            'total': rate(elapsed)
+        }
+        if total:
+            logger.info(
+                f"Clasificación: {total} imágenes, {stats['total']} img/s "
+                f"(decodificación {stats['decode']}, inferencia {stats['inference']}, "
+                f"postproceso {stats['postprocess']})"
+            )
+        return stats
+    
+    def classify_image(self, image_path: Path) -> Dict:
+        """Clasifica una imagen."""
+        return list(self.iter_classify([image_path]))[0]
+    
+    def batch_classify(self, image_paths: List[Path], progress_callback=None) -> List[Dict]:
+        """
+        Clasifica múltiples imágenes en lotes.
+        
+        Args:
+            image_paths: Lista de rutas a imágenes
+            progress_callback: Función callback para progreso
+        
+        Returns:
+            Lista de predicciones
+        """
+        results = []
+        
+        for prediction in self.iter_classify(image_paths):
+            results.append(prediction)
+            
+            if progress_callback:
+                progress_callback(len(results), len(image_paths))
+        
+        return results
+
+
+class TorchDetectorClassifier(BatchDetectorClassifier):
+    """Detector de PyTorch cargado de un archivo local (sin descargas)."""
+    
+    def __init__(self, model_path: str, device: str = 'cpu', **kwargs):
+        """
+        Args:
+            model_path: Modelo TorchScript (o checkpoint de PyTorch con el módulo completo)
+            device: Dispositivo de inferencia ('cpu' o 'cuda')
+            **kwargs: Opciones de BatchDetectorClassifier
+        """
+        import torch
+        
+        super().__init__(**kwargs)
+        self.model_path = Path(model_path)
+        self.device = torch.device(device)
+        self.model = self._load_model(self.model_path).to(self.device).eval()
+        
+        logger.info(f"Modelo cargado: {self.model_path.name} en {self.device}")
+    
+    @staticmethod
+    def _load_model(model_path: Path):
+        import torch
+        
+        if not model_path.is_file():
+            raise FileNotFoundError(f"No existe el modelo: {model_path}")
+        
+        try:
+            return torch.jit.load(str(model_path), map_location='cpu')
+        except RuntimeError:
+            # Checkpoint con el módulo serializado (p. ej. MegaDetector con yolov5 instalado)
+            checkpoint = torch.load(str(model_path), map_location='cpu', weights_only=False)
+            model = checkpoint.get('model', checkpoint) if isinstance(checkpoint, dict) else checkpoint
+            if not isinstance(model, torch.nn.Module):
+                raise ValueError(f"El archivo no contiene un modelo de PyTorch: {model_path}")
+            return model.float()
+    
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        import torch
+        
+        with torch.inference_mode():
+            tensor = torch.from_numpy(batch).to(self.device).permute(0, 3, 1, 2).float().div_(255)
+            output = self.model(tensor)
+            if isinstance(output, (tuple, list)):
+                output = output[0]
+            return output.float().cpu().numpy()
+
+
+class OnnxDetectorClassifier(BatchDetectorClassifier):
+    """
+    Detector exportado a ONNX, ejecutado con ONNX Runtime en CPU.
+    
+    Opcionalmente cuantiza los pesos a INT8 (cuantización dinámica); el modelo
+    cuantizado se guarda junto al original y se reutiliza.
+    """
+    
+    def __init__(self, model_path: str, quantize_int8: bool = False, cpu_threads: int = 0, **kwargs):
+        """
+        Args:
+            model_path: Modelo .onnx local
+            quantize_int8: Usar versión cuantizada a INT8
+            cpu_threads: Hilos intra-operación (0 = núcleos del equipo)
+            **kwargs: Opciones de BatchDetectorClassifier
+        """
+        super().__init__(**kwargs)
+        self.model_path = Path(model_path)
+        if not self.model_path.is_file():
+            raise FileNotFoundError(f"No existe el modelo: {self.model_path}")
+        
+        if quantize_int8:
+            self.model_path = self._quantized_model(self.model_path)
+        
+        self.cpu_threads = cpu_threads or os.cpu_count() or 1
+        self.session = self._create_session(self.model_path, self.cpu_threads)
+        
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dtype = np.float16 if model_input.type == 'tensor(float16)' else np.float32
+        batch_dim, _, height, _ = model_input.shape
+        # Modelos exportados con dimensiones fijas imponen lote y tamaño de entrada
+        self.model_batch = batch_dim if isinstance(batch_dim, int) else None
+        if isinstance(height, int):
+            self.input_size = height
+        
+        logger.info(
+            f"Modelo ONNX cargado: {self.model_path.name} ({self.cpu_threads} hilos, "
+            f"entrada {self.input_size}px)"
+        )
+    
+    @staticmethod
+    def _onnxruntime():
+        try:
+            import onnxruntime
+            return onnxruntime
+        except ImportError as e:
+            raise ImportError("El backend ONNX requiere onnxruntime (pip install onnxruntime)") from e
+    
+    @staticmethod
+    def _quantized_model(model_path: Path) -> Path:
+        """Cuantiza el modelo a INT8 si no existe una versión cuantizada vigente."""
+        OnnxDetectorClassifier._onnxruntime()
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        
+        quantized_path = model_path.with_name(f"{model_path.stem}.int8.onnx")
+        if not quantized_path.exists() or quantized_path.stat().st_mtime < model_path.stat().st_mtime:
+            logger.info(f"Cuantizando modelo a INT8: {quantized_path.name}")
+            quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+        return quantized_path
+    
+    @staticmethod
+    def _create_session(model_path: Path, cpu_threads: int):
+        ort = OnnxDetectorClassifier._onnxruntime()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = cpu_threads
+        options.inter_op_num_threads = 1
+        # Sin espera activa: los hilos de decodificación trabajan mientras el modelo corre
+        options.add_session_config_entry('session.intra_op.allow_spinning', '0')
+        return ort.InferenceSession(str(model_path), sess_options=options, providers=['CPUExecutionProvider'])
+    
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        tensor = np.ascontiguousarray(batch.transpose(0, 3, 1, 2), dtype=self.input_dtype)
+        tensor /= 255
+        rows = self.model_batch or len(tensor)
+        outputs = []
+        for start in range(0, len(tensor), rows):
+            chunk = tensor[start:start + rows]
+            if len(chunk) < rows:
+                chunk = np.concatenate([chunk, np.zeros((rows - len(chunk),) + chunk.shape[1:], chunk.dtype)])
+            outputs.append(self.session.run(None, {self.input_name: chunk})[0])
+        return np.concatenate(outputs)[:len(batch)]
+
+
+class PredictionCache:
+    """
+    Caché de predicciones en SQLite delante de un detector.
+    
+    Las imágenes se identifican por un hash rápido de su contenido (inicio,
+    fin y tamaño del archivo), así que mover o renombrar carpetas no obliga a
+    reclasificar; solo se infieren las imágenes que el modelo no ha visto.
+    """
+    
+    # Última versión vista de cada modelo en este proceso (ya invalidadas las anteriores)
+    _current_versions: Dict[str, str] = {}
+    
+    def __init__(self, detector: BatchDetectorClassifier, db: Optional[DatabaseManager] = None):
+        """
+        Args:
+            detector: Detector que clasifica las imágenes no guardadas
+            db: Gestor de base de datos (por defecto la instancia global)
+        """
+        self.detector = detector
+        self.db = db or get_database()
+        self.model_name, self.model_version, self.settings = detector.model_identity()
+        self.last_hits = 0
+        
+        # Un modelo actualizado descarta solo las predicciones de sus versiones anteriores
+        if PredictionCache._current_versions.get(self.model_name) != self.model_version:
+            PredictionCache._current_versions[self.model_name] = self.model_version
+            self.db.submit_write(self.db.invalidate_predictions, self.model_name, self.model_version)
+    
+    @staticmethod
+    def content_hash(image_path: Path) -> Optional[str]:
+        """Hash rápido del contenido de la imagen (None si no se puede leer)."""
+        try:
+            size = os.stat(image_path).st_size
+        except OSError:
+            return None
+        digest = DuplicatePhotoDetector.partial_hash(str(image_path), size)
+        return f"{digest}-{size}" if digest else None
+    
+    def _save(self, pending: List[Tuple[str, Dict]]):
+        if pending:
+            self.db.submit_write(
+                self.db.save_predictions, self.model_name, self.model_version, self.settings, pending
+            )
+    
+    def iter_classify(self, image_paths: Iterable[Path]) -> Iterator[Dict]:
+        """
+        Entrega predicciones en el orden recibido: las guardadas de inmediato
+        (con 'cached': True) y las demás conforme el detector las produce.
+        """
+        paths = [Path(p) for p in image_paths]
+        with ThreadPoolExecutor(max_workers=self.detector.decode_workers, thread_name_prefix="hash") as pool:
+            hashes = list(pool.map(self.content_hash, paths))
+        
+        cached = self.db.get_cached_predictions(
+            self.model_name, self.model_version, self.settings, [h for h in hashes if h]
+        )
+        misses = [path for path, content_hash in zip(paths, hashes) if content_hash not in cached]
+        self.last_hits = len(paths) - len(misses)
+        logger.info(f"Caché de predicciones: {self.last_hits} de {len(paths)} imágenes ya clasificadas")
+        
+        fresh = self.detector.iter_classify(misses)
+        pending = []
+        
+        for path, content_hash in zip(paths, hashes):
+            if content_hash in cached:
+                yield dict(cached[content_hash], image_path=str(path), cached=True)
+                continue
+            
+            prediction = next(fresh)
+            # Las imágenes ilegibles no se guardan: se reintentan en la siguiente corrida
+            if content_hash and 'detections' in prediction:
+                pending.append((content_hash, {k: v for k, v in prediction.items() if k != 'image_path'}))
+                if len(pending) >= self.detector.batch_size:
+                    self._save(pending)
+                    pending = []
+            yield prediction
+        
+        self._save(pending)
+        # Cerrar el generador del detector para que registre su rendimiento
+        next(fresh, None)
+    
+    def classify_image(self, image_path: Path) -> Dict:
+        """Clasifica una imagen (usando el caché)."""
+        return list(self.iter_classify([image_path]))[0]
+    
+    def batch_classify(self, image_paths: List[Path], progress_callback=None) -> List[Dict]:
+        """Clasifica múltiples imágenes, infiriendo solo las que no están en caché."""
+        results = []
+        
+        for prediction in self.iter_classify(image_paths):
+            results.append(prediction)
+            
+            if progress_callback:
+                progress_callback(len(results), len(image_paths))
+        
+        return results
+
+
+def create_detector(backend: str, model_path: str, device: str = 'cpu', quantize_int8: bool = False,
+                    cpu_threads: int = 0, **options) -> BatchDetectorClassifier:
+    """
+    Crea el detector del backend indicado.
+    
+    Args:
+        backend: 'torch' u 'onnx'
+        model_path: Modelo local
+        device: Dispositivo (solo torch)
+        quantize_int8: Cuantizar a INT8 (solo onnx)
+        cpu_threads: Hilos de inferencia (solo onnx, 0 = núcleos del equipo)
+        **options: Opciones de BatchDetectorClassifier
+    
+    Returns:
+        Detector con classify_image/batch_classify
+    """
+    if backend == 'onnx':
+        return OnnxDetectorClassifier(model_path, quantize_int8=quantize_int8, cpu_threads=cpu_threads, **options)
+    if backend == 'torch':
+        return TorchDetectorClassifier(model_path, device=device, **options)
+    raise ValueError(f"Backend de inferencia desconocido: {backend}")
+
+
+def benchmark_detectors(detectors: Dict[str, BatchDetectorClassifier], image_paths: List[Path]) -> List[Dict]:
+    """
+    Compara backends sobre las mismas imágenes.
+    
+    Args:
+        detectors: Detectores por nombre (ej. {'torch': ..., 'onnx-int8': ...})
+        image_paths: Imágenes de prueba
+    
+    Returns:
+        Una fila por backend con imágenes/seg por etapa y coincidencia de
+        etiquetas con el primer backend
+    """
+    rows = []
+    reference = None
+    
+    for name, detector in detectors.items():
+        labels = [prediction['species'] for prediction in detector.iter_classify(image_paths)]
+        if reference is None:
+            reference = labels
+        agreement = sum(a == b for a, b in zip(labels, reference)) / len(labels) if labels else 0.0
+        rows.append({'backend': name, **detector.last_stats, 'coincidencia': round(agreement, 4)})
+    
+    return rows
+
+
 class AIClassifierStub:
     """
     Stub para clasificador de IA.
@@ -64,19 +791,43 @@ class AIClassifierStub:
     2. Integración con MegaDetector oficial
     3. Fine-tuning para fauna mexicana
     
-    Por ahora, este módulo detecta GPU y prepara la infraestructura.
+    Si hay un modelo detector local configurado (ai.model_path), la
+    clasificación se delega en el detector del backend configurado (ai.backend).
     """
     
-    def __init__(self, use_gpu: bool = True):
+    def __init__(self, use_gpu: bool = True, model_path: Optional[str] = None, backend: str = 'torch',
+                 cache_predictions: bool = True, prefilter: Optional[EmptyFramePrefilter] = None,
+                 use_server: bool = False, **detector_options):
         """
         Inicializa clasificador.
         
         Args:
             use_gpu: Si usar GPU (si está disponible)
+            model_path: Modelo detector local (opcional)
+            backend: 'torch' (TorchScript/PyTorch) u 'onnx' (ONNX Runtime)
+            cache_predictions: Guardar predicciones en la base y reutilizarlas
+            prefilter: Prefiltro de fotos vacías (solo en classify_frames)
+            use_server: Usar el servidor de modelo compartido (configurado en
+                config.json) en vez de cargar el modelo en este proceso
+            **detector_options: Opciones de create_detector (batch_size, input_size, ...)
         """
         self.gpu_available, self.gpu_name, self.cuda_version = CUDADetector.detect_cuda()
         self.use_gpu = use_gpu and self.gpu_available
-        self.device = torch.device('cuda' if self.use_gpu else 'cpu')
+        self.device = 'cuda' if self.use_gpu else 'cpu'
+        self.detector: Optional[BatchDetectorClassifier] = None
+        self.cache: Optional[PredictionCache] = None
+        self.prefilter = prefilter
+        
+        if model_path:
+            try:
+                if use_server:
+                    self.detector = connect_model_server()
+                else:
+                    self.detector = create_detector(backend, model_path, device=self.device, **detector_options)
+                if cache_predictions:
+                    self.cache = PredictionCache(self.detector)
+            except (ImportError, OSError, RuntimeError, ValueError) as e:
+                logger.error(f"No se pudo cargar el modelo {model_path}: {e}")
         
         logger.info(f"Clasificador inicializado en: {self.device}")
     
@@ -90,6 +841,9 @@ class AIClassifierStub:
         Returns:
             Dict con predicción y confianza
         """
+        if self.detector is not None:
+            return (self.cache or self.detector).classify_image(image_path)
+        
         # STUB: En implementación completa, aquí iría:
         # 1. Cargar imagen
         # 2. Preprocesar para MegaDetector
@@ -109,7 +863,10 @@ class AIClassifierStub:
     
     def batch_classify(self, image_paths: List[Path], progress_callback=None) -> List[Dict]:
         """
-        Clasifica múltiples imágenes en batch (STUB).
+        Clasifica múltiples imágenes en batch.
+        
+        Con modelo detector cargado usa lotes de ai.batch_size (y solo infiere
+        las imágenes que no están en el caché de predicciones); sin él, el STUB.
         
         Args:
             image_paths: Lista de rutas a imágenes
@@ -118,6 +875,9 @@ class AIClassifierStub:
         Returns:
             Lista de predicciones
         """
+        if self.detector is not None:
+            return (self.cache or self.detector).batch_classify(image_paths, progress_callback)
+        
         results = []
         
         for i, img_path in enumerate(image_paths):
@@ -129,22 +889,70 @@ class AIClassifierStub:
                 progress_callback(i + 1, len(image_paths))
         
         return results
+    
+    def classify_frames(self, df: pd.DataFrame, progress_callback=None) -> List[Dict]:
+        """
+        Clasifica las fotos de un proyecto procesado.
+        
+        Con prefiltro configurado, las ráfagas sin movimiento se marcan VACIO
+        sin pasar por el modelo.
+        
+        Args:
+            df: DataFrame con RUTA, SITIO, CAMARA, FECHA, HORA
+            progress_callback: Función callback para progreso
+        
+        Returns:
+            Lista de predicciones alineada con las filas de df
+        """
+        paths = df['RUTA'].astype(str).tolist()
+        if self.detector is None or self.prefilter is None:
+            return self.batch_classify(paths, progress_callback)
+        
+        screening = self.prefilter.find_empty(df)
+        skipped = screening['VACIA'].to_numpy()
+        inferred = (self.cache or self.detector).iter_classify(
+            [path for path, skip in zip(paths, skipped) if not skip]
+        )
+        
+        results = []
+        
+        for path, skip, motion in zip(paths, skipped, screening['MOVIMIENTO'].to_numpy()):
+            if skip:
+                result = self.prefilter.empty_result(motion)
+                result['image_path'] = path
+            else:
+                result = next(inferred)
+            results.append(result)
+            
+            if progress_callback:
+                progress_callback(len(results), len(paths))
+        
+        # Cerrar el generador para que registre su rendimiento
+        next(inferred, None)
+        
+        return results
 
 
 class ManualClassificationAssistant:
     """
     Asistente para clasificación manual cuando no hay GPU/IA.
     Proporciona sugerencias inteligentes basadas en historial.
+    
+    Las fotos pueden etiquetarse por secuencias (fotos de la misma cámara
+    separadas por menos de unos segundos): una etiqueta por secuencia, con
+    correcciones opcionales foto por foto.
     """
     
     def __init__(self):
         """Inicializa asistente de clasificación manual."""
         from utils import get_common_species_mexico
+        from fuzzy_matcher import get_species_index
         self.common_species = get_common_species_mexico()
         self.species_history = []
+        self.species_index = get_species_index()
     
     def get_suggestions(self, site: str = None, camera: str = None, 
-                       recent_species: List[str] = None) -> List[str]:
+                       recent_species: List[str] = None, query: str = None) -> List[str]:
         """
         Obtiene sugerencias de especies para clasificación manual.
         
@@ -152,13 +960,20 @@ class ManualClassificationAssistant:
             site: Nombre del sitio
             camera: Nombre de la cámara
             recent_species: Especies recientes en este sitio/cámara
+            query: Texto escrito por el técnico (admite errores y sin acentos)
             
         Returns:
             Lista de especies sugeridas (ordenadas por probabilidad)
         """
         suggestions = []
         
-        # Agregar especies recientes primero
+        # Coincidencias aproximadas con lo escrito, más cercanas primero
+        if query:
+            for name, _ in self.species_index.search(query, max_distance=2):
+                if name not in suggestions:
+                    suggestions.append(name)
+        
+        # Agregar especies recientes
         if recent_species:
             suggestions.extend([s for s in recent_species if s not in suggestions])
         
@@ -173,11 +988,72 @@ class ManualClassificationAssistant:
             self.species_history.insert(0, species)
             # Mantener solo últimas 50
             self.species_history = self.species_history[:50]
+        self.species_index.add(species)
     
     def suggest_correction(self, species_name: str) -> Optional[str]:
         """Sugiere corrección para nombre de especie."""
         from utils import suggest_species_correction
         return suggest_species_correction(species_name)
+    
+    @staticmethod
+    def group_sequences(df: pd.DataFrame, window_seconds: float = 60) -> pd.Series:
+        """
+        Agrupa fotos en secuencias para etiquetarlas juntas.
+        
+        Misma regla que los eventos independientes, por cámara y con una
+        ventana corta: una foto separada de la anterior por al menos
+        window_seconds inicia una secuencia nueva.
+        
+        Args:
+            df: DataFrame con SITIO, CAMARA, FECHA, HORA
+            window_seconds: Segundos que separan dos secuencias
+        
+        Returns:
+            Serie alineada con df con IDs de secuencia (en orden de cámara y tiempo)
+        """
+        detector = IndependentEventDetector(time_threshold_minutes=window_seconds / 60)
+        return detector.assign_event_ids(df, ('SITIO', 'CAMARA'))
+    
+    @staticmethod
+    def propagate_labels(sequences: pd.Series, sequence_labels: Mapping[int, str],
+                         overrides: Optional[Mapping] = None) -> pd.Series:
+        """
+        Extiende la etiqueta de cada secuencia a todas sus fotos.
+        
+        Args:
+            sequences: IDs de secuencia por foto (ver group_sequences)
+            sequence_labels: Etiqueta por ID de secuencia (las que falten no se etiquetan)
+            overrides: Etiqueta por índice de foto; reemplaza la de su secuencia
+        
+        Returns:
+            Serie con la etiqueta de cada foto etiquetada (índice de df)
+        """
+        labels = sequences.map(sequence_labels)
+        if overrides:
+            override = pd.Series(overrides, dtype=object).reindex(labels.index)
+            labels = override.where(override.notna(), labels)
+        return labels.dropna()
+    
+    def apply_labels(self, df: pd.DataFrame, labels: pd.Series) -> pd.DataFrame:
+        """
+        Copia de df con ESPECIE reemplazada por las etiquetas indicadas.
+        
+        Args:
+            df: DataFrame con ESPECIE
+            labels: Etiqueta por índice de foto (ver propagate_labels)
+        
+        Returns:
+            DataFrame actualizado
+        """
+        from utils import standardize_category
+        labels = labels.map(standardize_category)
+        labeled = df.copy()
+        labeled.loc[labels.index, 'ESPECIE'] = labels
+        
+        for species in labels.value_counts().index:
+            self.add_to_history(species)
+        
+        return labeled
 
 
 def get_classifier(use_gpu: bool = True) -> AIClassifierStub:
@@ -190,7 +1066,28 @@ def get_classifier(use_gpu: bool = True) -> AIClassifierStub:
     Returns:
         Instancia del clasificador
     """
-    return AIClassifierStub(use_gpu=use_gpu)
+    config = get_config()
+    prefilter = EmptyFramePrefilter(
+        burst_gap_seconds=config.get("ai.burst_gap_seconds", 10),
+        motion_threshold=config.get("ai.motion_threshold", 0.005),
+        decode_workers=config.get("ai.decode_workers", 4)
+    ) if config.get("ai.prefilter_empty", True) else None
+    
+    return AIClassifierStub(
+        use_gpu=use_gpu,
+        model_path=config.get_model_path() or None,
+        backend=config.get_inference_backend(),
+        cache_predictions=config.get("ai.cache_predictions", True),
+        prefilter=prefilter,
+        use_server=config.get("ai.model_server", True),
+        quantize_int8=config.get("ai.quantize_int8", False),
+        cpu_threads=config.get("ai.cpu_threads", 0),
+        batch_size=config.get_ai_batch_size(),
+        input_size=config.get("ai.input_size", 640),
+        decode_workers=config.get("ai.decode_workers", 4),
+        detection_threshold=config.get("ai.detection_threshold", 0.20),
+        confidence_threshold=config.get_confidence_threshold()
+    )
 
 
 def get_manual_assistant() -> ManualClassificationAssistant:
@@ -0,0 +1,267 @@
+"""
+Backends de ejecución para el motor de análisis.
+
+InMemoryBackend trabaja sobre un DataFrame (comportamiento de siempre);
+ParquetBackend recorre un dataset Parquet particionado por
+PROYECTO/SITIO/CAMARA en disco, por bloques, con memoria acotada por
+configuración. Ambos exponen las mismas operaciones; en Parquet cada
+proyecto (temporada) es una unidad de muestreo aparte, con su columna
+PROYECTO, y para un solo proyecto los resultados coinciden.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+import pandas as pd
+
+from analysis_engine import IndependentEventDetector, TemporalAnalyzer, TrapEffortCalculator
+from logger import get_logger
+
+logger = get_logger()
+
+
+PARTITION_COLUMNS = ['PROYECTO', 'SITIO', 'CAMARA']
+DATASET_COLUMNS = ['SITIO', 'CAMARA', 'ESPECIE', 'FECHA', 'HORA']
+
+
+def _require_pyarrow():
+    """Importa pyarrow bajo demanda (dependencia opcional)."""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        return pyarrow, pyarrow.dataset
+    except ImportError as e:
+        raise ImportError("El backend Parquet requiere pyarrow (pip install pyarrow)") from e
+
+
+def _partitioning():
+    pa, ds = _require_pyarrow()
+    # Esquema explícito: nombres como '01' deben seguir siendo texto
+    return ds.partitioning(
+        pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]), flavor='hive'
+    )
+
+
+def write_partitioned_parquet(df: pd.DataFrame, dataset_dir: Union[str, Path], project: str) -> Path:
+    """
+    Agrega un proyecto (temporada) a un dataset Parquet particionado por PROYECTO, SITIO y CAMARA.
+
+    Las particiones existentes de ese proyecto se reemplazan completas, así
+    que volver a ingerirlo no duplica registros; las de otros proyectos no se
+    tocan aunque repitan nombres de sitio y cámara.
+
+    Args:
+        df: DataFrame con SITIO, CAMARA, ESPECIE, FECHA, HORA (y opcionalmente RUTA)
+        dataset_dir: Carpeta raíz del dataset
+        project: Nombre del proyecto o temporada
+
+    Returns:
+        Ruta del dataset
+    """
+    pa, ds = _require_pyarrow()
+
+    project = str(project).strip()
+    if not project:
+        raise ValueError("Falta el nombre del proyecto o temporada")
+
+    columns = DATASET_COLUMNS + [c for c in ('RUTA',) if c in df.columns]
+    frame = df[columns].astype(str)
+    frame.insert(0, 'PROYECTO', project)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+
+    dataset_dir = Path(dataset_dir)
+    if dataset_dir.is_dir():
+        # Cámaras que ya no están en el proyecto también deben desaparecer
+        existing = ds.dataset(dataset_dir, format='parquet', partitioning=_partitioning())
+        for fragment in existing.get_fragments(filter=ds.field('PROYECTO') == project):
+            Path(fragment.path).unlink()
+
+    ds.write_dataset(
+        table, dataset_dir, format='parquet',
+        partitioning=_partitioning(),
+        existing_data_behavior='delete_matching',
+        basename_template='part-{i}.parquet'
+    )
+
+    logger.info(f"Dataset Parquet actualizado: {len(df):,} registros de {project} en {dataset_dir}")
+    return dataset_dir
+
+
+class InMemoryBackend:
+    """Backend sobre un DataFrame completo en memoria."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def trap_days(self) -> pd.DataFrame:
+        return TrapEffortCalculator.calculate_trap_days(self.df)
+
+    def independent_events(self, event_minutes: int = 30) -> pd.DataFrame:
+        detector = IndependentEventDetector(time_threshold_minutes=event_minutes)
+        return detector.detect_independent_events(self.df.copy())
+
+    def rai(self, event_minutes: int = 30) -> pd.DataFrame:
+        detector = IndependentEventDetector(time_threshold_minutes=event_minutes)
+        return detector.calculate_rai(self.independent_events(event_minutes), self.trap_days())
+
+    def temporal_patterns(self) -> pd.DataFrame:
+        return TemporalAnalyzer.analyze_temporal_patterns(self.df.copy())
+
+
+class ParquetBackend:
+    """
+    Backend sobre un dataset Parquet particionado por PROYECTO/SITIO/CAMARA.
+
+    Esfuerzo y patrones temporales se acumulan bloque por bloque; los eventos
+    independientes se calculan cámara por cámara (o cámara y especie si una
+    cámara no cabe en el presupuesto de memoria), que es la unidad en la que
+    se ordenan las fotos. El esfuerzo y los eventos se cuentan por proyecto y
+    cámara: la misma estación en dos temporadas no suma el tiempo entre ellas.
+    """
+
+    # Estimación de memoria por fila de ESPECIE/FECHA/HORA en pandas
+    BYTES_PER_ROW = 200
+    MIN_BATCH_ROWS = 10000
+
+    def __init__(self, dataset_dir: Union[str, Path], max_memory_mb: int = 1024):
+        """
+        Args:
+            dataset_dir: Carpeta raíz del dataset (ver write_partitioned_parquet)
+            max_memory_mb: Memoria máxima aproximada por bloque
+        """
+        _, ds = _require_pyarrow()
+        self.dataset_dir = Path(dataset_dir)
+        self.dataset = ds.dataset(self.dataset_dir, format='parquet', partitioning=_partitioning())
+        self.max_rows = max(self.MIN_BATCH_ROWS, max_memory_mb * 1024 * 1024 // self.BYTES_PER_ROW)
+
+    def _batches(self, columns: List[str]) -> Iterator[pd.DataFrame]:
+        """Recorre el dataset en bloques de a lo más max_rows filas."""
+        scanner = self.dataset.scanner(columns=columns, batch_size=self.max_rows)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def cameras(self) -> List[Tuple[str, str, str, int]]:
+        """Lista (PROYECTO, SITIO, CAMARA, filas) a partir de las particiones, sin leer datos."""
+        _, ds = _require_pyarrow()
+        rows: Dict[Tuple[str, str, str], int] = {}
+        for fragment in self.dataset.get_fragments():
+            keys = ds.get_partition_keys(fragment.partition_expression)
+            camera = (keys['PROYECTO'], keys['SITIO'], keys['CAMARA'])
+            rows[camera] = rows.get(camera, 0) + fragment.count_rows()
+        return [(proyecto, sitio, camara, count) for (proyecto, sitio, camara), count in sorted(rows.items())]
+
+    def _camera_filter(self, proyecto: str, sitio: str, camara: str):
+        _, ds = _require_pyarrow()
+        return (ds.field('PROYECTO') == proyecto) & (ds.field('SITIO') == sitio) & (ds.field('CAMARA') == camara)
+
+    def trap_days(self) -> pd.DataFrame:
+        """Trampas-día por proyecto y cámara (para un proyecto, igual que TrapEffortCalculator)."""
+        parts = []
+        for chunk in self._batches(['PROYECTO', 'SITIO', 'CAMARA', 'FECHA']):
+            parts.append(chunk.groupby(['PROYECTO', 'SITIO', 'CAMARA']).agg(
+                PRIMERA=('FECHA', 'min'), ULTIMA=('FECHA', 'max'), TOTAL_CAPTURAS=('FECHA', 'size')
+            ))
+            # Combinar en cuanto hay varios bloques: el resultado es una fila por cámara
+            if len(parts) > 1:
+                parts = [self._merge_effort(parts)]
+
+        columns = ['PROYECTO', 'SITIO', 'CAMARA', 'PRIMERA_CAPTURA', 'ULTIMA_CAPTURA', 'TRAMPAS_DIA', 'TOTAL_CAPTURAS']
+        if not parts:
+            return pd.DataFrame(columns=columns)
+
+        effort = self._merge_effort(parts).reset_index()
+        primera = pd.to_datetime(effort['PRIMERA'])
+        ultima = pd.to_datetime(effort['ULTIMA'])
+        effort['PRIMERA_CAPTURA'] = primera.dt.strftime('%Y-%m-%d')
+        effort['ULTIMA_CAPTURA'] = ultima.dt.strftime('%Y-%m-%d')
+        effort['TRAMPAS_DIA'] = (ultima - primera).dt.days + 1
+        return effort[columns]
+
+    @staticmethod
+    def _merge_effort(parts: List[pd.DataFrame]) -> pd.DataFrame:
+        return pd.concat(parts).groupby(level=['PROYECTO', 'SITIO', 'CAMARA']).agg(
+            PRIMERA=('PRIMERA', 'min'), ULTIMA=('ULTIMA', 'max'), TOTAL_CAPTURAS=('TOTAL_CAPTURAS', 'sum')
+        )
+
+    def _camera_frames(self) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Pares (proyecto, fotos) de cada cámara (o de cada cámara y especie si la cámara excede la memoria)."""
+        columns = ['ESPECIE', 'FECHA', 'HORA']
+        for proyecto, sitio, camara, count in self.cameras():
+            camera_filter = self._camera_filter(proyecto, sitio, camara)
+
+            if count <= self.max_rows:
+                groups = [camera_filter]
+            else:
+                species = set()
+                scanner = self.dataset.scanner(columns=['ESPECIE'], filter=camera_filter, batch_size=self.max_rows)
+                for batch in scanner.to_batches():
+                    species.update(batch.column('ESPECIE').unique().to_pylist())
+                _, ds = _require_pyarrow()
+                groups = [camera_filter & (ds.field('ESPECIE') == especie) for especie in sorted(species)]
+
+            for group_filter in groups:
+                frame = self.dataset.to_table(columns=columns, filter=group_filter).to_pandas()
+                if len(frame):
+                    frame.insert(0, 'SITIO', sitio)
+                    frame.insert(1, 'CAMARA', camara)
+                    yield proyecto, frame
+
+    def independent_events(self, event_minutes: int = 30) -> pd.DataFrame:
+        """Eventos independientes por proyecto (para un proyecto, igual que detect_independent_events)."""
+        detector = IndependentEventDetector(time_threshold_minutes=event_minutes)
+        parts = [
+            detector.detect_independent_events(frame).assign(PROYECTO=proyecto)
+            for proyecto, frame in self._camera_frames()
+        ]
+        columns = ['PROYECTO', 'SITIO', 'CAMARA', 'ESPECIE', 'CAPTURAS_TOTALES', 'EVENTOS_INDEPENDIENTES']
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(parts, ignore_index=True)[columns].sort_values(
+            ['PROYECTO', 'SITIO', 'CAMARA', 'ESPECIE'], ignore_index=True
+        )
+
+    def rai(self, event_minutes: int = 30) -> pd.DataFrame:
+        detector = IndependentEventDetector(time_threshold_minutes=event_minutes)
+        return detector.calculate_rai(self.independent_events(event_minutes), self.trap_days())
+
+    def temporal_patterns(self) -> pd.DataFrame:
+        """Distribución por período del día (mismo resultado que TemporalAnalyzer)."""
+        periods = ['CREPUSCULAR_MATUTINO', 'DIURNO', 'CREPUSCULAR_VESPERTINO', 'NOCTURNO']
+        counts = None
+        for chunk in self._batches(['ESPECIE', 'HORA']):
+            # Clasificar cada hora distinta una sola vez
+            hours = chunk['HORA'].unique()
+            lookup = {hora: TemporalAnalyzer.classify_time_period(hora) for hora in hours}
+            chunk_counts = chunk.groupby(['ESPECIE', chunk['HORA'].map(lookup).rename('PERIODO')]).size()
+            counts = chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
+
+        columns = ['ESPECIE', 'TOTAL_CAPTURAS'] + periods + ['PATRON_DOMINANTE']
+        if counts is None:
+            return pd.DataFrame(columns=columns)
+
+        table = counts.astype('int64').unstack(fill_value=0)
+        result = pd.DataFrame({'ESPECIE': table.index})
+        result['TOTAL_CAPTURAS'] = table.sum(axis=1).to_numpy()
+        for period in periods:
+            result[period] = table[period].to_numpy() if period in table.columns else 0
+        result['PATRON_DOMINANTE'] = [
+            TemporalAnalyzer.dominant_period(row) for row in table.to_dict('records')
+        ]
+        return result[columns]
+
+
+def get_analysis_backend(source: Union[pd.DataFrame, str, Path], max_memory_mb: int = 1024):
+    """
+    Elige el backend según la fuente de datos.
+
+    Args:
+        source: DataFrame en memoria o carpeta de un dataset Parquet particionado
+        max_memory_mb: Memoria máxima por bloque (solo Parquet)
+
+    Returns:
+        InMemoryBackend o ParquetBackend
+    """
+    if isinstance(source, pd.DataFrame):
+        return InMemoryBackend(source)
+    return ParquetBackend(source, max_memory_mb=max_memory_mb)
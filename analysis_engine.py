@@ -9,6 +9,59 @@ from typing import Dict, List, Tuple
 from collections import defaultdict
 
 
+class ClockOffsetCorrector:
+    """Aplica desfases de reloj registrados por cámara al momento del análisis."""
+    
+    @staticmethod
+    def apply_offsets(df: pd.DataFrame, offsets: List[Dict]) -> pd.DataFrame:
+        """
+        Corrige FECHA y HORA según los desfases de reloj registrados.
+        
+        Los datos originales no se modifican y no se vuelve a leer EXIF:
+        se retorna una copia con las filas afectadas corregidas.
+        
+        Args:
+            df: DataFrame con columnas SITIO, CAMARA, FECHA, HORA
+            offsets: Registros de camera_clock_offsets (site_name, camera_name,
+                offset_seconds, valid_from, valid_to)
+            
+        Returns:
+            DataFrame corregido (el mismo objeto si no hay desfases)
+        """
+        if not offsets or len(df) == 0:
+            return df
+        
+        timestamps = pd.to_datetime(df['FECHA'] + ' ' + df['HORA'], errors='coerce')
+        shift_seconds = pd.Series(0.0, index=df.index)
+        
+        for offset in offsets:
+            valid_from = pd.to_datetime(offset.get('valid_from') or None, errors='coerce')
+            valid_to = pd.to_datetime(offset.get('valid_to') or None, errors='coerce')
+            # Un rango ilegible (guardado antes de validar la entrada) no se aplica
+            if (offset.get('valid_from') and pd.isna(valid_from)) or (offset.get('valid_to') and pd.isna(valid_to)):
+                continue
+            
+            mask = (df['SITIO'] == offset['site_name']) & (df['CAMARA'] == offset['camera_name'])
+            # Los rangos se expresan en la hora registrada por la cámara
+            if offset.get('valid_from'):
+                mask &= timestamps >= valid_from
+            if offset.get('valid_to'):
+                mask &= timestamps <= valid_to
+            shift_seconds[mask] += offset['offset_seconds']
+        
+        changed = (shift_seconds != 0) & timestamps.notna()
+        if not changed.any():
+            return df
+        
+        corrected = timestamps[changed] + pd.to_timedelta(shift_seconds[changed], unit='s')
+        
+        df = df.copy()
+        df.loc[changed, 'FECHA'] = corrected.dt.strftime('%Y-%m-%d')
+        df.loc[changed, 'HORA'] = corrected.dt.strftime('%H:%M:%S')
+        
+        return df
+
+
 class TrapEffortCalculator:
     """Calculador de esfuerzo de muestreo (trampas-día)."""
     
@@ -102,6 +155,41 @@ class IndependentEventDetector:
         
         return pd.DataFrame(events_data)
     
+    def assign_event_ids(self, df: pd.DataFrame,
+                         group_columns: Tuple[str, ...] = ('SITIO', 'CAMARA', 'ESPECIE')) -> pd.Series:
+        """
+        Asigna a cada foto el número de su evento independiente.
+        
+        Usa la misma regla que detect_independent_events: dentro de cada
+        grupo, una foto separada de la anterior por al menos el umbral
+        inicia un evento nuevo. Las fotos sin fecha-hora válida no entran en
+        las secuencias: cada una queda como evento aislado al final.
+        
+        Args:
+            df: DataFrame con columnas FECHA, HORA y las de group_columns
+            group_columns: Columnas que definen el grupo
+            
+        Returns:
+            Serie alineada con df con IDs de evento (1..n, en orden de grupo y tiempo)
+        """
+        if len(df) == 0:
+            return pd.Series(dtype='int64', index=df.index)
+        
+        keys = list(group_columns)
+        work = df[keys].copy()
+        work['_DT'] = pd.to_datetime(df['FECHA'].astype(str) + ' ' + df['HORA'].astype(str), errors='coerce')
+        invalid = work.index[work['_DT'].isna()]
+        work = work.dropna(subset=['_DT']).sort_values(keys + ['_DT'], kind='stable')
+        
+        new_group = (work[keys] != work[keys].shift()).any(axis=1)
+        new_event = new_group | (work['_DT'].diff() >= self.time_threshold)
+        
+        event_ids = new_event.cumsum().astype('int64')
+        if len(invalid):
+            start = int(event_ids.iloc[-1]) if len(event_ids) else 0
+            event_ids = pd.concat([event_ids, pd.Series(range(start + 1, start + 1 + len(invalid)), index=invalid)])
+        return event_ids.astype('int64').reindex(df.index)
+    
     def calculate_rai(self, events_df: pd.DataFrame, effort_df: pd.DataFrame) -> pd.DataFrame:
         """
         Calcula RAI (Relative Abundance Index) por especie.
@@ -173,6 +261,25 @@ class TemporalAnalyzer:
         except:
             return 'DESCONOCIDO'
     
+    @staticmethod
+    def dominant_period(period_counts: Dict[str, int]) -> str:
+        """
+        Período con más capturas.
+        
+        En empates gana el primero en orden del día (DESCONOCIDO al final),
+        así el resultado no depende del orden en que se contaron.
+        
+        Args:
+            period_counts: Capturas por período
+        
+        Returns:
+            Período dominante ('DESCONOCIDO' si no hay capturas)
+        """
+        order = list(TemporalAnalyzer.PERIODS) + ['DESCONOCIDO']
+        if not any(period_counts.get(period, 0) > 0 for period in order):
+            return 'DESCONOCIDO'
+        return max(order, key=lambda period: period_counts.get(period, 0))
+    
     @staticmethod
     def analyze_temporal_patterns(df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -201,7 +308,7 @@ class TemporalAnalyzer:
                 'DIURNO': period_counts.get('DIURNO', 0),
                 'CREPUSCULAR_VESPERTINO': period_counts.get('CREPUSCULAR_VESPERTINO', 0),
                 'NOCTURNO': period_counts.get('NOCTURNO', 0),
-                'PATRON_DOMINANTE': max(period_counts, key=period_counts.get) if period_counts else 'DESCONOCIDO'
+                'PATRON_DOMINANTE': TemporalAnalyzer.dominant_period(period_counts)
             })
         
         return pd.DataFrame(temporal_data)
@@ -321,3 +428,128 @@ class GapDetector:
                     })
         
         return gaps
+
+
+class DailyDetectionAggregator:
+    """
+    Agregados diarios por sitio, cámara y especie (fotos y eventos por día).
+    
+    Las tablas diarias tienen miles de filas en lugar de millones de fotos y
+    bastan para esfuerzo, RAI, gaps y acumulación de especies.
+    """
+    
+    DAILY_COLUMNS = ['SITIO', 'CAMARA', 'ESPECIE', 'FECHA', 'FOTOS', 'EVENTOS']
+    
+    # Categorías que no cuentan como especie en la acumulación
+    NON_SPECIES = {'VACIO', 'HUMANO', 'CLASIFICACION_PENDIENTE'}
+    
+    @staticmethod
+    def aggregate(df: pd.DataFrame, event_minutes: int = 30) -> pd.DataFrame:
+        """
+        Agrega fotos a conteos diarios.
+        
+        Cada evento independiente se cuenta en el día en que inicia.
+        
+        Args:
+            df: DataFrame con columnas SITIO, CAMARA, ESPECIE, FECHA, HORA
+            event_minutes: Minutos entre eventos independientes
+            
+        Returns:
+            DataFrame con SITIO, CAMARA, ESPECIE, FECHA, FOTOS, EVENTOS
+        """
+        timestamps = pd.to_datetime(df['FECHA'].astype(str) + ' ' + df['HORA'].astype(str), errors='coerce')
+        df = df[timestamps.notna()]
+        if len(df) == 0:
+            return pd.DataFrame(columns=DailyDetectionAggregator.DAILY_COLUMNS)
+        
+        keys = ['SITIO', 'CAMARA', 'ESPECIE', 'FECHA']
+        detector = IndependentEventDetector(time_threshold_minutes=event_minutes)
+        
+        work = df[keys].copy()
+        work['EVENTO'] = detector.assign_event_ids(df)
+        work['_DT'] = df['FECHA'] + ' ' + df['HORA']
+        
+        photos = work.groupby(keys).size().rename('FOTOS')
+        
+        starts = work.sort_values('_DT', kind='stable').drop_duplicates('EVENTO')
+        events = starts.groupby(keys).size().rename('EVENTOS')
+        
+        daily = pd.concat([photos, events], axis=1).fillna(0).astype('int64').reset_index()
+        return daily[DailyDetectionAggregator.DAILY_COLUMNS]
+    
+    @staticmethod
+    def trap_days(daily: pd.DataFrame) -> pd.DataFrame:
+        """
+        Trampas-día por cámara desde agregados diarios.
+        
+        Mismo resultado que TrapEffortCalculator.calculate_trap_days.
+        """
+        grouped = daily.groupby(['SITIO', 'CAMARA'])
+        effort = grouped.agg(
+            PRIMERA_CAPTURA=('FECHA', 'min'),
+            ULTIMA_CAPTURA=('FECHA', 'max'),
+            TOTAL_CAPTURAS=('FOTOS', 'sum')
+        ).reset_index()
+        
+        dias = pd.to_datetime(effort['ULTIMA_CAPTURA']) - pd.to_datetime(effort['PRIMERA_CAPTURA'])
+        effort['TRAMPAS_DIA'] = dias.dt.days + 1
+        
+        return effort[['SITIO', 'CAMARA', 'PRIMERA_CAPTURA', 'ULTIMA_CAPTURA', 'TRAMPAS_DIA', 'TOTAL_CAPTURAS']]
+    
+    @staticmethod
+    def independent_events(daily: pd.DataFrame) -> pd.DataFrame:
+        """
+        Eventos independientes por sitio, cámara y especie desde agregados diarios.
+        
+        Mismo formato que IndependentEventDetector.detect_independent_events,
+        así que sirve de entrada para calculate_rai.
+        """
+        return daily.groupby(['SITIO', 'CAMARA', 'ESPECIE']).agg(
+            CAPTURAS_TOTALES=('FOTOS', 'sum'),
+            EVENTOS_INDEPENDIENTES=('EVENTOS', 'sum')
+        ).reset_index()
+    
+    @staticmethod
+    def detect_gaps(daily: pd.DataFrame, min_gap_days: int = 7) -> List[Dict]:
+        """
+        Períodos sin capturas por cámara desde agregados diarios.
+        
+        Mismo resultado que GapDetector.detect_gaps.
+        """
+        days = daily[['SITIO', 'CAMARA', 'FECHA']].drop_duplicates().sort_values(['SITIO', 'CAMARA', 'FECHA'])
+        fechas = pd.to_datetime(days['FECHA'])
+        
+        same_camera = (days['SITIO'] == days['SITIO'].shift()) & (days['CAMARA'] == days['CAMARA'].shift())
+        gap_days = (fechas - fechas.shift()).dt.days
+        is_gap = same_camera & (gap_days >= min_gap_days)
+        
+        previous = days['FECHA'].shift()
+        return [
+            {
+                'SITIO': sitio,
+                'CAMARA': camara,
+                'FECHA_INICIO_GAP': inicio,
+                'FECHA_FIN_GAP': fin,
+                'DIAS_SIN_CAPTURAS': int(dias)
+            }
+            for sitio, camara, inicio, fin, dias in zip(
+                days['SITIO'][is_gap], days['CAMARA'][is_gap], previous[is_gap],
+                days['FECHA'][is_gap], gap_days[is_gap]
+            )
+        ]
+    
+    @staticmethod
+    def species_accumulation(daily: pd.DataFrame) -> pd.DataFrame:
+        """
+        Curva de acumulación de especies por fecha de primera detección.
+        
+        Returns:
+            DataFrame con FECHA, ESPECIES_NUEVAS y ESPECIES_ACUMULADAS
+        """
+        species = daily[~daily['ESPECIE'].isin(DailyDetectionAggregator.NON_SPECIES)]
+        first_seen = species.groupby('ESPECIE')['FECHA'].min()
+        
+        curve = first_seen.value_counts().sort_index().rename('ESPECIES_NUEVAS').rename_axis('FECHA').reset_index()
+        curve['ESPECIES_ACUMULADAS'] = curve['ESPECIES_NUEVAS'].cumsum()
+        
+        return curve
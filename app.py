@@ -5,6 +5,8 @@ Versión 2.0 - Con clasificación automática y análisis avanzado
 Desarrollado por: Biólogo Erick Elio Chavez Gurrola
 """
 
+import io
+import zipfile
 import streamlit as st
 import pandas as pd
 from pathlib import Path
@@ -15,14 +17,22 @@ import time
 from logger import get_logger
 from config_manager import get_config
 from database_manager import get_database
-from metadata_extractor import AdvancedMetadataExtractor, UTMCoordinateManager
+from metadata_extractor import AdvancedMetadataExtractor, UTMCoordinateManager, GPSPositionAggregator
 from analysis_engine import (
-    TrapEffortCalculator, IndependentEventDetector,
-    TemporalAnalyzer, VisitFrequencyCalculator, GapDetector
+    IndependentEventDetector, TemporalAnalyzer, VisitFrequencyCalculator,
+    ClockOffsetCorrector, DailyDetectionAggregator
 )
-from data_validator import QualityReporter
-from report_generator import export_dual_excel
-from ai_classifier import CUDADetector, get_manual_assistant
+from data_validator import QualityReporter, TimestampAnomalyDetector
+from duplicate_detector import DuplicatePhotoDetector
+from camtrap_dp import CamtrapDPWriter, CamtrapDPReader
+from csv_importers import CSVDatasetImporter
+from project_comparison import ProjectComparison
+from analysis_backends import ParquetBackend, write_partitioned_parquet
+from report_generator import (
+    export_dual_excel_to_buffers, dataset_fingerprint, ColumnarExporter, ExportError
+)
+from ai_classifier import CUDADetector, EmptyFramePrefilter, get_classifier, get_manual_assistant
+from validation_queue import ValidationQueue
 from utils import clean_species_name, standardize_category, get_common_species_mexico
 
 # Inicializar
@@ -83,6 +93,14 @@ if 'processed_data' not in st.session_state:
     st.session_state.processed_data = None
 if 'project_id' not in st.session_state:
     st.session_state.project_id = None
+if 'gps_positions' not in st.session_state:
+    st.session_state.gps_positions = None
+if 'project_path' not in st.session_state:
+    st.session_state.project_path = None
+if 'export_cache' not in st.session_state:
+    st.session_state.export_cache = None
+if 'camtrap_cache' not in st.session_state:
+    st.session_state.camtrap_cache = None
 if 'gpu_info' not in st.session_state:
     # Detectar GPU al inicio
     gpu_available, gpu_name, cuda_version = CUDADetector.detect_cuda()
@@ -128,144 +146,56 @@ with st.sidebar:
     if independent_event_minutes != config.get_independent_event_minutes():
         config.set_independent_event_minutes(independent_event_minutes)
     
-    st.divider()
-    
-    # Enlace a FORXIME/2
-    st.subheader("🔗 FORXIME/2")
-    st.markdown("""
-    Esta plataforma genera Excel compatible con **FORXIME/2** para análisis estadístico avanzado.
-    
-    [Abrir FORXIME/2](https://forxime2-udpq6cmnacvdn4ai9qdj9g.streamlit.app/)
-    """)
-
-# Tabs principales
-tab1, tab2, tab3, tab4 = st.tabs([
-    "📁 Procesamiento",
-    "📊 Análisis y Reportes",
-    "📍 Coordenadas UTM",
-    "ℹ️ Información"
-])
-
-# TAB 1: PROCESAMIENTO
-with tab1:
-    st.header("📁 Procesamiento de Datos")
+    exclude_duplicates = st.checkbox(
+        "Excluir fotos duplicadas",
+        value=config.should_exclude_duplicates(),
+        help="Fotos idénticas copiadas en dos carpetas (misma tarjeta) se cuentan una sola vez"
+    )
     
-    # Información de estructura
-    with st.expander("📋 Estructura de Carpetas Requerida", expanded=False):
-        st.markdown("""
-        ```
-        PROYECTO/
-        ├── SITIO_1/
-        │   ├── CAMARA_1/
-        │   │   ├── ESPECIE_A/
-        │   │   │   └── fotos.jpg
-        │   │   └── VACIO/
-        │   │       └── fotos.jpg
-        │   └── CAMARA_2/
-        │       └── ...
-        └── SITIO_2/
-            └── ...
-        ```
-        
-        **Reglas:**
-        - Máximo 10 cámaras por sitio
-        - Solo imágenes: JPG, JPEG, PNG
-        - Videos se ignoran automáticamente
-        """)
+    if exclude_duplicates != config.should_exclude_duplicates():
+        config.set_exclude_duplicates(exclude_duplicates)
     
-    # Selector de proyecto
-    project_path = st.text_input(
-        "📂 Ruta del Proyecto",
-        placeholder="C:\\Users\\Usuario\\Documents\\MiProyecto",
-        help="Ruta completa a la carpeta del proyecto"
+    columnar_formats = st.multiselect(
+        "Formatos adicionales de exportación",
+        options=list(ColumnarExporter.SUPPORTED_FORMATS),
+        default=config.get_columnar_formats(),
+        help="Mismas columnas que FORXIME/2, en archivos que R y Python cargan mucho más rápido"
     )
     
-    if project_path:
-        project_path = project_path.strip().strip('"').strip("'")
-        project_path_obj = Path(project_path)
-        
-        if not project_path_obj.exists():
-            st.error(f"❌ La carpeta no existe: {project_path}")
-        elif not project_path_obj.is_dir():
-            st.error(f"❌ La ruta no es una carpeta válida")
-        else:
-            st.success(f"✓ Carpeta válida: {project_path_obj.name}")
-            
-            # Botón de procesamiento
-            if st.button("🚀 Procesar Proyecto", type="primary", use_container_width=True):
-                process_project(project_path_obj)
-
-# TAB 2: ANÁLISIS Y REPORTES
-with tab2:
-    st.header("📊 Análisis y Reportes")
-    
-    if st.session_state.processed_data is None:
-        st.info("👈 Procesa un proyecto primero en la pestaña 'Procesamiento'")
-    else:
-        show_analysis_and_reports()
-
-# TAB 3: COORDENADAS UTM
-with tab3:
-    st.header("📍 Coordenadas UTM por Cámara")
+    if columnar_formats != config.get_columnar_formats():
+        config.set_columnar_formats(columnar_formats)
     
-    if st.session_state.processed_data is None or st.session_state.project_id is None:
-        st.info("👈 Procesa un proyecto primero")
-    else:
-        show_utm_coordinates_input()
-
-# TAB 4: INFORMACIÓN
-with tab4:
-    st.header("ℹ️ Información de la Plataforma")
+    save_exports = st.checkbox(
+        "Guardar exportaciones en la carpeta del proyecto",
+        value=config.should_save_exports_to_disk(),
+        help="Las descargas siempre están disponibles; esto además guarda una copia en disco"
+    )
     
-    col1, col2 = st.columns(2)
+    if save_exports != config.should_save_exports_to_disk():
+        config.set_save_exports_to_disk(save_exports)
     
-    with col1:
-        st.subheader("✨ Características")
-        st.markdown("""
-        - ✅ Extracción automática de metadatos EXIF
-        - ✅ Clasificación con IA (si GPU disponible)
-        - ✅ Cálculo de trampas-día
-        - ✅ Detección de eventos independientes
-        - ✅ Análisis temporal (diurno/nocturno)
-        - ✅ Coordenadas UTM con validación
-        - ✅ Exportación dual de Excel
-        - ✅ Compatible con FORXIME/2
-        - ✅ 100% offline (después de setup)
-        """)
+    max_memory_mb = st.number_input(
+        "Memoria máxima para archivos Parquet (MB)",
+        min_value=64,
+        max_value=65536,
+        value=config.get_max_memory_mb(),
+        step=256,
+        help="Tamaño aproximado de cada bloque al analizar un dataset Parquet particionado"
+    )
     
-    with col2:
-        st.subheader("📄 Formatos de Exportación")
-        st.markdown("""
-        **Excel Básico (FORXIME/2):**
-        - SITIO, CAMARA, ESPECIE, FECHA, HORA
-        - Listo para importar en FORXIME/2
-        
-        **Excel Completo:**
-        - Todos los datos + análisis
-        - Coordenadas UTM
-        - Esfuerzo de muestreo
-        - Eventos independientes
-        - Análisis temporal
-        - Resumen ejecutivo
-        """)
+    if max_memory_mb != config.get_max_memory_mb():
+        config.set_max_memory_mb(max_memory_mb)
     
     st.divider()
     
-    st.subheader("🔧 Requisitos del Sistema")
+    # Enlace a FORXIME/2
+    st.subheader("🔗 FORXIME/2")
     st.markdown("""
-    **Mínimos:**
-    - Python 3.8+
-    - 4 GB RAM
-    - 2 GB espacio en disco
+    Esta plataforma genera Excel compatible con **FORXIME/2** para análisis estadístico avanzado.
     
-    **Recomendados (para IA):**
-    - GPU NVIDIA RTX 3060+ (6GB VRAM)
-    - CUDA 11.8+
-    - 16 GB RAM
-    - 10 GB espacio (modelos de IA)
+    [Abrir FORXIME/2](https://forxime2-udpq6cmnacvdn4ai9qdj9g.streamlit.app/)
     """)
 
-
 # FUNCIONES AUXILIARES
 
 def process_project(project_path: Path):
@@ -275,6 +205,7 @@ def process_project(project_path: Path):
     project_name = project_path.name
     project_id = db.create_project(project_name, str(project_path))
     st.session_state.project_id = project_id
+    st.session_state.project_path = str(project_path)
     
     logger.info(f"Procesando proyecto: {project_name}")
     
@@ -316,6 +247,7 @@ def process_project(project_path: Path):
     
     # Procesar fotos
     data = []
+    gps_points = []
     start_time = time.time()
     
     for i, file_info in enumerate(all_files):
@@ -333,7 +265,18 @@ def process_project(project_path: Path):
                 'FECHA': metadata['fecha'],
                 'HORA': metadata['hora'],
                 'CAMERA_MODEL': metadata['camera_model'],
-                'TEMPERATURE': metadata['temperature']
+                'TEMPERATURE': metadata['temperature'],
+                'ARCHIVO': file_info['path'].name,
+                'RUTA': str(file_info['path'])
+            })
+        
+        # Capturar GPS en la misma pasada (no requiere releer imágenes)
+        if metadata['latitude'] is not None:
+            gps_points.append({
+                'SITIO': file_info['sitio'],
+                'CAMARA': file_info['camara'],
+                'LATITUD': metadata['latitude'],
+                'LONGITUD': metadata['longitude']
             })
         
         # Actualizar progreso
@@ -352,14 +295,33 @@ def process_project(project_path: Path):
         st.error("❌ No se encontraron fotos con metadatos EXIF válidos")
         return
     
+    # Detectar fotos duplicadas entre carpetas
+    status_text.text("🔍 Buscando fotos duplicadas...")
+    duplicates = DuplicatePhotoDetector.find_duplicates(df)
+    duplicate_summary = DuplicatePhotoDetector.summarize(duplicates)
+    if duplicate_summary['clusters'] > 0:
+        logger.info(
+            f"Duplicados: {duplicate_summary['duplicate_photos']} copias "
+            f"en {duplicate_summary['clusters']} grupos"
+        )
+        if config.should_exclude_duplicates():
+            df = DuplicatePhotoDetector.exclude_duplicates(df, duplicates)
+    
     status_text.text(f"✅ Procesadas {len(df):,} fotos en {processing_time:.1f} segundos")
     
     # Guardar en sesión
     st.session_state.processed_data = df
     
-    # Actualizar estadísticas del proyecto
+    # Posiciones de cámaras derivadas de GPS EXIF
+    gps_positions = GPSPositionAggregator.aggregate_camera_positions(pd.DataFrame(gps_points))
+    st.session_state.gps_positions = gps_positions if len(gps_positions) > 0 else None
+    if st.session_state.gps_positions is not None:
+        logger.info(f"Posiciones GPS derivadas para {len(gps_positions)} cámaras")
+    
+    # Actualizar estadísticas del proyecto y guardar registros por foto
     db.update_project_stats(project_id, len(df), df['ESPECIE'].nunique())
     db.add_processing_record(project_id, len(df), processing_time=processing_time)
+    persist_project_records(project_id, df)
     
     # Mostrar resultados
     st.success(f"✅ Proyecto procesado exitosamente")
@@ -372,6 +334,15 @@ def process_project(project_path: Path):
     with col3:
         st.metric("Especies", df['ESPECIE'].nunique())
     
+    # Duplicados
+    if duplicate_summary['clusters'] > 0:
+        action = "excluidas" if config.should_exclude_duplicates() else "incluidas en los datos"
+        with st.expander(
+            f"⚠️ {duplicate_summary['duplicate_photos']:,} fotos duplicadas "
+            f"en {duplicate_summary['clusters']:,} grupos ({action})"
+        ):
+            st.dataframe(duplicates, use_container_width=True)
+    
     # Vista previa
     st.subheader("📋 Vista Previa de Datos")
     st.dataframe(df.head(20), use_container_width=True)
@@ -387,19 +358,38 @@ def show_analysis_and_reports():
     """Muestra análisis y genera reportes."""
     df = st.session_state.processed_data
     
+    # Revisión de relojes y desfases registrados
+    show_clock_review(df)
+    
+    # Aplicar desfases de reloj (sin modificar los datos originales)
+    clock_offsets = db.get_camera_clock_offsets(st.session_state.project_id)
+    df = ClockOffsetCorrector.apply_offsets(df, clock_offsets)
+    
     st.subheader("📈 Análisis Estadístico")
     
+    # Agregados diarios: se rehacen si cambió el umbral de eventos (o al abrir el proyecto)
+    project_id = st.session_state.project_id
+    event_minutes = config.get_independent_event_minutes()
+    if st.session_state.get('aggregates_key') != (project_id, event_minutes):
+        refresh_project_aggregates(project_id, st.session_state.processed_data)
+    
     # Calcular análisis
     with st.spinner("Calculando análisis..."):
+        error = wait_for_aggregate_writes()
+        if error is not None:
+            st.error(f"❌ No se pudieron actualizar los agregados diarios: {error}")
+            return
+        daily_df = db.get_daily_detections(project_id)
+        
         # Esfuerzo de muestreo
-        effort_df = TrapEffortCalculator.calculate_trap_days(df)
+        effort_df = DailyDetectionAggregator.trap_days(daily_df)
+        gaps = DailyDetectionAggregator.detect_gaps(daily_df)
         
         # Eventos independientes
-        event_detector = IndependentEventDetector(
-            time_threshold_minutes=config.get_independent_event_minutes()
-        )
-        events_df = event_detector.detect_independent_events(df)
+        event_detector = IndependentEventDetector(time_threshold_minutes=event_minutes)
+        events_df = DailyDetectionAggregator.independent_events(daily_df)
         rai_df = event_detector.calculate_rai(events_df, effort_df)
+        accumulation_df = DailyDetectionAggregator.species_accumulation(daily_df)
         
         # Análisis temporal
         temporal_df = TemporalAnalyzer.analyze_temporal_patterns(df)
@@ -414,20 +404,483 @@ def show_analysis_and_reports():
     with analysis_tab1:
         st.dataframe(effort_df, use_container_width=True)
         st.metric("Esfuerzo Total", f"{effort_df['TRAMPAS_DIA'].sum()} trampas-día")
+        if gaps:
+            st.caption(f"Períodos de 7 días o más sin capturas: {len(gaps)}")
+            st.dataframe(pd.DataFrame(gaps), use_container_width=True)
     
     with analysis_tab2:
         st.dataframe(events_df, use_container_width=True)
         st.dataframe(rai_df, use_container_width=True)
+        if len(accumulation_df) > 0:
+            st.caption("Acumulación de especies")
+            st.line_chart(accumulation_df.set_index('FECHA')['ESPECIES_ACUMULADAS'])
     
     with analysis_tab3:
         st.dataframe(temporal_df, use_container_width=True)
     
+    if 'RUTA' in df.columns:
+        show_prefilter_evaluation(df)
+        show_validation_queue(df)
+        show_manual_sequence_labeling()
+    
     # Botón de exportación
     st.divider()
     st.subheader("📥 Exportar Resultados")
     
+    # Obtener coordenadas
+    coordinates_data = UTMCoordinateManager.get_all_coordinates_for_export(st.session_state.project_id)
+    coordinates_df = pd.DataFrame(coordinates_data) if coordinates_data else None
+    
+    export_key = (
+        dataset_fingerprint(df, effort_df, events_df, temporal_df, coordinates_df),
+        tuple(config.get_columnar_formats())
+    )
+    
     if st.button("💾 Generar Excel (Básico + Completo)", type="primary", use_container_width=True):
-        generate_excel_exports(df, effort_df, events_df, temporal_df)
+        generate_excel_exports(df, effort_df, events_df, temporal_df, coordinates_df, export_key)
+    
+    # Descargas desde memoria (se conservan entre recargas mientras los datos no cambien)
+    cache = st.session_state.export_cache
+    if cache is not None and cache['key'] == export_key:
+        show_export_downloads(cache['files'])
+    
+    # Paquete Camtrap DP (estándar de intercambio)
+    camtrap_key = (export_key[0], config.get_independent_event_minutes(), config.get_camtrap_utc_offset())
+    if st.button("📦 Generar paquete Camtrap DP", use_container_width=True):
+        generate_camtrap_package(df, camtrap_key)
+    
+    camtrap_cache = st.session_state.camtrap_cache
+    if camtrap_cache is not None and camtrap_cache['key'] == camtrap_key:
+        st.download_button(
+            "⬇️ Descargar Camtrap DP",
+            camtrap_cache['content'],
+            file_name=camtrap_cache['filename'],
+            mime="application/zip"
+        )
+
+
+def show_prefilter_evaluation(df):
+    """Evalúa el prefiltro de fotos vacías contra las carpetas etiquetadas del proyecto."""
+    with st.expander("🔎 Prefiltro de fotos vacías (evaluación)", expanded=False):
+        st.caption(
+            "Ráfagas sin movimiento entre fotos consecutivas se marcan VACIO sin pasar por el modelo. "
+            "Aquí se compara con las especies de las carpetas."
+        )
+        if not st.button("▶️ Evaluar prefiltro", use_container_width=True):
+            return
+        
+        prefilter = EmptyFramePrefilter(
+            burst_gap_seconds=config.get("ai.burst_gap_seconds", 10),
+            motion_threshold=config.get("ai.motion_threshold", 0.005),
+            decode_workers=config.get("ai.decode_workers", 4)
+        )
+        with st.spinner("Comparando ráfagas..."):
+            screening = prefilter.find_empty(df)
+            report = EmptyFramePrefilter.evaluate(df, screening)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Fotos descartadas", f"{report['descartadas']:,}", f"{report['tasa_descarte']:.1%}")
+        with col2:
+            st.metric("Recall fotos con fauna", f"{report['recall_no_vacias']:.1%}")
+        with col3:
+            st.metric("Descartadas realmente vacías", f"{report['precision_vacias']:.1%}")
+        
+        missed = df.loc[screening['VACIA'] & ~df['ESPECIE'].isin(['VACIO', 'CLASIFICACION_PENDIENTE'])]
+        if len(missed) > 0:
+            st.warning(f"⚠️ {len(missed)} fotos con fauna quedarían descartadas")
+            st.dataframe(missed[['SITIO', 'CAMARA', 'ESPECIE', 'FECHA', 'HORA', 'RUTA']].head(100),
+                         use_container_width=True)
+
+
+UNVALIDATED_LABEL = "(sin validar)"
+
+
+def get_validation_queue() -> ValidationQueue:
+    """Cola de validación del proyecto activo (una por sesión)."""
+    queue = st.session_state.get('validation_queue')
+    if queue is None or queue.project_id != st.session_state.project_id:
+        if queue is not None:
+            queue.close()
+        queue = ValidationQueue(
+            st.session_state.project_id, db,
+            events_per_page=config.get("ai.validation_events_per_page", 10),
+            decode_workers=config.get("ai.decode_workers", 4)
+        )
+        st.session_state.validation_queue = queue
+        st.session_state.validation_page = 0
+    return queue
+
+
+def classify_for_validation(df, queue: ValidationQueue):
+    """Clasifica las fotos del proyecto con IA y rehace la cola de validación."""
+    photos = df[df['RUTA'].fillna('').astype(str) != '']
+    if len(photos) == 0:
+        st.warning("⚠️ El proyecto no tiene rutas de imágenes para clasificar")
+        return
+    
+    progress_bar = st.progress(0)
+    with st.spinner("Clasificando fotos..."):
+        predictions = get_classifier().classify_frames(
+            photos, lambda done, total: progress_bar.progress(done / total)
+        )
+        summary = queue.enqueue(
+            photos, predictions,
+            burst_gap_seconds=config.get("ai.burst_gap_seconds", 10),
+            confidence_threshold=config.get_confidence_threshold(),
+            auto_validate=config.get("ai.auto_validate_high_confidence", False)
+        )
+    
+    st.session_state.validation_page = 0
+    st.success(
+        f"✅ {len(photos):,} fotos clasificadas: {summary['pendiente']:,} por validar, "
+        f"{summary['automatica']:,} validadas automáticamente"
+    )
+
+
+def save_validated_labels(project_id: int, queue: ValidationQueue, page, labels):
+    """
+    Valida fotos de la cola (ruta -> especie) y aplica la especie al proyecto activo.
+    
+    La cola y las fotos de la base se escriben juntas al vaciar el lote (ver
+    DatabaseManager.save_validations); la sesión se actualiza por el
+    photo_index de cada foto y los agregados se rehacen después de esa escritura.
+    """
+    queue.validate(labels)
+    queue.flush()
+    
+    photo_index = page.drop_duplicates('path').set_index('path')['photo_index'].reindex(list(labels))
+    known = photo_index.notna() & photo_index.isin(st.session_state.processed_data.index)
+    if not known.any():
+        return
+    
+    species = apply_session_labels(pd.Series(
+        [labels[path] for path in photo_index.index[known]],
+        index=photo_index[known].astype('int64').to_numpy()
+    ))
+    refresh_labeled_project(project_id, species.index)
+
+
+def show_validation_queue(df):
+    """Valida predicciones de IA por eventos, empezando por las de menor confianza."""
+    with st.expander("✅ Cola de validación de IA", expanded=False):
+        queue = get_validation_queue()
+        
+        if st.button("🤖 Clasificar fotos con IA y actualizar cola", use_container_width=True):
+            classify_for_validation(df, queue)
+        
+        summary = queue.summary()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Por validar", f"{summary['pendiente']:,}")
+        with col2:
+            st.metric("Validadas", f"{summary['validada']:,}")
+        with col3:
+            st.metric("Validadas automáticamente", f"{summary['automatica']:,}")
+        
+        if summary['pendiente'] == 0:
+            st.caption("No hay fotos pendientes de validar")
+            return
+        
+        page_number = st.session_state.validation_page
+        page = queue.page(page_number)
+        if len(page) == 0 and page_number > 0:
+            st.session_state.validation_page = page_number = 0
+            page = queue.page(0)
+        
+        species_options = [
+            s for s in dict.fromkeys(db.get_known_species_names() + get_common_species_mexico())
+            if s != 'CLASIFICACION_PENDIENTE'
+        ]
+        
+        st.caption(f"Página {page_number + 1}: eventos de menor confianza primero; la etiqueta se aplica a todo el evento")
+        with st.form("validation_page_form"):
+            labels = {}
+            for event_id, event in page.groupby('event_id', sort=False):
+                first = event.iloc[0]
+                taken_at = pd.to_datetime(first['taken_at'], unit='s') if pd.notna(first['taken_at']) else None
+                predicted = event['predicted_species'].mode().iloc[0]
+                st.markdown(
+                    f"**{first['site_name']} > {first['camera_name']}** · "
+                    f"{taken_at.strftime('%Y-%m-%d %H:%M:%S') if taken_at is not None else 'sin fecha'} · "
+                    f"{len(event)} fotos · IA: {predicted} ({event['confidence'].min():.0%} mín.)"
+                )
+                
+                paths = event['path'].tolist()
+                columns = st.columns(min(len(paths), 5))
+                for column, path in zip(columns, paths[:5]):
+                    thumbnail = queue.thumbnail(path)
+                    if thumbnail is not None:
+                        column.image(thumbnail, use_container_width=True)
+                    else:
+                        column.caption(f"Sin vista previa: {Path(path).name}")
+                
+                # Sin especie predicha no se propone ninguna: el evento se salta si no se elige
+                if predicted in species_options:
+                    options = [predicted] + [s for s in species_options if s != predicted]
+                else:
+                    options = [UNVALIDATED_LABEL] + species_options
+                label = st.selectbox("Etiqueta del evento", options, key=f"validation_label_{event_id}")
+                if label != UNVALIDATED_LABEL:
+                    labels.update((path, standardize_category(label)) for path in paths)
+            
+            submitted = st.form_submit_button("💾 Validar página", type="primary", use_container_width=True)
+        
+        if submitted and labels:
+            save_validated_labels(st.session_state.project_id, queue, page, labels)
+            st.rerun()
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("⬅️ Página anterior", use_container_width=True, disabled=page_number == 0):
+                st.session_state.validation_page = page_number - 1
+                st.rerun()
+        with col2:
+            if st.button("Página siguiente ➡️", use_container_width=True):
+                st.session_state.validation_page = page_number + 1
+                st.rerun()
+
+
+UNLABELED = "(sin etiquetar)"
+SEQUENCES_PER_PAGE = 10
+
+
+def get_manual_assistant_for_session():
+    """Asistente de clasificación manual de la sesión (conserva el historial de etiquetas)."""
+    if 'manual_assistant' not in st.session_state:
+        st.session_state.manual_assistant = get_manual_assistant()
+    return st.session_state.manual_assistant
+
+
+def apply_session_labels(labels):
+    """
+    Aplica etiquetas por foto (índice de processed_data -> especie) a la sesión.
+    
+    Returns:
+        Etiquetas tal como quedaron en processed_data (estandarizadas)
+    """
+    assistant = get_manual_assistant_for_session()
+    df = assistant.apply_labels(st.session_state.processed_data, labels)
+    st.session_state.processed_data = df
+    st.session_state.export_cache = None
+    st.session_state.camtrap_cache = None
+    return df.loc[labels.index, 'ESPECIE']
+
+
+def refresh_labeled_project(project_id: int, photo_index):
+    """Encola la actualización de agregados (solo cámaras tocadas) y estadísticas tras cambiar etiquetas."""
+    df = st.session_state.processed_data
+    cameras = df.loc[photo_index, ['SITIO', 'CAMARA']].itertuples(index=False, name=None)
+    refresh_project_aggregates(project_id, df, cameras)
+    db.update_project_stats(project_id, len(df), df['ESPECIE'].nunique())
+
+
+def save_sequence_labels(project_id: int, labels):
+    """
+    Aplica etiquetas por foto al proyecto activo y las guarda en una sola escritura.
+    
+    Las fotos se identifican por su índice en processed_data (photo_index en
+    la base); las filas sin ruta de imagen no se etiquetan.
+    """
+    data = st.session_state.processed_data
+    labels = labels[data.loc[labels.index, 'RUTA'].fillna('').astype(str) != '']
+    if len(labels) == 0:
+        return
+    
+    species = apply_session_labels(labels)
+    db.submit_write(db.update_photo_species, project_id, list(species.items()))
+    refresh_labeled_project(project_id, species.index)
+
+
+def show_manual_sequence_labeling():
+    """Clasificación manual por secuencias: una etiqueta cubre toda la ráfaga."""
+    df = st.session_state.processed_data
+    # Solo fotos con imagen: los datos importados sin rutas no se pueden revisar
+    df = df[df['RUTA'].fillna('').astype(str) != ''] if 'RUTA' in df.columns else df.iloc[0:0]
+    
+    with st.expander("✍️ Clasificación manual por secuencias", expanded=False):
+        if len(df) == 0:
+            st.caption("El proyecto no tiene rutas de imágenes: la clasificación por secuencias no está disponible")
+            return
+        
+        categories = sorted(df['ESPECIE'].astype(str).unique())
+        default = categories.index('CLASIFICACION_PENDIENTE') if 'CLASIFICACION_PENDIENTE' in categories else 0
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            category = st.selectbox("Fotos a clasificar", categories, index=default, key="manual_category")
+        with col2:
+            window_seconds = st.number_input(
+                "Segundos entre secuencias",
+                min_value=1,
+                max_value=600,
+                value=config.get("processing.manual_sequence_seconds", 60),
+                step=5,
+                help="Fotos de la misma cámara más cercanas que esto forman una secuencia"
+            )
+        
+        if window_seconds != config.get("processing.manual_sequence_seconds", 60):
+            config.set("processing.manual_sequence_seconds", window_seconds)
+        
+        assistant = get_manual_assistant_for_session()
+        photos = df[df['ESPECIE'].astype(str) == category]
+        sequences = assistant.group_sequences(photos, window_seconds)
+        sequence_ids = sequences.drop_duplicates().sort_values().tolist()
+        
+        st.metric(
+            "Acciones de etiquetado",
+            f"{len(sequence_ids):,} secuencias",
+            f"en vez de {len(photos):,} fotos",
+            delta_color="off"
+        )
+        if not sequence_ids:
+            return
+        
+        pages = (len(sequence_ids) - 1) // SEQUENCES_PER_PAGE + 1
+        page_number = min(st.session_state.get('manual_page', 0), pages - 1)
+        page_ids = sequence_ids[page_number * SEQUENCES_PER_PAGE:(page_number + 1) * SEQUENCES_PER_PAGE]
+        
+        recent = [s for s in df['ESPECIE'].value_counts().index if s != category]
+        # VACIO y HUMANO siempre disponibles: son las etiquetas manuales más frecuentes
+        suggestions = [UNLABELED] + [
+            s for s in dict.fromkeys(
+                assistant.get_suggestions(recent_species=assistant.species_history + recent) + ['VACIO', 'HUMANO']
+            )
+            if s != category
+        ]
+        
+        st.caption(f"Página {page_number + 1} de {pages}")
+        with st.form("manual_sequences_form"):
+            sequence_labels = {}
+            overrides = {}
+            for sequence_id in page_ids:
+                sequence = photos.loc[sequences == sequence_id]
+                first = sequence.iloc[0]
+                # Los IDs de secuencia se renumeran al etiquetar otras: la clave usa una foto de la secuencia
+                widget_key = f"{window_seconds}_{sequence.index[0]}"
+                st.markdown(
+                    f"**{first['SITIO']} > {first['CAMARA']}** · {first['FECHA']} "
+                    f"{sequence['HORA'].min()}–{sequence['HORA'].max()} · {len(sequence)} fotos"
+                )
+                
+                columns = st.columns(min(len(sequence), 5))
+                for column, path in zip(columns, sequence['RUTA'].astype(str)[:5]):
+                    thumbnail = ValidationQueue.load_thumbnail(path)
+                    if thumbnail is not None:
+                        column.image(thumbnail, use_container_width=True)
+                    else:
+                        column.caption(f"Sin vista previa: {Path(path).name}")
+                
+                label = st.selectbox("Etiqueta de la secuencia", suggestions, key=f"manual_label_{widget_key}")
+                if label != UNLABELED:
+                    sequence_labels[sequence_id] = label
+                
+                # Correcciones foto por foto (ej: la última foto de la ráfaga ya salió vacía)
+                if len(sequence) > 1:
+                    edited = st.data_editor(
+                        pd.DataFrame({
+                            'ARCHIVO': sequence['RUTA'].astype(str).map(lambda p: Path(p).name),
+                            'ETIQUETA_PROPIA': pd.Series(None, index=sequence.index, dtype=object)
+                        }),
+                        column_config={
+                            'ETIQUETA_PROPIA': st.column_config.SelectboxColumn(
+                                "Etiqueta propia (vacío = la de la secuencia)", options=suggestions[1:]
+                            )
+                        },
+                        disabled=['ARCHIVO'],
+                        use_container_width=True,
+                        key=f"manual_overrides_{widget_key}"
+                    )
+                    overrides.update(edited['ETIQUETA_PROPIA'].dropna().to_dict())
+            
+            submitted = st.form_submit_button("💾 Guardar etiquetas de la página", type="primary", use_container_width=True)
+        
+        if submitted:
+            labels = assistant.propagate_labels(sequences, sequence_labels, overrides)
+            if len(labels) > 0:
+                save_sequence_labels(st.session_state.project_id, labels)
+                st.rerun()
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("⬅️ Anterior", key="manual_previous", use_container_width=True, disabled=page_number == 0):
+                st.session_state.manual_page = page_number - 1
+                st.rerun()
+        with col2:
+            if st.button("Siguiente ➡️", key="manual_next", use_container_width=True, disabled=page_number >= pages - 1):
+                st.session_state.manual_page = page_number + 1
+                st.rerun()
+
+
+def show_clock_review(df):
+    """Muestra anomalías de reloj por cámara y permite registrar desfases."""
+    project_id = st.session_state.project_id
+    
+    anomalies = TimestampAnomalyDetector.detect_anomalies(df)
+    offsets = db.get_camera_clock_offsets(project_id)
+    
+    title = f"⏱️ Relojes de cámaras ({len(anomalies):,} fotos sospechosas, {len(offsets)} desfases)"
+    with st.expander(title, expanded=False):
+        if len(anomalies) > 0:
+            st.dataframe(TimestampAnomalyDetector.summarize_by_camera(anomalies), use_container_width=True)
+            st.dataframe(anomalies.head(200), use_container_width=True)
+        else:
+            st.success("✓ No se detectaron anomalías de reloj")
+        
+        if offsets:
+            st.markdown("**Desfases registrados** (se aplican al analizar y exportar)")
+            st.dataframe(pd.DataFrame(offsets)[
+                ['id', 'site_name', 'camera_name', 'offset_seconds', 'valid_from', 'valid_to', 'note']
+            ], use_container_width=True)
+        
+            offsets_by_id = {offset['id']: offset for offset in offsets}
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                offset_id = st.selectbox(
+                    "Desfase a eliminar", list(offsets_by_id), key="clock_delete_id",
+                    format_func=lambda i: f"{i}: {offsets_by_id[i]['site_name']} > {offsets_by_id[i]['camera_name']}"
+                )
+            with col2:
+                if st.button("🗑️ Eliminar desfase", key="clock_delete", use_container_width=True):
+                    deleted = offsets_by_id[offset_id]
+                    db.delete_camera_clock_offset(offset_id)
+                    refresh_project_aggregates(project_id, df, [(deleted['site_name'], deleted['camera_name'])])
+                    st.rerun()
+        
+        st.markdown("**Registrar desfase de reloj**")
+        cameras = df[['SITIO', 'CAMARA']].drop_duplicates().sort_values(['SITIO', 'CAMARA'])
+        camera_options = [f"{s} > {c}" for s, c in zip(cameras['SITIO'], cameras['CAMARA'])]
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            camera_choice = st.selectbox("Cámara", camera_options, key="clock_camera")
+            offset_hours = st.number_input(
+                "Desfase (horas a sumar)", value=0.0, step=0.5, key="clock_offset",
+                help="Negativo si la cámara adelanta. Ej: -1 para horario de verano"
+            )
+        with col2:
+            valid_from = st.text_input("Desde (hora registrada, opcional)", placeholder="2025-05-01 00:00:00", key="clock_from")
+            valid_to = st.text_input("Hasta (hora registrada, opcional)", placeholder="2025-06-01 00:00:00", key="clock_to")
+        note = st.text_input("Nota", key="clock_note")
+        
+        if st.button("💾 Guardar desfase", key="clock_save") and offset_hours != 0:
+            # Rango en formato YYYY-MM-DD[ HH:MM:SS]; un texto inválido rompería cada análisis
+            bounds = {}
+            for label, text in (("Desde", valid_from.strip()), ("Hasta", valid_to.strip())):
+                parsed = pd.to_datetime(text, format='ISO8601', errors='coerce') if text else None
+                if text and pd.isna(parsed):
+                    st.error(f"❌ {label}: fecha no válida ({text}). Usa AAAA-MM-DD HH:MM:SS")
+                    return
+                bounds[label] = parsed.strftime('%Y-%m-%d %H:%M:%S') if text else None
+            
+            site_name, camera_name = camera_choice.split(" > ", 1)
+            db.save_camera_clock_offset(
+                project_id, site_name, camera_name, offset_hours * 3600,
+                bounds["Desde"], bounds["Hasta"], note.strip() or None
+            )
+            refresh_project_aggregates(project_id, df, [(site_name, camera_name)])
+            st.success("✓ Desfase guardado")
+            st.rerun()
 
 
 def show_utm_coordinates_input():
@@ -437,57 +890,596 @@ def show_utm_coordinates_input():
     
     st.info("Ingresa las coordenadas UTM para cada cámara detectada en el proyecto")
     
+    # Sugerencias derivadas de GPS EXIF
+    gps_suggestions = {}
+    gps_positions = st.session_state.get('gps_positions')
+    if gps_positions is not None and len(gps_positions) > 0:
+        # El GPS de EXIF siempre está en WGS84, sin importar el datum por defecto
+        gps_rows = GPSPositionAggregator.to_coordinate_rows(gps_positions, "WGS84")
+        gps_suggestions = {(r['site_name'], r['camera_name']): r for r in gps_rows}
+        
+        with st.expander(f"🛰️ Coordenadas detectadas por GPS EXIF ({len(gps_rows)} cámaras)", expanded=True):
+            st.dataframe(gps_positions, use_container_width=True)
+            if st.button("💾 Guardar coordenadas GPS (solo cámaras sin coordenadas)"):
+                saved, rejected = UTMCoordinateManager.save_gps_derived_coordinates(project_id, gps_rows)
+                st.success(f"✓ {saved} cámaras guardadas desde GPS")
+                if rejected:
+                    st.warning(f"⚠️ {len(rejected)} cámaras con GPS fuera de rango no se guardaron; captúralas manualmente:")
+                    st.dataframe(
+                        pd.DataFrame(rejected)[['site_name', 'camera_name', 'utm_zone', 'easting', 'northing', 'message']],
+                        use_container_width=True
+                    )
+    
     # Obtener cámaras únicas
     cameras = df.groupby(['SITIO', 'CAMARA']).size().reset_index()[['SITIO', 'CAMARA']]
     
     for idx, row in cameras.iterrows():
         with st.expander(f"📍 {row['SITIO']} > {row['CAMARA']}", expanded=False):
             UTMCoordinateManager.request_camera_coordinates_ui(
-                project_id, row['SITIO'], row['CAMARA']
+                project_id, row['SITIO'], row['CAMARA'],
+                gps_suggestion=gps_suggestions.get((row['SITIO'], row['CAMARA']))
             )
 
 
-def generate_excel_exports(df, effort_df, events_df, temporal_df):
-    """Genera archivos Excel de exportación."""
-    project_id = st.session_state.project_id
-    project = db.get_project(st.session_state.processed_data.iloc[0]['SITIO'])
+def show_project_comparison():
+    """Compara especies, esfuerzo y RAI entre proyectos guardados."""
+    projects = [p for p in db.get_all_projects() if p['total_photos']]
+    if not projects:
+        st.info("👈 Procesa o importa al menos un proyecto para comparar")
+        return
     
-    # Obtener coordenadas
-    coordinates_data = UTMCoordinateManager.get_all_coordinates_for_export(project_id)
-    coordinates_df = pd.DataFrame(coordinates_data) if coordinates_data else None
+    comparison = ProjectComparison(db)
+    
+    selected = st.multiselect(
+        "Proyectos",
+        projects,
+        default=projects[:min(len(projects), 5)],
+        format_func=lambda p: f"{p['name']} ({p['total_photos']:,} fotos)"
+    )
+    project_ids = [p['id'] for p in selected]
+    if not project_ids:
+        st.info("Selecciona al menos un proyecto")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        start = st.text_input("Desde (YYYY-MM-DD, opcional)", key="compare_start").strip() or None
+    with col2:
+        end = st.text_input("Hasta (YYYY-MM-DD, opcional)", key="compare_end").strip() or None
+    with col3:
+        species = st.multiselect("Especies (todas si vacío)", comparison.available_species(project_ids))
+    
+    try:
+        with st.spinner("Consultando..."):
+            effort = comparison.trap_days(project_ids, start, end)
+            totals = comparison.species_totals(project_ids, species, start, end)
+            rai = comparison.rai_by_project(project_ids, species, start, end)
+            detections = comparison.first_last_detection(project_ids, species, start, end)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return
+    
+    st.subheader("Esfuerzo de muestreo")
+    st.dataframe(effort, use_container_width=True)
+    
+    st.subheader("RAI por proyecto")
+    if len(rai) > 0:
+        st.bar_chart(rai.pivot(index='ESPECIE', columns='PROYECTO', values='RAI'))
+    st.dataframe(rai, use_container_width=True)
+    
+    st.subheader("Totales por especie")
+    st.dataframe(totals, use_container_width=True)
+    
+    st.subheader("Primera y última detección")
+    st.dataframe(detections, use_container_width=True)
+
+
+def archive_to_parquet(dataset_dir: Path, season: str):
+    """Agrega el proyecto activo al dataset Parquet particionado (reemplaza esa temporada si ya estaba)."""
+    with st.spinner("Escribiendo Parquet..."):
+        try:
+            write_partitioned_parquet(st.session_state.processed_data, dataset_dir, season)
+        except (ImportError, OSError, ValueError) as e:
+            logger.error(f"Error escribiendo dataset Parquet: {e}")
+            st.error(f"❌ No se pudo escribir el dataset: {e}")
+            return
+    
+    st.success(f"✅ {len(st.session_state.processed_data):,} registros de {season} guardados en {dataset_dir}")
+
+
+def analyze_parquet_dataset(dataset_dir: Path):
+    """Calcula esfuerzo, RAI y patrones temporales sobre un dataset Parquet."""
+    if not dataset_dir.is_dir():
+        st.error(f"❌ No existe la carpeta: {dataset_dir}")
+        return
+    
+    try:
+        with st.spinner("Analizando dataset por bloques..."):
+            backend = ParquetBackend(dataset_dir, max_memory_mb=config.get_max_memory_mb())
+            effort = backend.trap_days()
+            rai = backend.rai(config.get_independent_event_minutes())
+            temporal = backend.temporal_patterns()
+    except (ImportError, OSError, ValueError) as e:
+        logger.error(f"Error analizando dataset Parquet: {e}")
+        st.error(f"❌ No se pudo analizar el dataset: {e}")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Cámaras-temporada", len(effort))
+    with col2:
+        st.metric("Registros", f"{int(effort['TOTAL_CAPTURAS'].sum()):,}")
+    with col3:
+        st.metric("Trampas-día", f"{int(effort['TRAMPAS_DIA'].sum()):,}")
+    
+    st.subheader("Esfuerzo de muestreo")
+    st.dataframe(effort, use_container_width=True)
+    
+    st.subheader("RAI por sitio")
+    st.dataframe(rai, use_container_width=True)
+    
+    st.subheader("Patrones temporales")
+    st.dataframe(temporal, use_container_width=True)
+
+
+def generate_excel_exports(df, effort_df, events_df, temporal_df, coordinates_df, export_key):
+    """Genera archivos de exportación en memoria (con caché por huella de datos)."""
+    cache = st.session_state.export_cache
+    if cache is not None and cache['key'] == export_key:
+        st.success("✅ Archivos ya generados para estos datos")
+        return
     
     # Generar Excel
     with st.spinner("Generando archivos Excel..."):
-        project_path = Path(st.session_state.processed_data.iloc[0]['SITIO']).parent.parent
+        try:
+            files = export_dual_excel_to_buffers(
+                df, "proyecto",
+                effort_df, events_df, temporal_df, coordinates_df
+            )
+        except ExportError as e:
+            for filename, message in e.errors.items():
+                st.error(f"❌ Error generando {filename}: {message}")
+            return
         
-        basic_path, complete_path = export_dual_excel(
-            df, project_path, "proyecto",
-            effort_df, events_df, temporal_df, coordinates_df
-        )
+        # Formatos columnares junto al Excel FORXIME/2
+        basic_name = next(iter(files))
+        files.update(ColumnarExporter.export_basic_to_buffers(
+            df, Path(basic_name).stem, config.get_columnar_formats()
+        ))
     
+    st.session_state.export_cache = {'key': export_key, 'files': files}
     st.success("✅ Archivos Excel generados exitosamente")
     
+    # Copia opcional en disco
+    project_path = st.session_state.project_path
+    if config.should_save_exports_to_disk() and project_path:
+        try:
+            for filename, content in files.items():
+                (Path(project_path) / filename).write_bytes(content)
+            st.info(f"💾 Copia guardada en: {project_path}")
+        except OSError as e:
+            st.warning(f"⚠️ No se pudo guardar en la carpeta del proyecto: {e}")
+
+
+def import_camtrap_package(package_path: Path):
+    """Importa un paquete Camtrap DP como datos del proyecto."""
+    if not package_path.exists():
+        st.error(f"❌ No existe: {package_path}")
+        return
+    
+    with st.spinner("Leyendo paquete Camtrap DP..."):
+        try:
+            df = CamtrapDPReader().read(package_path)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            logger.error(f"Error importando paquete Camtrap DP: {e}")
+            st.error(f"❌ Paquete Camtrap DP inválido: {e}")
+            return
+    
+    project_name = package_path.stem if package_path.suffix.lower() == '.zip' else (
+        package_path.parent.name if package_path.is_file() else package_path.name
+    )
+    load_imported_dataset(df, project_name, package_path)
+
+
+def import_csv_dataset(csv_path: Path, fmt, deployments_path, image_root=None):
+    """Importa un CSV de otra herramienta como datos del proyecto."""
+    if not csv_path.is_file():
+        st.error(f"❌ No existe el archivo: {csv_path}")
+        return
+    
+    with st.spinner("Leyendo CSV..."):
+        try:
+            df = CSVDatasetImporter.import_csv(
+                csv_path, fmt=fmt, deployments_path=deployments_path, image_root=image_root
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error importando CSV: {e}")
+            st.error(f"❌ No se pudo importar el CSV: {e}")
+            return
+    
+    load_imported_dataset(df, csv_path.stem, csv_path)
+
+
+def persist_project_records(project_id: int, df):
+    """Encola el guardado de fotos, catálogo de especies y agregados diarios."""
+    db.submit_write(db.save_photos, project_id, df)
+    refresh_project_aggregates(project_id, df)
+
+
+def refresh_project_aggregates(project_id: int, df, cameras=None):
+    """
+    Encola la reconstrucción del catálogo de especies y de los agregados diarios.
+    
+    Los agregados diarios se calculan con los desfases de reloj aplicados,
+    igual que el análisis. Con cameras (pares sitio, cámara) solo se
+    recalculan esas cámaras; sin él, todo el proyecto.
+    """
+    event_minutes = config.get_independent_event_minutes()
+    offsets = db.get_camera_clock_offsets(project_id)
+    
+    if cameras is not None:
+        cameras = list(dict.fromkeys((str(site), str(camera)) for site, camera in cameras))
+        selected = pd.MultiIndex.from_frame(df[['SITIO', 'CAMARA']].astype(str)).isin(cameras)
+        df = df[selected]
+    else:
+        st.session_state.aggregates_key = (project_id, event_minutes)
+    
+    pending = st.session_state.setdefault('aggregate_writes', [])
+    pending.append(db.submit_write(db.rebuild_species_catalog, project_id))
+    pending.append(db.submit_write(
+        lambda: db.save_daily_detections(
+            project_id,
+            DailyDetectionAggregator.aggregate(ClockOffsetCorrector.apply_offsets(df, offsets), event_minutes),
+            cameras
+        )
+    ))
+
+
+def wait_for_aggregate_writes():
+    """
+    Espera las reconstrucciones de agregados encoladas y devuelve el primer error.
+    
+    Si alguna falló se olvida aggregates_key para que el análisis
+    vuelva a reconstruir todo el proyecto en la siguiente ejecución.
+    """
+    pending = st.session_state.pop('aggregate_writes', [])
+    db.wait_for_writes()
+    
+    for future in pending:
+        error = future.exception()
+        if error is not None:
+            st.session_state.pop('aggregates_key', None)
+            return error
+    return None
+
+
+def open_saved_project(project: dict):
+    """Carga los registros por foto guardados de un proyecto."""
+    with st.spinner("Cargando registros..."):
+        df = db.get_photos(project['id'])
+    
+    if len(df) == 0:
+        st.warning("⚠️ El proyecto no tiene registros por foto guardados")
+        return
+    
+    project_path = Path(project['path'])
+    st.session_state.project_id = project['id']
+    st.session_state.project_path = str(project_path if project_path.is_dir() else project_path.parent)
+    st.session_state.processed_data = df
+    st.session_state.gps_positions = None
+    
+    st.success(f"✅ Proyecto abierto: {project['name']} ({len(df):,} registros)")
+
+
+def load_imported_dataset(df, project_name: str, source_path: Path):
+    """Registra datos importados (sin imágenes) como proyecto activo."""
+    project_dir = source_path.parent if source_path.is_file() else source_path
+    
+    # El índice identifica cada registro en la base (photo_index)
+    df = df.reset_index(drop=True)
+    
+    project_id = db.create_project(project_name, str(source_path))
+    st.session_state.project_id = project_id
+    st.session_state.project_path = str(project_dir)
+    st.session_state.processed_data = df
+    st.session_state.gps_positions = None
+    
+    db.update_project_stats(project_id, len(df), df['ESPECIE'].nunique())
+    persist_project_records(project_id, df)
+    
+    st.success(f"✅ Datos importados: {len(df):,} registros")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Registros", f"{len(df):,}")
+    with col2:
+        st.metric("Sitios", df['SITIO'].nunique())
+    with col3:
+        st.metric("Especies", df['ESPECIE'].nunique())
+    
+    st.dataframe(df.head(20), use_container_width=True)
+
+
+def generate_camtrap_package(df, camtrap_key):
+    """Genera el paquete Camtrap DP (zip) en memoria."""
+    cache = st.session_state.camtrap_cache
+    if cache is not None and cache['key'] == camtrap_key:
+        st.success("✅ Paquete ya generado para estos datos")
+        return
+    
+    project_path = st.session_state.project_path
+    project_name = Path(project_path).name if project_path else "proyecto"
+    
+    with st.spinner("Generando paquete Camtrap DP..."):
+        writer = CamtrapDPWriter(
+            project_name,
+            utc_offset=config.get_camtrap_utc_offset(),
+            event_minutes=config.get_independent_event_minutes(),
+            project_path=project_path
+        )
+        buffer = io.BytesIO()
+        writer.write(df, buffer, db.get_all_camera_coordinates(st.session_state.project_id))
+    
+    filename = f"{project_name}_camtrap_dp_{datetime.now().strftime('%Y%m%d')}.zip"
+    st.session_state.camtrap_cache = {'key': camtrap_key, 'content': buffer.getvalue(), 'filename': filename}
+    st.success("✅ Paquete Camtrap DP generado")
+
+
+def show_export_downloads(files):
+    """Muestra botones de descarga para archivos generados en memoria."""
+    mime_types = {
+        '.xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        '.parquet': "application/octet-stream",
+        '.gz': "application/gzip",
+    }
+    
+    filenames = list(files)
+    basic_name, complete_name = filenames[0], filenames[1]
+    
     col1, col2 = st.columns(2)
     
     with col1:
-        st.info(f"📄 **Excel Básico (FORXIME/2)**\n\n{basic_path.name}")
-        with open(basic_path, 'rb') as f:
-            st.download_button(
-                "⬇️ Descargar Básico",
-                f,
-                file_name=basic_path.name,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+        st.info(f"📄 **Excel Básico (FORXIME/2)**\n\n{basic_name}")
+        st.download_button(
+            "⬇️ Descargar Básico",
+            files[basic_name],
+            file_name=basic_name,
+            mime=mime_types['.xlsx']
+        )
     
     with col2:
-        st.info(f"📄 **Excel Completo**\n\n{complete_path.name}")
-        with open(complete_path, 'rb') as f:
-            st.download_button(
-                "⬇️ Descargar Completo",
-                f,
-                file_name=complete_path.name,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        st.info(f"📄 **Excel Completo**\n\n{complete_name}")
+        st.download_button(
+            "⬇️ Descargar Completo",
+            files[complete_name],
+            file_name=complete_name,
+            mime=mime_types['.xlsx']
+        )
+    
+    for filename in filenames[2:]:
+        st.download_button(
+            f"⬇️ Descargar {filename}",
+            files[filename],
+            file_name=filename,
+            mime=mime_types.get(Path(filename).suffix, "application/octet-stream")
+        )
+
+
+# Tabs principales
+tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    "📁 Procesamiento",
+    "📊 Análisis y Reportes",
+    "📍 Coordenadas UTM",
+    "🔀 Comparar Proyectos",
+    "ℹ️ Información"
+])
+
+# TAB 1: PROCESAMIENTO
+with tab1:
+    st.header("📁 Procesamiento de Datos")
+    
+    # Información de estructura
+    with st.expander("📋 Estructura de Carpetas Requerida", expanded=False):
+        st.markdown("""
+        ```
+        PROYECTO/
+        ├── SITIO_1/
+        │   ├── CAMARA_1/
+        │   │   ├── ESPECIE_A/
+        │   │   │   └── fotos.jpg
+        │   │   └── VACIO/
+        │   │       └── fotos.jpg
+        │   └── CAMARA_2/
+        │       └── ...
+        └── SITIO_2/
+            └── ...
+        ```
+        
+        **Reglas:**
+        - Máximo 10 cámaras por sitio
+        - Solo imágenes: JPG, JPEG, PNG
+        - Videos se ignoran automáticamente
+        """)
+    
+    # Selector de proyecto
+    project_path = st.text_input(
+        "📂 Ruta del Proyecto",
+        placeholder="C:\\Users\\Usuario\\Documents\\MiProyecto",
+        help="Ruta completa a la carpeta del proyecto"
+    )
+    
+    if project_path:
+        project_path = project_path.strip().strip('"').strip("'")
+        project_path_obj = Path(project_path)
+        
+        if not project_path_obj.exists():
+            st.error(f"❌ La carpeta no existe: {project_path}")
+        elif not project_path_obj.is_dir():
+            st.error(f"❌ La ruta no es una carpeta válida")
+        else:
+            st.success(f"✓ Carpeta válida: {project_path_obj.name}")
+            
+            # Botón de procesamiento
+            if st.button("🚀 Procesar Proyecto", type="primary", use_container_width=True):
+                process_project(project_path_obj)
+    
+    # Proyectos guardados en la base de datos
+    saved_projects = [p for p in db.get_all_projects() if p['total_photos']]
+    if saved_projects:
+        with st.expander("🗂️ Abrir proyecto guardado", expanded=False):
+            saved_choice = st.selectbox(
+                "Proyecto",
+                saved_projects,
+                format_func=lambda p: f"{p['name']} ({p['total_photos']:,} fotos) - {p['path']}"
             )
+            if st.button("📂 Abrir Proyecto", use_container_width=True):
+                open_saved_project(saved_choice)
+    
+    # Importación de paquetes Camtrap DP
+    with st.expander("📦 Importar paquete Camtrap DP", expanded=False):
+        package_path = st.text_input(
+            "Ruta del paquete",
+            placeholder="C:\\Users\\Usuario\\Documents\\paquete.zip",
+            help="Carpeta con datapackage.json, el archivo datapackage.json o un .zip"
+        )
+        
+        if package_path and st.button("📥 Importar Paquete", use_container_width=True):
+            import_camtrap_package(Path(package_path.strip().strip('"').strip("'")))
+    
+    # Importación de CSV de otras herramientas
+    with st.expander("📄 Importar CSV (Timelapse, Wildlife Insights, FORXIME/2)", expanded=False):
+        csv_path = st.text_input(
+            "Ruta del CSV",
+            placeholder="C:\\Users\\Usuario\\Documents\\datos.csv",
+            help="Exportación de Timelapse, images.csv de Wildlife Insights o Excel básico guardado como CSV"
+        )
+        format_options = {None: "Detectar automáticamente", **CSVDatasetImporter.FORMATS}
+        csv_format = st.selectbox(
+            "Formato",
+            list(format_options),
+            format_func=lambda key: format_options[key]
+        )
+        deployments_path = st.text_input(
+            "deployments.csv (solo Wildlife Insights, opcional)",
+            help="Permite usar placename y camera_id como sitio y cámara"
+        )
+        image_root = st.text_input(
+            "Carpeta de imágenes (opcional)",
+            help="Raíz de las rutas relativas del CSV (en Timelapse, la carpeta del .tdb). "
+                 "Por defecto, la carpeta del CSV"
+        )
+        
+        if csv_path and st.button("📥 Importar CSV", use_container_width=True):
+            import_csv_dataset(
+                Path(csv_path.strip().strip('"').strip("'")),
+                csv_format,
+                deployments_path.strip().strip('"').strip("'") or None,
+                image_root.strip().strip('"').strip("'") or None
+            )
+
+    
+    # Archivo multi-temporada en Parquet particionado
+    with st.expander("🗄️ Dataset Parquet particionado (archivos multi-temporada)", expanded=False):
+        dataset_path = st.text_input(
+            "Carpeta del dataset",
+            placeholder="D:\\Archivo\\camaras_parquet",
+            help="Un archivo por temporada, sitio y cámara; se analiza por bloques sin cargarlo completo en memoria"
+        )
+        dataset_dir = Path(dataset_path.strip().strip('"').strip("'")) if dataset_path else None
+        season = st.text_input(
+            "Temporada del proyecto activo",
+            value=Path(st.session_state.project_path).name if st.session_state.get('project_path') else "",
+            help="Cada temporada se guarda aparte: volver a agregarla la reemplaza sin tocar las demás"
+        ).strip()
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button(
+                "➕ Agregar proyecto activo",
+                use_container_width=True,
+                disabled=dataset_dir is None or st.session_state.processed_data is None or not season
+            ):
+                archive_to_parquet(dataset_dir, season)
+        with col2:
+            analyze_dataset = st.button("📈 Analizar dataset", use_container_width=True, disabled=dataset_dir is None)
+        
+        if analyze_dataset:
+            analyze_parquet_dataset(dataset_dir)
+
+# TAB 2: ANÁLISIS Y REPORTES
+with tab2:
+    st.header("📊 Análisis y Reportes")
+    
+    if st.session_state.processed_data is None:
+        st.info("👈 Procesa un proyecto primero en la pestaña 'Procesamiento'")
+    else:
+        show_analysis_and_reports()
+
+# TAB 3: COORDENADAS UTM
+with tab3:
+    st.header("📍 Coordenadas UTM por Cámara")
+    
+    if st.session_state.processed_data is None or st.session_state.project_id is None:
+        st.info("👈 Procesa un proyecto primero")
+    else:
+        show_utm_coordinates_input()
+
+# TAB 4: COMPARACIÓN ENTRE PROYECTOS
+with tab4:
+    st.header("🔀 Comparación entre Proyectos")
+    show_project_comparison()
+
+# TAB 5: INFORMACIÓN
+with tab5:
+    st.header("ℹ️ Información de la Plataforma")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("✨ Características")
+        st.markdown("""
+        - ✅ Extracción automática de metadatos EXIF
+        - ✅ Clasificación con IA (si GPU disponible)
+        - ✅ Cálculo de trampas-día
+        - ✅ Detección de eventos independientes
+        - ✅ Análisis temporal (diurno/nocturno)
+        - ✅ Coordenadas UTM con validación
+        - ✅ Exportación dual de Excel
+        - ✅ Compatible con FORXIME/2
+        - ✅ 100% offline (después de setup)
+        """)
+    
+    with col2:
+        st.subheader("📄 Formatos de Exportación")
+        st.markdown("""
+        **Excel Básico (FORXIME/2):**
+        - SITIO, CAMARA, ESPECIE, FECHA, HORA
+        - Listo para importar en FORXIME/2
+        
+        **Excel Completo:**
+        - Todos los datos + análisis
+        - Coordenadas UTM
+        - Esfuerzo de muestreo
+        - Eventos independientes
+        - Análisis temporal
+        - Resumen ejecutivo
+        """)
+    
+    st.divider()
+    
+    st.subheader("🔧 Requisitos del Sistema")
+    st.markdown("""
+    **Mínimos:**
+    - Python 3.8+
+    - 4 GB RAM
+    - 2 GB espacio en disco
+    
+    **Recomendados (para IA):**
+    - GPU NVIDIA RTX 3060+ (6GB VRAM)
+    - CUDA 11.8+
+    - 16 GB RAM
+    - 10 GB espacio (modelos de IA)
+    """)
 
 
 # Footer
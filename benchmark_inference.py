@@ -0,0 +1,62 @@
+"""
+Compara velocidad de inferencia en CPU entre backends (PyTorch, ONNX, ONNX INT8).
+
+Uso:
+    python benchmark_inference.py CARPETA_IMAGENES --torch modelo.torchscript --onnx modelo.onnx --int8
+"""
+
+import argparse
+from pathlib import Path
+
+from ai_classifier import benchmark_detectors, create_detector
+from config_manager import get_config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inferencia por backend")
+    parser.add_argument("images", help="Carpeta con imágenes de prueba")
+    parser.add_argument("--torch", dest="torch_model", help="Modelo TorchScript/PyTorch")
+    parser.add_argument("--onnx", dest="onnx_model", help="Modelo ONNX")
+    parser.add_argument("--int8", action="store_true", help="Incluir ONNX cuantizado a INT8")
+    parser.add_argument("--limit", type=int, default=256, help="Máximo de imágenes")
+    parser.add_argument("--threads", type=int, default=0, help="Hilos ONNX (0 = núcleos del equipo)")
+    args = parser.parse_args()
+
+    config = get_config()
+    options = {
+        'batch_size': config.get_ai_batch_size(),
+        'input_size': config.get("ai.input_size", 640),
+        'decode_workers': config.get("ai.decode_workers", 4),
+        'detection_threshold': config.get("ai.detection_threshold", 0.20),
+    }
+
+    extensions = {ext.lower() for ext in config.get("processing.image_extensions", [".jpg", ".jpeg", ".png"])}
+    images = sorted(p for p in Path(args.images).rglob("*") if p.suffix.lower() in extensions)[:args.limit]
+    if not images:
+        parser.error(f"No hay imágenes en {args.images}")
+
+    detectors = {}
+    if args.torch_model:
+        detectors['torch'] = create_detector('torch', args.torch_model, **options)
+    if args.onnx_model:
+        detectors['onnx'] = create_detector('onnx', args.onnx_model, cpu_threads=args.threads, **options)
+        if args.int8:
+            detectors['onnx-int8'] = create_detector(
+                'onnx', args.onnx_model, quantize_int8=True, cpu_threads=args.threads, **options
+            )
+    if not detectors:
+        parser.error("Indica al menos --torch o --onnx")
+
+    input_size = next(iter(detectors.values())).input_size
+    print(f"Imágenes: {len(images)}  lote: {options['batch_size']}  entrada: {input_size}px")
+    print(f"{'backend':<12}{'decodif.':>10}{'inferencia':>12}{'postproc.':>12}{'total':>10}{'coincid.':>10}")
+    for row in benchmark_detectors(detectors, images):
+        print(
+            f"{row['backend']:<12}{row['decode']:>10}{row['inference']:>12}"
+            f"{row['postprocess']:>12}{row['total']:>10}{row['coincidencia']:>10.2%}"
+        )
+    print("(imágenes/seg; coincidencia = etiquetas iguales al primer backend)")
+
+
+if __name__ == "__main__":
+    main()
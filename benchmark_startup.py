@@ -0,0 +1,70 @@
+"""
+Mide el tiempo de arranque de la app: los imports de app.py y la detección
+de GPU que se hace al cargar la página, en procesos nuevos (sin caché de
+módulos) para que cada corrida sea un arranque en frío de Python.
+
+Uso:
+    python benchmark_startup.py [--runs 5]
+"""
+
+import argparse
+import ast
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent / "app.py"
+
+# Módulos pesados cuya carga interesa vigilar
+HEAVY_MODULES = ('torch', 'torchvision', 'onnxruntime', 'openpyxl', 'pyarrow', 'scipy', 'sklearn', 'cv2')
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+CUDADetector.detect_cuda()
+detected = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(f"{{imported - start:.3f}} {{detected - imported:.3f}} {{','.join(heavy)}}")
+"""
+
+
+def app_imports() -> str:
+    """Sentencias import de nivel superior de app.py."""
+    tree = ast.parse(APP_PATH.read_text(encoding='utf-8'))
+    nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in nodes)
+
+
+def run_once(code: str) -> tuple:
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=APP_PATH.parent,
+        capture_output=True, text=True, check=True
+    )
+    imports, detection, heavy = (result.stdout.strip().splitlines()[-1].split(" ") + [""])[:3]
+    return float(imports), float(detection), heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de la app")
+    parser.add_argument("--runs", type=int, default=5, help="Arranques a medir")
+    args = parser.parse_args()
+
+    code = PROBE.format(imports=app_imports(), heavy=HEAVY_MODULES)
+    run_once(code)  # Primera corrida descartada: llena la caché de disco del sistema
+
+    runs = [run_once(code) for _ in range(args.runs)]
+    imports = statistics.median(r[0] for r in runs)
+    detection = statistics.median(r[1] for r in runs)
+
+    print(f"Arranques medidos: {args.runs}")
+    print(f"Imports de app.py:   {imports:.2f} s (mediana)")
+    print(f"Detección de GPU:    {detection:.2f} s (mediana)")
+    print(f"Total:               {imports + detection:.2f} s")
+    print(f"Módulos pesados cargados: {runs[-1][2] or 'ninguno'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,617 @@
+"""
+Exportación e importación en el estándar Camera Trap Data Package (Camtrap DP 1.0).
+Un paquete contiene deployments.csv, media.csv, observations.csv y datapackage.json.
+"""
+
+import io
+import json
+import re
+import uuid
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union, BinaryIO
+
+import pandas as pd
+
+from analysis_engine import IndependentEventDetector
+from logger import get_logger
+from utils import any_path_exists, resolve_media_locations, standardize_category, utm_to_latlon
+
+logger = get_logger()
+
+
+CAMTRAP_DP_VERSION = "1.0"
+CAMTRAP_DP_BASE_URL = f"https://raw.githubusercontent.com/tdwg/camtrap-dp/{CAMTRAP_DP_VERSION}"
+
+DEPLOYMENT_FIELDS = [
+    'deploymentID', 'locationID', 'locationName', 'latitude', 'longitude',
+    'coordinateUncertainty', 'deploymentStart', 'deploymentEnd', 'setupBy',
+    'cameraID', 'cameraModel', 'cameraDelay', 'cameraHeight', 'cameraDepth',
+    'cameraTilt', 'cameraHeading', 'detectionDistance', 'timestampIssues',
+    'baitUse', 'featureType', 'habitat', 'deploymentGroups', 'deploymentTags',
+    'deploymentComments'
+]
+
+MEDIA_FIELDS = [
+    'mediaID', 'deploymentID', 'captureMethod', 'timestamp', 'filePath',
+    'filePublic', 'fileName', 'fileMediatype', 'exifData', 'favorite',
+    'mediaComments'
+]
+
+OBSERVATION_FIELDS = [
+    'observationID', 'deploymentID', 'mediaID', 'eventID', 'eventStart',
+    'eventEnd', 'observationLevel', 'observationType', 'cameraSetupType',
+    'scientificName', 'count', 'lifeStage', 'sex', 'behavior', 'individualID',
+    'individualPositionRadius', 'individualPositionAngle', 'individualSpeed',
+    'bboxX', 'bboxY', 'bboxWidth', 'bboxHeight', 'classificationMethod',
+    'classifiedBy', 'classificationTimestamp', 'classificationProbability',
+    'observationTags', 'observationComments'
+]
+
+# Nombres científicos de las especies comunes (utils.get_common_species_mexico)
+SCIENTIFIC_NAMES = {
+    'VENADO COLA BLANCA': 'Odocoileus virginianus',
+    'PECARI DE COLLAR': 'Dicotyles tajacu',
+    'JAGUAR': 'Panthera onca',
+    'PUMA': 'Puma concolor',
+    'OCELOTE': 'Leopardus pardalis',
+    'TIGRILLO': 'Leopardus wiedii',
+    'COYOTE': 'Canis latrans',
+    'ZORRO GRIS': 'Urocyon cinereoargenteus',
+    'MAPACHE': 'Procyon lotor',
+    'COATI': 'Nasua narica',
+    'CACOMIXTLE': 'Bassariscus astutus',
+    'ARMADILLO': 'Dasypus novemcinctus',
+    'CONEJO': 'Sylvilagus',
+    'LIEBRE': 'Lepus',
+    'ARDILLA': 'Sciurus',
+    'TLACUACHE': 'Didelphis',
+    'ZORRILLO': 'Mephitidae',
+    'PAVO OCELADO': 'Meleagris ocellata',
+    'HOCOFAISAN': 'Crax rubra',
+    'CHACHALACA': 'Ortalis',
+    'CODORNIZ': 'Odontophoridae',
+    'PALOMA': 'Columbidae',
+    'GANADO': 'Bos taurus',
+}
+
+# Categorías especiales -> observationType
+OBSERVATION_TYPES = {
+    'VACIO': 'blank',
+    'HUMANO': 'human',
+    'VEHICULO': 'vehicle',
+    'CLASIFICACION_PENDIENTE': 'unclassified',
+    'DESCONOCIDO': 'unknown',
+}
+
+MEDIA_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+}
+
+
+@contextmanager
+def _open_text_member(target, name: str):
+    """Abre un archivo de texto para escribir en una carpeta o dentro de un zip."""
+    if isinstance(target, zipfile.ZipFile):
+        with io.TextIOWrapper(target.open(name, 'w', force_zip64=True),
+                              encoding='utf-8', newline='') as handle:
+            yield handle
+    else:
+        with open(Path(target) / name, 'w', encoding='utf-8', newline='') as handle:
+            yield handle
+
+
+class CamtrapDPWriter:
+    """Escritor de paquetes Camtrap DP por bloques de filas."""
+
+    def __init__(self, project_name: str, utc_offset: str = "-06:00",
+                 event_minutes: int = 30, chunk_size: int = 100000,
+                 project_path: Optional[str] = None, contributor: str = "",
+                 sampling_design: str = "targeted", include_media_observations: bool = True):
+        """
+        Inicializa el escritor.
+
+        Args:
+            project_name: Título del proyecto
+            utc_offset: Desfase horario de las cámaras (ej: '-06:00'); Camtrap DP
+                exige fecha-hora ISO 8601 con zona
+            event_minutes: Minutos entre eventos independientes (observaciones)
+            chunk_size: Filas por bloque al escribir media y observaciones
+            project_path: Carpeta del proyecto; las rutas de media se escriben
+                relativas a ella
+            contributor: Responsable del paquete
+            sampling_design: Diseño de muestreo según Camtrap DP
+            include_media_observations: Agregar además una observación por foto
+        """
+        self.project_name = project_name
+        self.utc_offset = utc_offset
+        self.event_detector = IndependentEventDetector(time_threshold_minutes=event_minutes)
+        self.chunk_size = chunk_size
+        self.project_path = Path(project_path) if project_path else None
+        self.contributor = contributor or "Plataforma de Cámaras Trampa"
+        self.sampling_design = sampling_design
+        self.include_media_observations = include_media_observations
+
+    def write(self, df: pd.DataFrame, target: Union[str, Path, BinaryIO],
+              coordinates: Optional[List[Dict]] = None) -> Union[str, Path, BinaryIO]:
+        """
+        Escribe el paquete completo.
+
+        Args:
+            df: DataFrame con SITIO, CAMARA, ESPECIE, FECHA, HORA (y opcionalmente
+                ARCHIVO, RUTA, CAMERA_MODEL)
+            target: Carpeta de salida, ruta a un .zip o buffer binario (zip)
+            coordinates: Filas de camera_coordinates del proyecto
+
+        Returns:
+            El mismo target
+        """
+        df = df[df['FECHA'].notna() & df['HORA'].notna()]
+        deployments = self.build_deployments(df, coordinates or [])
+
+        is_zip = not isinstance(target, (str, Path)) or str(target).lower().endswith('.zip')
+        if is_zip:
+            with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                self._write_resources(df, deployments, zf)
+        else:
+            Path(target).mkdir(parents=True, exist_ok=True)
+            self._write_resources(df, deployments, target)
+
+        logger.info(f"Paquete Camtrap DP generado: {len(deployments)} deployments, {len(df):,} media")
+        return target
+
+    def _write_resources(self, df: pd.DataFrame, deployments: pd.DataFrame, target):
+        deployment_ids = self._deployment_ids(df)
+
+        with _open_text_member(target, 'deployments.csv') as handle:
+            deployments[DEPLOYMENT_FIELDS].to_csv(handle, index=False)
+
+        with _open_text_member(target, 'media.csv') as handle:
+            for i, chunk in enumerate(self.iter_media_chunks(df, deployment_ids)):
+                chunk.to_csv(handle, index=False, header=(i == 0))
+
+        with _open_text_member(target, 'observations.csv') as handle:
+            for i, chunk in enumerate(self.iter_observation_chunks(df, deployment_ids)):
+                chunk.to_csv(handle, index=False, header=(i == 0))
+
+        with _open_text_member(target, 'datapackage.json') as handle:
+            json.dump(self.build_descriptor(df, deployments), handle, indent=2, ensure_ascii=False)
+
+    @staticmethod
+    def _deployment_ids(df: pd.DataFrame) -> pd.Series:
+        return df['SITIO'].astype(str) + '-' + df['CAMARA'].astype(str)
+
+    def _timestamps(self, fechas: pd.Series, horas: pd.Series) -> pd.Series:
+        return fechas.astype(str) + 'T' + horas.astype(str) + self.utc_offset
+
+    def build_deployments(self, df: pd.DataFrame, coordinates: List[Dict]) -> pd.DataFrame:
+        """
+        Construye la tabla deployments: una fila por cámara.
+
+        El periodo de cada deployment va de la primera a la última captura
+        (mismo criterio de esfuerzo que TrapEffortCalculator) y la ubicación
+        se toma de camera_coordinates (UTM -> WGS84).
+        """
+        work = pd.DataFrame({
+            'SITIO': df['SITIO'],
+            'CAMARA': df['CAMARA'],
+            'TS': df['FECHA'].astype(str) + 'T' + df['HORA'].astype(str),
+        })
+        if 'CAMERA_MODEL' in df.columns:
+            work['CAMERA_MODEL'] = df['CAMERA_MODEL']
+
+        grouped = work.groupby(['SITIO', 'CAMARA'])
+        deployments = grouped['TS'].agg(['min', 'max']).reset_index()
+        if 'CAMERA_MODEL' in work.columns:
+            models = grouped['CAMERA_MODEL'].agg(lambda s: s.dropna().mode().iloc[0] if s.notna().any() else '')
+            deployments['cameraModel'] = models.to_numpy()
+        else:
+            deployments['cameraModel'] = ''
+
+        coords = {(c['site_name'], c['camera_name']): c for c in coordinates}
+        latitudes, longitudes = [], []
+        for sitio, camara in zip(deployments['SITIO'], deployments['CAMARA']):
+            coord = coords.get((sitio, camara))
+            if coord:
+                lat, lon = utm_to_latlon(coord['utm_zone'], coord['easting'], coord['northing'])
+                latitudes.append(round(lat, 6))
+                longitudes.append(round(lon, 6))
+            else:
+                latitudes.append(None)
+                longitudes.append(None)
+
+        missing = sum(lat is None for lat in latitudes)
+        if missing:
+            logger.warning(f"Camtrap DP: {missing} cámaras sin coordenadas (latitude/longitude vacías)")
+
+        result = pd.DataFrame({field: '' for field in DEPLOYMENT_FIELDS}, index=deployments.index)
+        result['deploymentID'] = deployments['SITIO'].astype(str) + '-' + deployments['CAMARA'].astype(str)
+        result['locationID'] = deployments['SITIO']
+        result['locationName'] = deployments['SITIO']
+        result['latitude'] = latitudes
+        result['longitude'] = longitudes
+        result['deploymentStart'] = deployments['min'] + self.utc_offset
+        result['deploymentEnd'] = deployments['max'] + self.utc_offset
+        result['cameraID'] = deployments['CAMARA']
+        result['cameraModel'] = deployments['cameraModel']
+
+        return result
+
+    def iter_media_chunks(self, df: pd.DataFrame, deployment_ids: pd.Series) -> Iterator[pd.DataFrame]:
+        """Genera la tabla media por bloques (una fila por foto)."""
+        for start in range(0, len(df), self.chunk_size):
+            chunk = df.iloc[start:start + self.chunk_size]
+            media = pd.DataFrame({field: '' for field in MEDIA_FIELDS}, index=chunk.index)
+
+            media['mediaID'] = [f"M{i:09d}" for i in range(start, start + len(chunk))]
+            media['deploymentID'] = deployment_ids.iloc[start:start + self.chunk_size]
+            media['captureMethod'] = 'activityDetection'
+            media['timestamp'] = self._timestamps(chunk['FECHA'], chunk['HORA'])
+            media['filePublic'] = 'false'
+
+            if 'ARCHIVO' in chunk.columns:
+                names = chunk['ARCHIVO'].astype(str)
+            elif 'RUTA' in chunk.columns:
+                names = chunk['RUTA'].astype(str).str.replace('\\', '/', regex=False).str.rsplit('/', n=1).str[-1]
+            else:
+                names = pd.Series('', index=chunk.index)
+
+            media['filePath'] = self._relative_paths(chunk['RUTA']) if 'RUTA' in chunk.columns else names
+            if 'URL' in chunk.columns:
+                # Fotos importadas sin copia local (ej: gs:// de Wildlife Insights)
+                media['filePath'] = media['filePath'].where(media['filePath'] != '', chunk['URL'].fillna('').astype(str))
+            media['fileName'] = names
+            extensions = names.str.extract(r'(\.[^.]+)$')[0].str.lower()
+            media['fileMediatype'] = extensions.map(MEDIA_TYPES).fillna('image/jpeg')
+
+            yield media[MEDIA_FIELDS]
+
+    def _relative_paths(self, paths: pd.Series) -> pd.Series:
+        paths = paths.astype(str).str.replace('\\', '/', regex=False)
+        if self.project_path is not None:
+            prefix = str(self.project_path).replace('\\', '/').rstrip('/') + '/'
+            paths = paths.where(~paths.str.startswith(prefix), paths.str[len(prefix):])
+        return paths
+
+    def iter_observation_chunks(self, df: pd.DataFrame, deployment_ids: pd.Series) -> Iterator[pd.DataFrame]:
+        """
+        Genera la tabla observations por bloques.
+
+        Primero una observación por evento independiente (observationLevel =
+        'event') y después, si include_media_observations, una por foto
+        (observationLevel = 'media') enlazada a su evento, para que la
+        clasificación por foto se conserve al importar.
+        """
+        work = pd.DataFrame({
+            'EVENTO': self.event_detector.assign_event_ids(df),
+            'deploymentID': deployment_ids,
+            'ESPECIE': df['ESPECIE'].astype(str),
+            'TS': df['FECHA'].astype(str) + 'T' + df['HORA'].astype(str),
+        })
+        events = work.groupby('EVENTO', sort=True).agg(
+            deploymentID=('deploymentID', 'first'),
+            ESPECIE=('ESPECIE', 'first'),
+            eventStart=('TS', 'min'),
+            eventEnd=('TS', 'max'),
+        ).reset_index()
+
+        for start in range(0, len(events), self.chunk_size):
+            chunk = events.iloc[start:start + self.chunk_size]
+            obs = self._observation_frame(chunk['ESPECIE'], chunk['deploymentID'], chunk['EVENTO'])
+            obs['observationID'] = 'O' + chunk['EVENTO'].astype(str).str.zfill(9)
+            obs['eventStart'] = chunk['eventStart'] + self.utc_offset
+            obs['eventEnd'] = chunk['eventEnd'] + self.utc_offset
+            obs['observationLevel'] = 'event'
+            yield obs[OBSERVATION_FIELDS]
+
+        if not self.include_media_observations:
+            return
+
+        for start in range(0, len(work), self.chunk_size):
+            chunk = work.iloc[start:start + self.chunk_size]
+            positions = range(start, start + len(chunk))
+            obs = self._observation_frame(chunk['ESPECIE'], chunk['deploymentID'], chunk['EVENTO'])
+            obs['observationID'] = [f"OM{i:09d}" for i in positions]
+            obs['mediaID'] = [f"M{i:09d}" for i in positions]
+            obs['eventStart'] = chunk['TS'] + self.utc_offset
+            obs['eventEnd'] = obs['eventStart']
+            obs['observationLevel'] = 'media'
+            yield obs[OBSERVATION_FIELDS]
+
+    @staticmethod
+    def _observation_frame(species: pd.Series, deployment_ids: pd.Series, events: pd.Series) -> pd.DataFrame:
+        """Columnas comunes a observaciones de evento y de foto."""
+        obs = pd.DataFrame({field: '' for field in OBSERVATION_FIELDS}, index=species.index)
+        obs['deploymentID'] = deployment_ids
+        obs['eventID'] = 'E' + events.astype(str).str.zfill(9)
+        obs['observationType'] = species.map(OBSERVATION_TYPES).fillna('animal')
+        obs['scientificName'] = species.map(SCIENTIFIC_NAMES).fillna('')
+        obs['classificationMethod'] = 'human'
+        obs['observationComments'] = species
+        return obs
+
+    def build_descriptor(self, df: pd.DataFrame, deployments: pd.DataFrame) -> Dict:
+        """Construye datapackage.json."""
+        name = re.sub(r'[^a-z0-9._-]+', '-', self.project_name.lower()).strip('-') or 'proyecto'
+
+        lats = pd.to_numeric(deployments['latitude'], errors='coerce').dropna()
+        lons = pd.to_numeric(deployments['longitude'], errors='coerce').dropna()
+        spatial = None
+        if len(lats) > 0:
+            west, east, south, north = lons.min(), lons.max(), lats.min(), lats.max()
+            spatial = {
+                'type': 'Polygon',
+                'bbox': [west, south, east, north],
+                'coordinates': [[[west, south], [east, south], [east, north],
+                                 [west, north], [west, south]]]
+            }
+
+        taxonomic = []
+        for especie in sorted(df['ESPECIE'].dropna().unique()):
+            scientific = SCIENTIFIC_NAMES.get(especie)
+            if scientific:
+                taxonomic.append({'scientificName': scientific, 'vernacularNames': {'spa': especie.lower()}})
+
+        def resource(table: str) -> Dict:
+            return {
+                'name': table,
+                'path': f'{table}.csv',
+                'profile': 'tabular-data-resource',
+                'format': 'csv',
+                'mediatype': 'text/csv',
+                'encoding': 'utf-8',
+                'schema': f'{CAMTRAP_DP_BASE_URL}/{table}-table-schema.json'
+            }
+
+        return {
+            'profile': f'{CAMTRAP_DP_BASE_URL}/camtrap-dp-profile.json',
+            'name': name,
+            'id': str(uuid.uuid4()),
+            'created': datetime.now().astimezone().isoformat(timespec='seconds'),
+            'title': self.project_name,
+            'contributors': [{'title': self.contributor, 'role': 'contact'}],
+            'project': {
+                'title': self.project_name,
+                'samplingDesign': self.sampling_design,
+                'captureMethod': ['activityDetection'],
+                'individualAnimals': False,
+                'observationLevel': ['event', 'media'] if self.include_media_observations else ['event']
+            },
+            'spatial': spatial,
+            'temporal': {
+                'start': str(df['FECHA'].min()) if len(df) else None,
+                'end': str(df['FECHA'].max()) if len(df) else None
+            },
+            'taxonomic': taxonomic,
+            'resources': [resource('deployments'), resource('media'), resource('observations')]
+        }
+
+
+class CamtrapDPReader:
+    """Lector de paquetes Camtrap DP hacia el esquema de análisis (sin leer imágenes)."""
+
+    OUTPUT_COLUMNS = ['SITIO', 'CAMARA', 'ESPECIE', 'FECHA', 'HORA', 'ARCHIVO', 'RUTA', 'URL']
+
+    def __init__(self, chunk_size: int = 200000):
+        """
+        Args:
+            chunk_size: Filas por bloque al leer media.csv y observations.csv
+        """
+        self.chunk_size = chunk_size
+
+    @contextmanager
+    def _open_package(self, source: Union[str, Path, BinaryIO]):
+        """Abre el paquete (carpeta, datapackage.json o .zip) y da una función para abrir recursos."""
+        if not isinstance(source, (str, Path)) or str(source).lower().endswith('.zip'):
+            with zipfile.ZipFile(source) as zf:
+                names = zf.namelist()
+                descriptors = [n for n in names if n.endswith('datapackage.json')]
+                if not descriptors:
+                    raise ValueError("El zip no contiene datapackage.json")
+                descriptor_name = min(descriptors, key=len)
+                base = descriptor_name[:-len('datapackage.json')]
+                yield lambda path: zf.open(base + path)
+        else:
+            base = Path(source)
+            if base.is_file():
+                base = base.parent
+            yield lambda path: open(base / path, 'rb')
+
+    @staticmethod
+    def _media_dir(source: Union[str, Path, BinaryIO]) -> Optional[Path]:
+        """Carpeta del paquete contra la que se resuelven las filePath relativas (None en zip)."""
+        if not isinstance(source, (str, Path)) or str(source).lower().endswith('.zip'):
+            return None
+        base = Path(source)
+        return base.parent if base.is_file() else base
+    
+    def _resolve_media_paths(self, result: pd.DataFrame, source) -> pd.DataFrame:
+        """RUTA con rutas locales legibles y URL con las ubicaciones remotas de filePath."""
+        base = self._media_dir(source)
+        result['RUTA'], result['URL'] = resolve_media_locations(result['RUTA'], base)
+        if base is None:
+            # Las rutas relativas apuntan dentro del zip y no se pueden abrir como archivo
+            absolute = result['RUTA'].map(lambda path: bool(path) and Path(path).is_absolute())
+            result['RUTA'] = result['RUTA'].where(absolute, '')
+        if (result['RUTA'] != '').any() and not any_path_exists(result['RUTA']):
+            logger.warning("Las imágenes del paquete Camtrap DP no están disponibles: se importan sin rutas")
+            result['RUTA'] = ''
+        return result
+    
+    def read(self, source: Union[str, Path, BinaryIO]) -> pd.DataFrame:
+        """
+        Lee un paquete Camtrap DP y lo convierte a filas por foto.
+
+        Las observaciones a nivel media se asocian por mediaID; las de nivel
+        evento, por deploymentID y rango [eventStart, eventEnd]. Si varias
+        observaciones de evento se solapan en el tiempo, se toma la que inicia
+        más tarde. Las fotos sin observación quedan como CLASIFICACION_PENDIENTE.
+
+        Args:
+            source: Carpeta, ruta a datapackage.json, .zip o buffer binario
+
+        Returns:
+            DataFrame con columnas SITIO, CAMARA, ESPECIE, FECHA, HORA, ARCHIVO,
+            RUTA (ruta local legible o '') y URL (filePath remota o '')
+        """
+        with self._open_package(source) as open_resource:
+            with open_resource('datapackage.json') as handle:
+                descriptor = json.load(handle)
+
+            paths = {r['name']: r['path'] for r in descriptor.get('resources', []) if 'path' in r}
+            vernacular = self._vernacular_names(descriptor)
+
+            with open_resource(paths.get('deployments', 'deployments.csv')) as handle:
+                deployments = pd.read_csv(handle, dtype=str, keep_default_na=False)
+            deployment_map = self._deployment_map(deployments)
+
+            with open_resource(paths.get('observations', 'observations.csv')) as handle:
+                observations = self._read_observations(handle, vernacular)
+
+            media_obs = observations[
+                (observations['observationLevel'] == 'media') & (observations['mediaID'] != '')
+            ].drop_duplicates('mediaID')[['mediaID', 'ESPECIE']]
+            event_obs = observations[observations['observationLevel'] == 'event'][
+                ['deploymentID', 'START', 'END', 'ESPECIE']
+            ].sort_values('START')
+
+            parts = []
+            with open_resource(paths.get('media', 'media.csv')) as handle:
+                usecols = {'mediaID', 'deploymentID', 'timestamp', 'filePath', 'fileName'}
+                for chunk in pd.read_csv(handle, dtype=str, keep_default_na=False,
+                                         usecols=lambda c: c in usecols, chunksize=self.chunk_size):
+                    parts.append(self._media_to_rows(chunk, deployment_map, media_obs, event_obs))
+
+        if not parts:
+            return pd.DataFrame(columns=self.OUTPUT_COLUMNS)
+
+        result = self._resolve_media_paths(pd.concat(parts, ignore_index=True), source)
+        logger.info(f"Paquete Camtrap DP importado: {len(result):,} fotos")
+        return result
+
+    @staticmethod
+    def _vernacular_names(descriptor: Dict) -> Dict[str, str]:
+        """Nombre científico -> nombre común en español (o inglés) del descriptor."""
+        names = {scientific: especie for especie, scientific in SCIENTIFIC_NAMES.items()}
+        for taxon in descriptor.get('taxonomic', []) or []:
+            scientific = taxon.get('scientificName')
+            common = (taxon.get('vernacularNames') or {})
+            common_name = common.get('spa') or common.get('eng')
+            if scientific and common_name and scientific not in names:
+                names[scientific] = common_name
+        return names
+
+    @staticmethod
+    def _deployment_map(deployments: pd.DataFrame) -> pd.DataFrame:
+        """deploymentID -> SITIO, CAMARA."""
+        def first_filled(*columns: str) -> pd.Series:
+            result = pd.Series('', index=deployments.index)
+            for column in reversed(columns):
+                if column in deployments.columns:
+                    result = deployments[column].where(deployments[column] != '', result)
+            return result
+
+        return pd.DataFrame({
+            'deploymentID': deployments['deploymentID'],
+            'SITIO': first_filled('locationName', 'locationID', 'deploymentID'),
+            'CAMARA': first_filled('cameraID', 'deploymentID'),
+        })
+
+    def _read_observations(self, handle, vernacular: Dict[str, str]) -> pd.DataFrame:
+        usecols = {'deploymentID', 'mediaID', 'eventStart', 'eventEnd', 'observationLevel',
+                   'observationType', 'scientificName', 'observationComments'}
+        parts = []
+        for chunk in pd.read_csv(handle, dtype=str, keep_default_na=False,
+                                 usecols=lambda c: c in usecols, chunksize=self.chunk_size):
+            for column in usecols:
+                if column not in chunk.columns:
+                    chunk[column] = ''
+
+            types = chunk['observationType'].str.lower()
+            scientific = chunk['scientificName']
+            species = scientific.map(vernacular)
+            species = species.where(species.notna(), scientific.where(scientific != '', None))
+            # Paquetes propios guardan el nombre original en observationComments
+            species = species.where(species.notna() | (types != 'animal'),
+                                    chunk['observationComments'].where(chunk['observationComments'] != '', None))
+
+            type_names = {v: k for k, v in OBSERVATION_TYPES.items()}
+            species = species.where(types == 'animal', types.map(type_names))
+            species = species.fillna('DESCONOCIDO')
+
+            parts.append(pd.DataFrame({
+                'deploymentID': chunk['deploymentID'],
+                'mediaID': chunk['mediaID'],
+                'observationLevel': chunk['observationLevel'].str.lower(),
+                'START': self._local_datetime(chunk['eventStart']),
+                'END': self._local_datetime(chunk['eventEnd']),
+                'ESPECIE': self._standardize(species),
+            }))
+
+        if not parts:
+            return pd.DataFrame(columns=['deploymentID', 'mediaID', 'observationLevel', 'START', 'END', 'ESPECIE'])
+        return pd.concat(parts, ignore_index=True)
+
+    @staticmethod
+    def _standardize(species: pd.Series) -> pd.Series:
+        """Aplica standardize_category una vez por nombre distinto."""
+        # Categorías internas (ej: CLASIFICACION_PENDIENTE) se conservan tal cual
+        mapping = {name: name if name in OBSERVATION_TYPES else standardize_category(str(name))
+                   for name in species.unique()}
+        return species.map(mapping)
+
+    @staticmethod
+    def _local_datetime(timestamps: pd.Series) -> pd.Series:
+        """Fecha-hora local de la cámara (ignora la zona horaria ISO 8601)."""
+        return pd.to_datetime(timestamps.str.slice(0, 19), format='%Y-%m-%dT%H:%M:%S', errors='coerce')
+
+    def _media_to_rows(self, media: pd.DataFrame, deployment_map: pd.DataFrame,
+                       media_obs: pd.DataFrame, event_obs: pd.DataFrame) -> pd.DataFrame:
+        media = media.copy()
+        for column in ('filePath', 'fileName'):
+            if column not in media.columns:
+                media[column] = ''
+
+        media['TS'] = self._local_datetime(media['timestamp'])
+        media = media[media['TS'].notna()]
+
+        # Observaciones a nivel media
+        media = media.merge(media_obs, on='mediaID', how='left')
+
+        # Observaciones a nivel evento: evento más reciente que inicia antes de la foto
+        if len(event_obs) > 0:
+            pending = media['ESPECIE'].isna()
+            if pending.any():
+                candidates = media[pending].reset_index().sort_values('TS')
+                matched = pd.merge_asof(
+                    candidates, event_obs.rename(columns={'ESPECIE': 'ESPECIE_EVENTO'}),
+                    left_on='TS', right_on='START', by='deploymentID', direction='backward'
+                )
+                inside = matched['TS'] <= matched['END']
+                matched = matched[inside].set_index('index')
+                media.loc[matched.index, 'ESPECIE'] = matched['ESPECIE_EVENTO']
+
+        media['ESPECIE'] = media['ESPECIE'].fillna('CLASIFICACION_PENDIENTE')
+        media = media.merge(deployment_map, on='deploymentID', how='left')
+        media['SITIO'] = media['SITIO'].fillna(media['deploymentID'])
+        media['CAMARA'] = media['CAMARA'].fillna(media['deploymentID'])
+
+        file_names = media['fileName'].where(
+            media['fileName'] != '',
+            media['filePath'].str.replace('\\', '/', regex=False).str.rsplit('/', n=1).str[-1]
+        )
+
+        return pd.DataFrame({
+            'SITIO': media['SITIO'],
+            'CAMARA': media['CAMARA'],
+            'ESPECIE': media['ESPECIE'],
+            'FECHA': media['TS'].dt.strftime('%Y-%m-%d'),
+            'HORA': media['TS'].dt.strftime('%H:%M:%S'),
+            'ARCHIVO': file_names,
+            'RUTA': media['filePath'],
+            'URL': '',
+        })[self.OUTPUT_COLUMNS]
@@ -15,13 +15,32 @@ class ConfigManager:
         "processing": {
             "independent_event_minutes": 30,
             "image_extensions": [".jpg", ".jpeg", ".png", ".JPG", ".JPEG", ".PNG"],
-            "max_cameras_per_site": 10
+            "max_cameras_per_site": 10,
+            "exclude_duplicates": False,
+            "max_memory_mb": 1024,
+            "manual_sequence_seconds": 60
         },
         "ai": {
             "enabled": True,
             "confidence_threshold": 0.80,
             "batch_size": 32,
-            "auto_validate_high_confidence": False
+            "auto_validate_high_confidence": False,
+            "model_path": "",
+            "input_size": 640,
+            "decode_workers": 4,
+            "detection_threshold": 0.20,
+            "backend": "torch",
+            "quantize_int8": False,
+            "cpu_threads": 0,
+            "cache_predictions": True,
+            "prefilter_empty": True,
+            "burst_gap_seconds": 10,
+            "motion_threshold": 0.005,
+            "model_server": True,
+            "server_port": 47621,
+            "server_max_wait_ms": 50,
+            "server_idle_minutes": 30,
+            "validation_events_per_page": 10
         },
         "coordinates": {
             "default_datum": "WGS84",
@@ -34,7 +53,10 @@ class ConfigManager:
             "include_ai_predictions": True,
             "include_coordinates": True,
             "include_effort": True,
-            "include_independent_events": True
+            "include_independent_events": True,
+            "columnar_formats": [],
+            "save_to_disk": False,
+            "camtrap_utc_offset": "-06:00"
         },
         "ui": {
             "language": "es",
@@ -151,6 +173,23 @@ class ConfigManager:
         """Establece minutos para eventos independientes."""
         self.set("processing.independent_event_minutes", minutes)
     
+    def should_exclude_duplicates(self) -> bool:
+        """Verifica si excluir fotos duplicadas al procesar."""
+        return self.get("processing.exclude_duplicates", False)
+    
+    def set_exclude_duplicates(self, exclude: bool):
+        """Establece si excluir fotos duplicadas al procesar."""
+        self.set("processing.exclude_duplicates", exclude)
+    
+    def get_max_memory_mb(self) -> int:
+        """Obtiene memoria máxima (MB) por bloque en análisis sobre Parquet."""
+        return self.get("processing.max_memory_mb", 1024)
+    
+    def set_max_memory_mb(self, megabytes: int):
+        """Establece memoria máxima (MB) por bloque en análisis sobre Parquet."""
+        if megabytes > 0:
+            self.set("processing.max_memory_mb", int(megabytes))
+    
     def get_confidence_threshold(self) -> float:
         """Obtiene umbral de confianza de IA."""
         return self.get("ai.confidence_threshold", 0.80)
@@ -160,6 +199,27 @@ class ConfigManager:
         if 0.0 <= threshold <= 1.0:
             self.set("ai.confidence_threshold", threshold)
     
+    def get_ai_batch_size(self) -> int:
+        """Obtiene número de imágenes por lote de inferencia."""
+        return self.get("ai.batch_size", 32)
+    
+    def get_model_path(self) -> str:
+        """Obtiene ruta local del modelo detector ("" si no hay)."""
+        return self.get("ai.model_path", "")
+    
+    def set_model_path(self, model_path: str):
+        """Establece ruta local del modelo detector."""
+        self.set("ai.model_path", model_path)
+    
+    def get_inference_backend(self) -> str:
+        """Obtiene backend de inferencia ('torch' u 'onnx')."""
+        return self.get("ai.backend", "torch")
+    
+    def set_inference_backend(self, backend: str):
+        """Establece backend de inferencia ('torch' u 'onnx')."""
+        if backend in ("torch", "onnx"):
+            self.set("ai.backend", backend)
+    
     def is_ai_enabled(self) -> bool:
         """Verifica si IA está habilitada."""
         return self.get("ai.enabled", True)
@@ -184,6 +244,30 @@ class ConfigManager:
         """Verifica si generar Excel completo."""
         return self.get("export.generate_complete_excel", True)
     
+    def get_columnar_formats(self) -> list:
+        """Obtiene formatos columnares adicionales a exportar ('parquet', 'csv.gz')."""
+        return self.get("export.columnar_formats", [])
+    
+    def set_columnar_formats(self, formats: list):
+        """Establece formatos columnares adicionales a exportar."""
+        self.set("export.columnar_formats", [f for f in formats if f in ("parquet", "csv.gz")])
+    
+    def should_save_exports_to_disk(self) -> bool:
+        """Verifica si guardar exportaciones en la carpeta del proyecto además de descargarlas."""
+        return self.get("export.save_to_disk", False)
+    
+    def set_save_exports_to_disk(self, save: bool):
+        """Establece si guardar exportaciones en la carpeta del proyecto."""
+        self.set("export.save_to_disk", save)
+    
+    def get_camtrap_utc_offset(self) -> str:
+        """Obtiene el desfase UTC de las cámaras para fechas Camtrap DP (ej: '-06:00')."""
+        return self.get("export.camtrap_utc_offset", "-06:00")
+    
+    def set_camtrap_utc_offset(self, offset: str):
+        """Establece el desfase UTC de las cámaras para exportar a Camtrap DP."""
+        self.set("export.camtrap_utc_offset", offset)
+    
     def get_language(self) -> str:
         """Obtiene idioma de la interfaz."""
         return self.get("ui.language", "es")
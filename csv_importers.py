@@ -0,0 +1,291 @@
+"""
+Importación de datos existentes en CSV (Timelapse, Wildlife Insights, FORXIME/2)
+al esquema de análisis, leyendo por bloques y sin necesidad de imágenes.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+import pandas as pd
+
+from logger import get_logger
+from utils import any_path_exists, resolve_media_locations, standardize_category
+
+logger = get_logger()
+
+
+class CSVDatasetImporter:
+    """Importador de CSV de otras herramientas al esquema SITIO/CAMARA/ESPECIE/FECHA/HORA."""
+
+    OUTPUT_COLUMNS = ['SITIO', 'CAMARA', 'ESPECIE', 'FECHA', 'HORA', 'ARCHIVO', 'RUTA', 'URL']
+    FORMATS = {
+        'forxime': 'FORXIME/2',
+        'timelapse': 'Timelapse',
+        'wildlife_insights': 'Wildlife Insights',
+    }
+    CHUNK_SIZE = 200000
+    RESERVED_CATEGORIES = {'VACIO', 'CLASIFICACION_PENDIENTE'}
+
+    # Columnas de especie habituales en plantillas de Timelapse
+    TIMELAPSE_SPECIES_COLUMNS = ['Species', 'species', 'Especie', 'ESPECIE', 'Species1', 'Animal']
+
+    @staticmethod
+    def detect_format(csv_path: Union[str, Path]) -> Optional[str]:
+        """
+        Detecta el formato por los encabezados del CSV.
+
+        Args:
+            csv_path: Ruta al CSV
+
+        Returns:
+            'forxime', 'timelapse', 'wildlife_insights' o None si no se reconoce
+        """
+        header = pd.read_csv(csv_path, nrows=0, encoding='utf-8-sig', encoding_errors='replace')
+        columns = set(header.columns)
+        upper = {str(c).strip().upper() for c in columns}
+
+        if {'deployment_id', 'timestamp'} <= columns:
+            return 'wildlife_insights'
+        if {'File', 'RelativePath'} <= columns:
+            return 'timelapse'
+        if {'SITIO', 'CAMARA', 'ESPECIE', 'FECHA', 'HORA'} <= upper:
+            return 'forxime'
+        return None
+
+    @staticmethod
+    def import_csv(csv_path: Union[str, Path], fmt: Optional[str] = None,
+                   deployments_path: Optional[Union[str, Path]] = None,
+                   species_column: Optional[str] = None,
+                   chunk_size: Optional[int] = None,
+                   image_root: Optional[Union[str, Path]] = None) -> pd.DataFrame:
+        """
+        Importa un CSV completo al esquema de análisis.
+
+        Args:
+            csv_path: Ruta al CSV
+            fmt: Formato ('forxime', 'timelapse', 'wildlife_insights'); None = detectar
+            deployments_path: deployments.csv de Wildlife Insights (sitio y cámara
+                por deployment_id); sin él se usa deployment_id para ambos
+            species_column: Columna de especie en Timelapse (por defecto se busca
+                en TIMELAPSE_SPECIES_COLUMNS)
+            chunk_size: Filas por bloque
+            image_root: Carpeta de las imágenes para resolver rutas relativas
+                (por defecto la carpeta del CSV)
+
+        Returns:
+            DataFrame con columnas SITIO, CAMARA, ESPECIE, FECHA, HORA, ARCHIVO,
+            RUTA (ruta local legible o '') y URL (ubicación remota o '')
+        """
+        fmt = fmt or CSVDatasetImporter.detect_format(csv_path)
+        if fmt not in CSVDatasetImporter.FORMATS:
+            raise ValueError(f"Formato de CSV no reconocido: {csv_path}")
+
+        deployments = None
+        if fmt == 'wildlife_insights' and deployments_path:
+            deployments = CSVDatasetImporter._read_wi_deployments(deployments_path)
+
+        try:
+            parts = list(CSVDatasetImporter._iter_mapped_chunks(
+                csv_path, fmt, 'utf-8-sig', deployments, species_column, chunk_size
+            ))
+        except UnicodeDecodeError:
+            # CSV guardados desde Excel en Windows
+            parts = list(CSVDatasetImporter._iter_mapped_chunks(
+                csv_path, fmt, 'latin-1', deployments, species_column, chunk_size
+            ))
+
+        if not parts:
+            return pd.DataFrame(columns=CSVDatasetImporter.OUTPUT_COLUMNS)
+
+        df = pd.concat(parts, ignore_index=True)
+        
+        # RUTA habilita vistas previas, prefiltro y validación: solo rutas locales que existan
+        image_root = Path(image_root) if image_root else Path(csv_path).parent
+        df['RUTA'], df['URL'] = resolve_media_locations(df['RUTA'], image_root)
+        if (df['RUTA'] != '').any() and not any_path_exists(df['RUTA']):
+            logger.warning(f"Las imágenes de {csv_path} no están en {image_root}: se importan sin rutas")
+            df['RUTA'] = ''
+
+        invalid = df['FECHA'].isna()
+        if invalid.any():
+            logger.warning(f"{int(invalid.sum()):,} filas sin fecha-hora válida descartadas de {csv_path}")
+            df = df[~invalid].reset_index(drop=True)
+
+        logger.info(f"CSV {CSVDatasetImporter.FORMATS[fmt]} importado: {len(df):,} registros")
+        return df
+
+    @staticmethod
+    def _iter_mapped_chunks(csv_path, fmt: str, encoding: str, deployments: Optional[pd.DataFrame],
+                            species_column: Optional[str], chunk_size: Optional[int]) -> Iterator[pd.DataFrame]:
+        """Lee el CSV por bloques y convierte cada bloque al esquema de análisis."""
+        # Caché compartida entre bloques: cada nombre distinto se estandariza una vez
+        species_cache: Dict[str, str] = {}
+
+        reader = pd.read_csv(
+            csv_path, dtype=str, keep_default_na=False, encoding=encoding,
+            chunksize=chunk_size or CSVDatasetImporter.CHUNK_SIZE
+        )
+        for chunk in reader:
+            if fmt == 'forxime':
+                mapped = CSVDatasetImporter._map_forxime(chunk)
+            elif fmt == 'timelapse':
+                mapped = CSVDatasetImporter._map_timelapse(chunk, species_column)
+            else:
+                mapped = CSVDatasetImporter._map_wildlife_insights(chunk, deployments)
+
+            yield CSVDatasetImporter._finalize(mapped, species_cache)
+
+    @staticmethod
+    def _finalize(mapped: Dict[str, pd.Series], species_cache: Dict[str, str]) -> pd.DataFrame:
+        """Estandariza nombres y separa la fecha-hora en FECHA y HORA."""
+        species = mapped['ESPECIE'].astype(str)
+        for name in species.unique():
+            if name not in species_cache:
+                # Categorías internas (ej: CLASIFICACION_PENDIENTE) se conservan tal cual
+                if name in CSVDatasetImporter.RESERVED_CATEGORIES:
+                    species_cache[name] = name
+                else:
+                    species_cache[name] = standardize_category(name)
+
+        fechas, horas = CSVDatasetImporter._split_datetimes(mapped['DATETIME'], mapped.get('DAYFIRST', False))
+
+        return pd.DataFrame({
+            'SITIO': mapped['SITIO'].astype(str).str.strip(),
+            'CAMARA': mapped['CAMARA'].astype(str).str.strip(),
+            'ESPECIE': species.map(species_cache),
+            'FECHA': fechas,
+            'HORA': horas,
+            'ARCHIVO': mapped.get('ARCHIVO', pd.Series('', index=species.index)),
+            'RUTA': mapped.get('RUTA', pd.Series('', index=species.index)),
+            'URL': '',
+        })[CSVDatasetImporter.OUTPUT_COLUMNS]
+
+    @staticmethod
+    def _split_datetimes(values: pd.Series, dayfirst: bool = False):
+        """
+        Convierte texto de fecha-hora a FECHA ('%Y-%m-%d') y HORA ('%H:%M:%S').
+
+        Se interpreta y formatea una vez por valor distinto: primero ISO 8601 y,
+        para lo que no se pueda, formatos mixtos (ej: '03-May-2021 14:22:10' de
+        Timelapse o '03/05/2021 14:22' de Excel). Valores inválidos quedan NaN.
+
+        Returns:
+            Tupla (FECHA, HORA) de Series alineadas con values
+        """
+        values = values.astype(str).str.strip()
+        codes, unique = pd.factorize(values)
+        unique = pd.Series(unique)
+
+        parsed = pd.to_datetime(unique, format='ISO8601', errors='coerce')
+        missing = parsed.isna() & (unique != '')
+        if missing.any():
+            parsed[missing] = pd.to_datetime(unique[missing], format='mixed', dayfirst=dayfirst, errors='coerce')
+
+        fechas = parsed.dt.strftime('%Y-%m-%d').to_numpy(dtype=object)
+        horas = parsed.dt.strftime('%H:%M:%S').to_numpy(dtype=object)
+        return (pd.Series(fechas[codes], index=values.index),
+                pd.Series(horas[codes], index=values.index))
+
+    @staticmethod
+    def _map_forxime(chunk: pd.DataFrame) -> Dict[str, pd.Series]:
+        """CSV con columnas SITIO, CAMARA, ESPECIE, FECHA, HORA (Excel básico guardado como CSV)."""
+        columns = {str(c).strip().upper(): c for c in chunk.columns}
+        column = lambda name: chunk[columns[name]]
+
+        mapped = {
+            'SITIO': column('SITIO'),
+            'CAMARA': column('CAMARA'),
+            'ESPECIE': column('ESPECIE'),
+            'DATETIME': column('FECHA').str.strip() + ' ' + column('HORA').str.strip(),
+            # Excel en español guarda fechas como dd/mm/aaaa
+            'DAYFIRST': True,
+        }
+        if 'ARCHIVO' in columns:
+            mapped['ARCHIVO'] = column('ARCHIVO')
+        if 'RUTA' in columns:
+            mapped['RUTA'] = column('RUTA')
+        return mapped
+
+    @staticmethod
+    def _map_timelapse(chunk: pd.DataFrame, species_column: Optional[str]) -> Dict[str, pd.Series]:
+        """
+        CSV exportado por Timelapse.
+
+        SITIO y CAMARA salen de RelativePath (SITIO\\CAMARA[\\ESPECIE]). La especie
+        viene de la columna indicada; si no hay columna de especie se usa la
+        tercera carpeta de la ruta, y si la foto está marcada como vacía, VACIO.
+        """
+        parts = chunk['RelativePath'].str.replace('\\', '/', regex=False).str.strip('/').str.split('/')
+        sitio = parts.str[0].fillna('')
+        camara = parts.str[1].fillna(sitio)
+
+        if species_column is None:
+            species_column = next(
+                (c for c in CSVDatasetImporter.TIMELAPSE_SPECIES_COLUMNS if c in chunk.columns), None
+            )
+
+        if species_column is not None:
+            species = chunk[species_column].str.strip()
+        else:
+            species = parts.str[2].fillna('')
+
+        if 'Empty' in chunk.columns:
+            empty = chunk['Empty'].str.strip().str.lower().isin(['true', '1', 'yes'])
+            species = species.where(~empty, 'VACIO')
+        species = species.where(species != '', 'CLASIFICACION_PENDIENTE')
+
+        if 'DateTime' in chunk.columns:
+            datetimes = chunk['DateTime']
+        else:
+            datetimes = chunk['Date'] + ' ' + chunk['Time']
+
+        # RelativePath es relativa a la carpeta raíz de Timelapse (donde suele estar el CSV)
+        relative = chunk['RelativePath'].str.replace('\\', '/', regex=False).str.strip('/')
+        return {
+            'SITIO': sitio,
+            'CAMARA': camara,
+            'ESPECIE': species,
+            'DATETIME': datetimes,
+            'DAYFIRST': True,
+            'ARCHIVO': chunk['File'],
+            'RUTA': relative.where(relative == '', relative + '/') + chunk['File'],
+        }
+
+    @staticmethod
+    def _read_wi_deployments(deployments_path: Union[str, Path]) -> pd.DataFrame:
+        """deployment_id -> SITIO (placename) y CAMARA (camera_id) de Wildlife Insights."""
+        deployments = pd.read_csv(deployments_path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+        sitio = deployments.get('placename', deployments['deployment_id'])
+        camara = deployments.get('camera_id', deployments['deployment_id'])
+
+        return pd.DataFrame({
+            'SITIO': sitio.where(sitio != '', deployments['deployment_id']).to_numpy(),
+            'CAMARA': camara.where(camara != '', deployments['deployment_id']).to_numpy(),
+        }, index=deployments['deployment_id'].to_numpy())
+
+    @staticmethod
+    def _map_wildlife_insights(chunk: pd.DataFrame, deployments: Optional[pd.DataFrame]) -> Dict[str, pd.Series]:
+        """images.csv de Wildlife Insights (una fila por foto e identificación)."""
+        deployment_ids = chunk['deployment_id']
+        if deployments is not None:
+            sitio = deployment_ids.map(deployments['SITIO']).fillna(deployment_ids)
+            camara = deployment_ids.map(deployments['CAMARA']).fillna(deployment_ids)
+        else:
+            sitio = camara = deployment_ids
+
+        species = chunk.get('common_name', pd.Series('', index=chunk.index)).str.strip()
+        if 'genus' in chunk.columns and 'species' in chunk.columns:
+            binomial = (chunk['genus'].str.strip() + ' ' + chunk['species'].str.strip()).str.strip()
+            species = species.where(species != '', binomial)
+        if 'is_blank' in chunk.columns:
+            species = species.where(chunk['is_blank'].str.strip() != '1', 'VACIO')
+        species = species.where(species != '', 'CLASIFICACION_PENDIENTE')
+
+        return {
+            'SITIO': sitio,
+            'CAMARA': camara,
+            'ESPECIE': species,
+            'DATETIME': chunk['timestamp'],
+            'ARCHIVO': chunk.get('filename', pd.Series('', index=chunk.index)),
+            'RUTA': chunk.get('location', pd.Series('', index=chunk.index)),
+        }
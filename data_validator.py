@@ -2,12 +2,16 @@
 Validador de datos de cámaras trampa.
 """
 
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from typing import List, Dict, Tuple
-from collections import Counter
+from collections import defaultdict
+import bisect
 import re
 
+from fuzzy_matcher import FuzzyNameIndex, normalize_name, levenshtein_distance
+
 
 class ExifValidator:
     """Validador de metadatos EXIF."""
@@ -24,6 +28,39 @@ class ExifValidator:
         except:
             return False, f"Formato de fecha inválido: {fecha}"
     
+    @staticmethod
+    def validate_date_series(fechas: pd.Series, min_year: int = 2010,
+                             max_year: int = 2030) -> pd.Series:
+        """
+        Valida una columna completa de fechas.
+        
+        Cada fecha distinta se valida una sola vez (rango de años vectorizado)
+        y el resultado se propaga a todas las filas.
+        
+        Returns:
+            Serie alineada con `fechas`: mensaje de error, o None si es válida
+        """
+        codes, uniques = pd.factorize(fechas, use_na_sentinel=False)
+        uniques = pd.Series(np.asarray(uniques, dtype=object))
+        
+        parsed = pd.to_datetime(uniques, format="%Y-%m-%d", errors="coerce")
+        in_range = parsed.dt.year.between(min_year, max_year)
+        
+        messages = np.full(len(uniques), None, dtype=object)
+        
+        out_of_range = parsed.notna() & ~in_range
+        messages[out_of_range.to_numpy()] = [
+            f"Fecha fuera de rango ({min_year}-{max_year}): {fecha}"
+            for fecha in uniques[out_of_range]
+        ]
+        
+        # Valores que pandas no reconoce: validar con las mismas reglas que strptime
+        for i in np.flatnonzero(parsed.isna().to_numpy()):
+            valid, msg = ExifValidator.validate_date_range(uniques[i], min_year, max_year)
+            messages[i] = None if valid else msg
+        
+        return pd.Series(messages[codes], index=fechas.index, dtype=object)
+    
     @staticmethod
     def find_photos_without_exif(df: pd.DataFrame) -> List[str]:
         """Encuentra fotos sin metadatos EXIF."""
@@ -32,6 +69,129 @@ class ExifValidator:
         return missing_exif.index.tolist() if len(missing_exif) > 0 else []
 
 
+class TimestampAnomalyDetector:
+    """Detector de anomalías de reloj por cámara."""
+    
+    # Fechas a las que vuelven los relojes tras quitar baterías
+    FACTORY_DEFAULT_DATES = ('1970-01-01', '1980-01-01', '2000-01-01', '2001-01-01')
+    
+    @staticmethod
+    def extract_sequence_numbers(filenames: pd.Series) -> pd.Series:
+        """
+        Extrae el número de secuencia del nombre de archivo.
+        
+        Ej: 'IMG_0123.JPG' -> 123, 'RCNX0456.JPG' -> 456
+        """
+        return pd.to_numeric(
+            filenames.astype(str).str.extract(r'(\d+)\D*$')[0],
+            errors='coerce'
+        )
+    
+    @staticmethod
+    def detect_anomalies(df: pd.DataFrame, jump_threshold_hours: float = 1.0,
+                         min_year: int = 2010, forward_jump_factor: float = 10.0) -> pd.DataFrame:
+        """
+        Detecta fotos con hora sospechosa, cámara por cámara.
+        
+        Tipos de anomalía:
+        - FECHA_FABRICA: fecha por defecto del reloj o anterior a min_year
+        - FUERA_DE_ORDEN: hora anterior a la del archivo previo en la secuencia
+        - SALTO_RELOJ: retroceso >= jump_threshold_hours respecto al archivo previo
+          (típico de un reinicio o ajuste del reloj), o avance >= jump_threshold_hours
+          que además supera forward_jump_factor veces el percentil 95 de los
+          avances normales de esa cámara (un hueco sin disparos no basta)
+        
+        La secuencia se toma del número en el nombre de archivo (columna ARCHIVO);
+        sin esa columna solo se detectan fechas de fábrica.
+        
+        Args:
+            df: DataFrame con columnas SITIO, CAMARA, FECHA, HORA y opcionalmente ARCHIVO
+            jump_threshold_hours: Retroceso (o avance) mínimo para considerarlo salto de reloj
+            min_year: Año mínimo válido
+            forward_jump_factor: Veces el avance típico de la cámara desde el que un avance es salto
+            
+        Returns:
+            DataFrame con SITIO, CAMARA, ARCHIVO, FECHA, HORA, TIPO, DESFASE_HORAS
+            (índice alineado con df)
+        """
+        columns = ['SITIO', 'CAMARA', 'ARCHIVO', 'FECHA', 'HORA', 'TIPO', 'DESFASE_HORAS']
+        if len(df) == 0:
+            return pd.DataFrame(columns=columns)
+        
+        timestamps = pd.to_datetime(df['FECHA'] + ' ' + df['HORA'], errors='coerce')
+        
+        factory = (
+            df['FECHA'].isin(TimestampAnomalyDetector.FACTORY_DEFAULT_DATES)
+            | (timestamps.dt.year < min_year)
+        )
+        
+        tipo = pd.Series(np.where(factory, 'FECHA_FABRICA', None), index=df.index, dtype=object)
+        offset_hours = pd.Series(np.nan, index=df.index)
+        
+        if 'ARCHIVO' in df.columns:
+            work = pd.DataFrame({
+                'SITIO': df['SITIO'],
+                'CAMARA': df['CAMARA'],
+                'SEQ': TimestampAnomalyDetector.extract_sequence_numbers(df['ARCHIVO']),
+                'TS': timestamps
+            })
+            work = work[~factory & work['SEQ'].notna() & work['TS'].notna()]
+            work = work.sort_values(['SITIO', 'CAMARA', 'SEQ', 'TS'], kind='stable')
+            
+            same_camera = (
+                (work['SITIO'] == work['SITIO'].shift())
+                & (work['CAMARA'] == work['CAMARA'].shift())
+            )
+            # Números repetidos (varias tarjetas) no dan orden: se ignoran
+            comparable = same_camera & (work['SEQ'].diff() > 0)
+            delta_hours = work['TS'].diff().dt.total_seconds() / 3600
+            
+            backward = comparable & (delta_hours < 0)
+            jump = backward & (-delta_hours >= jump_threshold_hours)
+            
+            # Avances: cámaras con poca actividad tienen huecos largos normales,
+            # así que se comparan con el avance típico de la misma cámara
+            advancing = comparable & (delta_hours > 0)
+            typical = delta_hours.where(advancing).groupby(
+                [work['SITIO'], work['CAMARA']]
+            ).transform(lambda deltas: deltas.quantile(0.95))
+            forward = (
+                advancing
+                & (delta_hours >= jump_threshold_hours)
+                & (delta_hours > forward_jump_factor * typical)
+            )
+            
+            tipo.loc[backward[backward].index] = 'FUERA_DE_ORDEN'
+            tipo.loc[jump[jump].index] = 'SALTO_RELOJ'
+            tipo.loc[forward[forward].index] = 'SALTO_RELOJ'
+            offset_hours.loc[backward[backward].index] = delta_hours[backward].round(2)
+            offset_hours.loc[forward[forward].index] = delta_hours[forward].round(2)
+        
+        flagged = tipo.notna()
+        result = df.loc[flagged, ['SITIO', 'CAMARA', 'FECHA', 'HORA']].copy()
+        result['ARCHIVO'] = df.loc[flagged, 'ARCHIVO'] if 'ARCHIVO' in df.columns else ''
+        result['TIPO'] = tipo[flagged]
+        result['DESFASE_HORAS'] = offset_hours[flagged]
+        
+        return result[columns]
+    
+    @staticmethod
+    def summarize_by_camera(anomalies: pd.DataFrame) -> pd.DataFrame:
+        """Cuenta anomalías por cámara y tipo."""
+        types = ['FECHA_FABRICA', 'FUERA_DE_ORDEN', 'SALTO_RELOJ']
+        if len(anomalies) == 0:
+            return pd.DataFrame(columns=['SITIO', 'CAMARA'] + types)
+        
+        summary = (
+            anomalies.groupby(['SITIO', 'CAMARA', 'TIPO']).size()
+            .unstack(fill_value=0)
+            .reindex(columns=types, fill_value=0)
+            .reset_index()
+        )
+        summary.columns.name = None
+        return summary
+
+
 class NomenclatureValidator:
     """Validador de nomenclatura de especies."""
     
@@ -40,23 +200,70 @@ class NomenclatureValidator:
         """Detecta nombres duplicados de cámaras."""
         duplicates = {}
         
-        # Agrupar por sitio
-        for sitio, group in df.groupby('SITIO'):
-            camera_counts = Counter(group['CAMARA'])
-            # Cámaras que aparecen más de una vez (normal)
-            # Pero verificar si hay inconsistencias en nombres
-            cameras = group['CAMARA'].unique()
+        # Solo pares (sitio, cámara) distintos, en orden de aparición
+        pairs = df[['SITIO', 'CAMARA']].drop_duplicates()
+        
+        for sitio, group in pairs.groupby('SITIO'):
+            cameras = group['CAMARA'].tolist()
             
             # Buscar nombres similares que podrían ser errores
-            for i, cam1 in enumerate(cameras):
-                for cam2 in cameras[i+1:]:
-                    if NomenclatureValidator._are_similar(cam1, cam2):
-                        if sitio not in duplicates:
-                            duplicates[sitio] = []
-                        duplicates[sitio].append(f"{cam1} ≈ {cam2}")
+            for i, j in NomenclatureValidator._similar_pairs(cameras):
+                if sitio not in duplicates:
+                    duplicates[sitio] = []
+                duplicates[sitio].append(f"{cameras[i]} ≈ {cameras[j]}")
         
         return duplicates
     
+    @staticmethod
+    def _similar_pairs(names: List[str], threshold: float = 0.8) -> List[Tuple[int, int]]:
+        """
+        Encuentra pares (i, j), i < j, que cumplen `_are_similar`.
+        
+        Evita comparar todos contra todos: la contención se busca en un índice
+        de texto concatenado y la distancia de edición solo contra candidatos
+        del índice fuzzy.
+        """
+        norms = [str(name).upper().strip() for name in names]
+        found = set()
+        
+        # 1) Contención: buscar cada nombre dentro del texto concatenado de todos
+        sep = "\x00"
+        corpus = sep.join(norms)
+        starts = []
+        pos = 0
+        for norm in norms:
+            starts.append(pos)
+            pos += len(norm) + 1
+        
+        for i, needle in enumerate(norms):
+            if not needle:
+                continue
+            hit = corpus.find(needle)
+            while hit != -1:
+                j = bisect.bisect_right(starts, hit) - 1
+                if j != i and norms[j] != needle:
+                    found.add((min(i, j), max(i, j)))
+                hit = corpus.find(needle, hit + 1)
+        
+        # 2) Distancia de edición: candidatos del índice fuzzy. Para que dos
+        # nombres sean similares, d <= (1 - threshold) / threshold * len(corto)
+        folded = [normalize_name(norm) for norm in norms]
+        by_key = defaultdict(list)
+        for i, key in enumerate(folded):
+            by_key[key].append(i)
+        index = FuzzyNameIndex(folded)
+        
+        for i, key in enumerate(folded):
+            if not key:
+                continue
+            radius = int((1 - threshold) / threshold * len(key))
+            for match, _ in index.search(key, radius):
+                for j in by_key[match]:
+                    if j != i and NomenclatureValidator._are_similar(norms[i], norms[j], threshold):
+                        found.add((min(i, j), max(i, j)))
+        
+        return sorted(found)
+    
     @staticmethod
     def _are_similar(name1: str, name2: str, threshold: float = 0.8) -> bool:
         """Verifica si dos nombres son similares (posible error de tipeo)."""
@@ -71,13 +278,15 @@ class NomenclatureValidator:
         if n1 in n2 or n2 in n1:
             return True
         
-        # Verificar similitud de Levenshtein simple
-        if len(n1) == len(n2):
-            diff_count = sum(c1 != c2 for c1, c2 in zip(n1, n2))
-            similarity = 1 - (diff_count / len(n1))
-            return similarity >= threshold
+        # Similitud por distancia de edición, sin distinguir acentos
+        f1 = normalize_name(n1)
+        f2 = normalize_name(n2)
+        longest = max(len(f1), len(f2))
+        if longest == 0:
+            return False
         
-        return False
+        similarity = 1 - (levenshtein_distance(f1, f2) / longest)
+        return similarity >= threshold
     
     @staticmethod
     def suggest_species_standardization(df: pd.DataFrame) -> Dict[str, str]:
@@ -98,28 +307,32 @@ class NomenclatureValidator:
     @staticmethod
     def detect_inconsistent_species_names(df: pd.DataFrame) -> List[Tuple[str, str]]:
         """Detecta nombres de especies inconsistentes."""
-        inconsistencies = []
-        species_list = df['ESPECIE'].unique()
-        
-        for i, sp1 in enumerate(species_list):
-            for sp2 in species_list[i+1:]:
-                # Normalizar y comparar
-                sp1_norm = sp1.upper().strip()
-                sp2_norm = sp2.upper().strip()
-                
-                # Detectar variaciones comunes
-                if sp1_norm != sp2_norm:
-                    # Remover espacios y comparar
-                    sp1_no_space = sp1_norm.replace(' ', '')
-                    sp2_no_space = sp2_norm.replace(' ', '')
-                    
-                    if sp1_no_space == sp2_no_space:
-                        inconsistencies.append((sp1, sp2))
-                    # Detectar singular/plural
-                    elif sp1_norm.rstrip('S') == sp2_norm or sp2_norm.rstrip('S') == sp1_norm:
-                        inconsistencies.append((sp1, sp2))
-        
-        return inconsistencies
+        species_list = list(df['ESPECIE'].unique())
+        norms = [str(sp).upper().strip() for sp in species_list]
+        
+        # Índices por clave de bloqueo: sin espacios y nombre normalizado
+        by_no_space = defaultdict(list)
+        by_norm = defaultdict(list)
+        for i, norm in enumerate(norms):
+            by_no_space[norm.replace(' ', '')].append(i)
+            by_norm[norm].append(i)
+        
+        found = set()
+        
+        # Misma secuencia de letras con distintos espacios
+        for idx in by_no_space.values():
+            for a, i in enumerate(idx):
+                for j in idx[a + 1:]:
+                    if norms[i] != norms[j]:
+                        found.add((i, j))
+        
+        # Singular/plural: quitar 'S' finales de uno debe dar el otro
+        for i, norm in enumerate(norms):
+            for j in by_norm.get(norm.rstrip('S'), []):
+                if norms[i] != norms[j]:
+                    found.add((min(i, j), max(i, j)))
+        
+        return [(species_list[i], species_list[j]) for i, j in sorted(found)]
 
 
 class QualityReporter:
@@ -143,12 +356,12 @@ class QualityReporter:
             'quality_score': 100.0
         }
         
-        # Validar fechas
-        for idx, row in df.iterrows():
-            valid, msg = ExifValidator.validate_date_range(row['FECHA'])
-            if not valid:
-                report['date_issues'].append(msg)
-                report['quality_score'] -= 1
+        # Validar fechas (una vez por fecha distinta)
+        date_messages = ExifValidator.validate_date_series(df['FECHA'])
+        date_issues = date_messages[date_messages.notna()].tolist()
+        if date_issues:
+            report['date_issues'] = date_issues
+            report['quality_score'] -= len(date_issues)
         
         # Detectar fotos sin EXIF
         missing_exif = ExifValidator.find_photos_without_exif(df)
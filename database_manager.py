@@ -3,15 +3,73 @@ Gestor de base de datos SQLite para la plataforma de cámaras trampa.
 """
 
 import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Mapping, Optional, Tuple
+import itertools
 import json
 
+import numpy as np
+import pandas as pd
+
+from logger import get_logger
+
+logger = get_logger()
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Conexión de larga duración reutilizada por un mismo hilo.
+    
+    close() no cierra: deshace cualquier transacción pendiente y deja la
+    conexión (y su caché de sentencias preparadas) lista para la siguiente
+    llamada. release() la cierra de verdad.
+    """
+    
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+    
+    def release(self):
+        super().close()
+
 
 class DatabaseManager:
     """Gestor de base de datos local SQLite."""
     
+    # PRAGMAs aplicados a cada conexión nueva
+    CONNECTION_PRAGMAS = {
+        'journal_mode': 'WAL',        # lectores no bloquean al escritor
+        'synchronous': 'NORMAL',      # seguro con WAL, sin fsync por transacción
+        'cache_size': -32000,         # 32 MB de caché de páginas
+        'temp_store': 'MEMORY',
+        'mmap_size': 268435456,       # 256 MB
+    }
+    BUSY_TIMEOUT_SECONDS = 30
+    CACHED_STATEMENTS = 256
+    
+    # Índices compuestos de la tabla photos
+    PHOTO_INDEXES = {
+        'idx_photos_camera_time': 'project_id, site_name, camera_name, taken_at',
+        'idx_photos_species_time': 'project_id, species_name, taken_at',
+    }
+    
+    # Columnas del DataFrame de análisis -> columnas de photos
+    PHOTO_COLUMNS = {
+        'RUTA': 'path',
+        'SITIO': 'site_name',
+        'CAMARA': 'camera_name',
+        'ESPECIE': 'species_name',
+        'CAMERA_MODEL': 'camera_model',
+        'TEMPERATURE': 'temperature',
+    }
+    
+    # A partir de este tamaño, si la carga domina la tabla, es más rápido
+    # reconstruir los índices al final que mantenerlos fila por fila
+    BULK_REINDEX_ROWS = 100000
+    
     def __init__(self, db_path: str = "database/projects.db"):
         """
         Inicializa el gestor de base de datos.
@@ -21,14 +79,81 @@ class DatabaseManager:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._writer_lock = threading.Lock()
         self.init_database()
     
     def get_connection(self) -> sqlite3.Connection:
-        """Obtiene conexión a la base de datos."""
-        conn = sqlite3.Connection(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """
+        Obtiene la conexión del hilo actual (se crea una sola vez por hilo).
+        
+        Los métodos pueden llamar a conn.close() como siempre: la conexión
+        no se cierra, solo se descarta cualquier transacción sin confirmar.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=self.BUSY_TIMEOUT_SECONDS,
+                factory=PooledConnection,
+                cached_statements=self.CACHED_STATEMENTS
+            )
+            conn.row_factory = sqlite3.Row
+            for pragma, value in self.CONNECTION_PRAGMAS.items():
+                conn.execute(f"PRAGMA {pragma} = {value}")
+            self._local.conn = conn
+        elif conn.in_transaction:
+            # Transacción abandonada por una excepción en la llamada anterior
+            conn.rollback()
         return conn
     
+    def submit_write(self, func, *args, **kwargs) -> Future:
+        """
+        Encola una escritura en el hilo escritor único.
+        
+        Los trabajos en segundo plano deben escribir por aquí: las
+        escrituras se ejecutan una tras otra con la conexión del hilo
+        escritor, sin competir entre sí por el bloqueo de la base.
+        
+        Args:
+            func: Método de escritura (ej: self.save_photos)
+            *args, **kwargs: Argumentos del método
+            
+        Returns:
+            Future con el resultado del método
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        future = self._writer.submit(func, *args, **kwargs)
+        future.add_done_callback(self._log_write_error)
+        return future
+    
+    def wait_for_writes(self):
+        """Espera a que terminen las escrituras encoladas hasta ahora."""
+        with self._writer_lock:
+            writer = self._writer
+        if writer is not None:
+            writer.submit(lambda: None).result()
+    
+    @staticmethod
+    def _log_write_error(future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error en escritura encolada: {future.exception()}")
+    
+    def close(self):
+        """Espera las escrituras encoladas y cierra la conexión del hilo actual."""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.shutdown(wait=True)
+                self._writer = None
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.release()
+            self._local.conn = None
+    
     def init_database(self):
         """Inicializa tablas de la base de datos."""
         conn = self.get_connection()
@@ -91,6 +216,127 @@ class DatabaseManager:
             )
         """)
         
+        # Tabla de desfases de reloj por cámara (se aplican al analizar)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS camera_clock_offsets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_id INTEGER NOT NULL,
+                site_name TEXT NOT NULL,
+                camera_name TEXT NOT NULL,
+                offset_seconds REAL NOT NULL,
+                valid_from TEXT,
+                valid_to TEXT,
+                note TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (project_id) REFERENCES projects(id)
+            )
+        """)
+        
+        # Tabla de registros por foto (persisten entre sesiones)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS photos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_id INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                site_name TEXT NOT NULL,
+                camera_name TEXT NOT NULL,
+                species_name TEXT NOT NULL,
+                taken_at INTEGER,
+                camera_model TEXT,
+                temperature REAL,
+                photo_index INTEGER,
+                FOREIGN KEY (project_id) REFERENCES projects(id)
+            )
+        """)
+        
+        # Bases creadas sin photo_index: la clave de las fotos existentes es su id
+        photo_columns = {row['name'] for row in cursor.execute("PRAGMA table_info(photos)")}
+        if 'photo_index' not in photo_columns:
+            cursor.execute("ALTER TABLE photos ADD COLUMN photo_index INTEGER")
+            cursor.execute("UPDATE photos SET photo_index = id")
+        
+        # photo_index: índice de la foto en el DataFrame del proyecto (clave dentro del proyecto)
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_photos_key ON photos (project_id, photo_index)")
+        
+        # taken_at: segundos epoch de la hora local de la cámara (sin zona horaria)
+        for name, columns in self.PHOTO_INDEXES.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON photos ({columns})")
+        
+        # Agregados diarios materializados (fotos y eventos por día)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS daily_detections (
+                project_id INTEGER NOT NULL,
+                site_name TEXT NOT NULL,
+                camera_name TEXT NOT NULL,
+                species_name TEXT NOT NULL,
+                day TEXT NOT NULL,
+                photos INTEGER NOT NULL DEFAULT 0,
+                events INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (project_id, site_name, camera_name, species_name, day),
+                FOREIGN KEY (project_id) REFERENCES projects(id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_daily_species_day
+            ON daily_detections (project_id, species_name, day)
+        """)
+        
+        # Caché de predicciones de IA por contenido de imagen y modelo
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                content_hash TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                model_version TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                species_name TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                result TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (content_hash, model_name, model_version, settings)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_predictions_model
+            ON predictions (model_name, model_version)
+        """)
+        
+        # Cola de validación humana de predicciones (una fila por foto)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS validation_queue (
+                project_id INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                site_name TEXT NOT NULL,
+                camera_name TEXT NOT NULL,
+                taken_at INTEGER,
+                event_id INTEGER NOT NULL,
+                priority REAL NOT NULL,
+                predicted_species TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pendiente',
+                validated_species TEXT,
+                validated_at TIMESTAMP,
+                photo_index INTEGER,
+                PRIMARY KEY (project_id, path),
+                FOREIGN KEY (project_id) REFERENCES projects(id)
+            ) WITHOUT ROWID
+        """)
+        
+        # Colas creadas sin photo_index: se recupera de photos por ruta
+        queue_columns = {row['name'] for row in cursor.execute("PRAGMA table_info(validation_queue)")}
+        if 'photo_index' not in queue_columns:
+            cursor.execute("ALTER TABLE validation_queue ADD COLUMN photo_index INTEGER")
+            cursor.execute("""
+                UPDATE validation_queue SET photo_index = (
+                    SELECT p.photo_index FROM photos p
+                    WHERE p.project_id = validation_queue.project_id AND p.path = validation_queue.path
+                    LIMIT 1
+                )
+            """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_validation_priority
+            ON validation_queue (project_id, status, priority, event_id)
+        """)
+        
         conn.commit()
         conn.close()
     
@@ -128,6 +374,21 @@ class DatabaseManager:
         
         return dict(row) if row else None
     
+    def get_all_projects(self) -> List[Dict]:
+        """Obtiene todos los proyectos, del procesado más reciente al más antiguo."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT * FROM projects
+            ORDER BY last_processed IS NULL, last_processed DESC, name
+        """)
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
     def update_project_stats(self, project_id: int, total_photos: int, total_species: int):
         """Actualiza estadísticas del proyecto."""
         conn = self.get_connection()
@@ -189,6 +450,600 @@ class DatabaseManager:
         
         return [dict(row) for row in rows]
     
+    # Métodos para desfases de reloj de cámaras
+    
+    def save_camera_clock_offset(self, project_id: int, site_name: str, camera_name: str,
+                                 offset_seconds: float, valid_from: Optional[str] = None,
+                                 valid_to: Optional[str] = None, note: Optional[str] = None) -> int:
+        """
+        Registra un desfase de reloj para una cámara.
+        
+        Args:
+            offset_seconds: Segundos a sumar a la hora registrada por la cámara
+            valid_from: Fecha-hora registrada (YYYY-MM-DD HH:MM:SS) desde la que aplica
+            valid_to: Fecha-hora registrada hasta la que aplica
+            note: Comentario (ej: "reinicio tras cambio de baterías")
+            
+        Returns:
+            ID del registro
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            INSERT INTO camera_clock_offsets
+            (project_id, site_name, camera_name, offset_seconds, valid_from, valid_to, note)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (project_id, site_name, camera_name, offset_seconds, valid_from, valid_to, note))
+        
+        conn.commit()
+        offset_id = cursor.lastrowid
+        conn.close()
+        
+        return offset_id
+    
+    def get_camera_clock_offsets(self, project_id: int) -> List[Dict]:
+        """Obtiene los desfases de reloj registrados en un proyecto."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT * FROM camera_clock_offsets WHERE project_id = ?
+            ORDER BY site_name, camera_name, valid_from
+        """, (project_id,))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def delete_camera_clock_offset(self, offset_id: int):
+        """Elimina un desfase de reloj."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("DELETE FROM camera_clock_offsets WHERE id = ?", (offset_id,))
+        
+        conn.commit()
+        conn.close()
+    
+    # Métodos para registros por foto
+    
+    def save_photos(self, project_id: int, df: pd.DataFrame, replace: bool = True,
+                    batch_size: int = 50000) -> int:
+        """
+        Guarda los registros por foto de un proyecto en una sola transacción.
+        
+        El índice de df se guarda como photo_index: es la clave con la que se
+        actualizan las fotos después (ver update_photo_species), así que
+        debe ser entero y único.
+        
+        Args:
+            project_id: ID del proyecto
+            df: DataFrame con SITIO, CAMARA, ESPECIE, FECHA, HORA (y opcionalmente
+                RUTA, CAMERA_MODEL, TEMPERATURE)
+            replace: Borrar antes los registros existentes del proyecto
+            batch_size: Filas por llamada a executemany
+            
+        Returns:
+            Número de registros insertados
+        """
+        taken_at = pd.to_datetime(
+            df['FECHA'].astype(str) + ' ' + df['HORA'].astype(str),
+            format='%Y-%m-%d %H:%M:%S', errors='coerce'
+        )
+        epoch = taken_at.to_numpy(dtype='datetime64[s]').astype('int64')
+        epoch = np.where(taken_at.isna().to_numpy(), None, epoch)
+        
+        if not df.index.is_unique:
+            raise ValueError("El índice del DataFrame debe identificar cada foto (valores repetidos)")
+        photo_index = df.index.to_numpy().astype('int64').tolist()
+        
+        columns = {}
+        for source, target in self.PHOTO_COLUMNS.items():
+            if source in df.columns:
+                values = df[source].astype(object)
+                columns[target] = values.where(values.notna(), None).to_numpy()
+            else:
+                columns[target] = np.full(len(df), '' if target == 'path' else None, dtype=object)
+        
+        rows = zip(
+            [project_id] * len(df), columns['path'], columns['site_name'], columns['camera_name'],
+            columns['species_name'], epoch, columns['camera_model'], columns['temperature'],
+            photo_index
+        )
+        
+        conn = self.get_connection()
+        try:
+            with conn:
+                if replace:
+                    conn.execute("DELETE FROM photos WHERE project_id = ?", (project_id,))
+                
+                existing = conn.execute("SELECT COUNT(*) FROM photos").fetchone()[0]
+                rebuild_indexes = len(df) >= self.BULK_REINDEX_ROWS and len(df) >= existing
+                if rebuild_indexes:
+                    for name in self.PHOTO_INDEXES:
+                        conn.execute(f"DROP INDEX IF EXISTS {name}")
+                
+                inserted = 0
+                while True:
+                    batch = list(itertools.islice(rows, batch_size))
+                    if not batch:
+                        break
+                    conn.executemany("""
+                        INSERT INTO photos
+                        (project_id, path, site_name, camera_name, species_name,
+                         taken_at, camera_model, temperature, photo_index)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, batch)
+                    inserted += len(batch)
+                
+                if rebuild_indexes:
+                    for name, index_columns in self.PHOTO_INDEXES.items():
+                        conn.execute(f"CREATE INDEX {name} ON photos ({index_columns})")
+        finally:
+            conn.close()
+        
+        return inserted
+    
+    def get_photos(self, project_id: Optional[int] = None, site_name: Optional[str] = None,
+                   camera_name: Optional[str] = None, species_name: Optional[str] = None,
+                   start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Consulta registros por foto con filtros opcionales.
+        
+        Args:
+            project_id: ID del proyecto (None = todos los proyectos)
+            site_name: Sitio
+            camera_name: Cámara
+            species_name: Especie
+            start: Fecha-hora inicial incluida ('YYYY-MM-DD' o 'YYYY-MM-DD HH:MM:SS')
+            end: Fecha-hora final excluida
+            
+        Returns:
+            DataFrame con SITIO, CAMARA, ESPECIE, FECHA, HORA, RUTA, CAMERA_MODEL,
+            TEMPERATURE. Con project_id, el índice es el photo_index de cada foto;
+            sin él, se agregan las columnas PROJECT_ID y PHOTO_INDEX
+        """
+        conditions = []
+        params = []
+        
+        for column, value in (('project_id', project_id), ('site_name', site_name),
+                              ('camera_name', camera_name), ('species_name', species_name)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        
+        if start is not None:
+            conditions.append("taken_at >= ?")
+            params.append(int(pd.Timestamp(start).timestamp()))
+        if end is not None:
+            conditions.append("taken_at < ?")
+            params.append(int(pd.Timestamp(end).timestamp()))
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        project_column = "project_id AS PROJECT_ID, " if project_id is None else ""
+        
+        query = f"""
+            SELECT {project_column}
+                   site_name AS SITIO, camera_name AS CAMARA, species_name AS ESPECIE,
+                   strftime('%Y-%m-%d', taken_at, 'unixepoch') AS FECHA,
+                   strftime('%H:%M:%S', taken_at, 'unixepoch') AS HORA,
+                   path AS RUTA, camera_model AS CAMERA_MODEL, temperature AS TEMPERATURE,
+                   photo_index AS PHOTO_INDEX
+            FROM photos
+            {where}
+            ORDER BY project_id, site_name, camera_name, taken_at
+        """
+        
+        conn = self.get_connection()
+        try:
+            photos = pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+    
+        if project_id is not None:
+            photos = photos.set_index('PHOTO_INDEX').rename_axis(None)
+        return photos
+    
+    def update_photo_species(self, project_id: int, labels: List[Tuple[int, str]],
+                             batch_size: int = 50000) -> int:
+        """
+        Cambia la especie de fotos del proyecto en una sola transacción.
+        
+        Args:
+            project_id: ID del proyecto
+            labels: Pares (photo_index de la foto, especie)
+            batch_size: Filas por llamada a executemany
+        
+        Returns:
+            Número de fotos actualizadas
+        """
+        rows = iter([(species, project_id, int(photo_index)) for photo_index, species in labels])
+        
+        conn = self.get_connection()
+        updated = 0
+        with conn:
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    break
+                cursor = conn.executemany(
+                    "UPDATE photos SET species_name = ? WHERE project_id = ? AND photo_index = ?", batch
+                )
+                updated += cursor.rowcount
+        
+        return updated
+    
+    def count_photos(self, project_id: int) -> int:
+        """Cuenta los registros por foto guardados de un proyecto."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT COUNT(*) FROM photos WHERE project_id = ?", (project_id,))
+        count = cursor.fetchone()[0]
+        conn.close()
+        
+        return count
+    
+    def delete_photos(self, project_id: int):
+        """Elimina los registros por foto de un proyecto."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("DELETE FROM photos WHERE project_id = ?", (project_id,))
+        
+        conn.commit()
+        conn.close()
+    
+    # Métodos para agregados diarios
+    
+    def save_daily_detections(self, project_id: int, daily: pd.DataFrame,
+                              cameras: Optional[List[Tuple[str, str]]] = None) -> int:
+        """
+        Reemplaza los agregados diarios de un proyecto o de algunas de sus cámaras.
+        
+        Los eventos independientes no cruzan de una cámara a otra, así que
+        recalcular solo las cámaras tocadas por un lote (ej: etiquetas nuevas,
+        un desfase de reloj) deja la tabla igual que recalcular el proyecto,
+        incluidos los eventos que cruzan de un día a otro.
+        
+        Args:
+            project_id: ID del proyecto
+            daily: Resultado de DailyDetectionAggregator.aggregate (solo de esas cámaras)
+            cameras: Pares (sitio, cámara) a reemplazar (None = todo el proyecto)
+            
+        Returns:
+            Número de filas diarias escritas
+        """
+        rows = zip(
+            [project_id] * len(daily),
+            daily['SITIO'].astype(str), daily['CAMARA'].astype(str), daily['ESPECIE'].astype(str),
+            daily['FECHA'].astype(str), daily['FOTOS'].astype(int).tolist(), daily['EVENTOS'].astype(int).tolist()
+        )
+        
+        conn = self.get_connection()
+        with conn:
+            if cameras is None:
+                conn.execute("DELETE FROM daily_detections WHERE project_id = ?", (project_id,))
+            else:
+                conn.executemany(
+                    "DELETE FROM daily_detections WHERE project_id = ? AND site_name = ? AND camera_name = ?",
+                    [(project_id, str(site), str(camera)) for site, camera in cameras]
+                )
+            conn.executemany("""
+                INSERT INTO daily_detections
+                (project_id, site_name, camera_name, species_name, day, photos, events)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        
+        return len(daily)
+    
+    def get_daily_detections(self, project_id: Optional[int] = None, site_name: Optional[str] = None,
+                             species_name: Optional[str] = None, start: Optional[str] = None,
+                             end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Consulta agregados diarios con filtros opcionales.
+        
+        Args:
+            project_id: ID del proyecto (None = todos los proyectos)
+            site_name: Sitio
+            species_name: Especie
+            start: Fecha inicial incluida ('YYYY-MM-DD')
+            end: Fecha final incluida ('YYYY-MM-DD')
+            
+        Returns:
+            DataFrame con SITIO, CAMARA, ESPECIE, FECHA, FOTOS, EVENTOS
+            (y PROJECT_ID si se consultan todos los proyectos)
+        """
+        conditions = []
+        params = []
+        
+        for column, value in (('project_id', project_id), ('site_name', site_name),
+                              ('species_name', species_name)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if start is not None:
+            conditions.append("day >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("day <= ?")
+            params.append(end)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        project_column = "project_id AS PROJECT_ID, " if project_id is None else ""
+        
+        query = f"""
+            SELECT {project_column}
+                   site_name AS SITIO, camera_name AS CAMARA, species_name AS ESPECIE,
+                   day AS FECHA, photos AS FOTOS, events AS EVENTOS
+            FROM daily_detections
+            {where}
+            ORDER BY project_id, site_name, camera_name, species_name, day
+        """
+        
+        conn = self.get_connection()
+        return pd.read_sql_query(query, conn, params=params)
+    
+    # Métodos para caché de predicciones
+    
+    def get_cached_predictions(self, model_name: str, model_version: str, settings: str,
+                               content_hashes: List[str], chunk_size: int = 500) -> Dict[str, Dict]:
+        """
+        Busca predicciones guardadas para un modelo y sus ajustes.
+        
+        Args:
+            model_name: Nombre del modelo
+            model_version: Versión del modelo
+            settings: Ajustes que afectan la predicción (umbrales, tamaño de entrada)
+            content_hashes: Hashes de contenido de las imágenes
+            chunk_size: Hashes por consulta
+            
+        Returns:
+            Dict hash -> predicción (solo los encontrados)
+        """
+        unique = list(dict.fromkeys(content_hashes))
+        found = {}
+        
+        conn = self.get_connection()
+        try:
+            for start in range(0, len(unique), chunk_size):
+                chunk = unique[start:start + chunk_size]
+                cursor = conn.execute(f"""
+                    SELECT content_hash, result FROM predictions
+                    WHERE model_name = ? AND model_version = ? AND settings = ?
+                      AND content_hash IN ({', '.join('?' * len(chunk))})
+                """, [model_name, model_version, settings] + chunk)
+                found.update((row[0], json.loads(row[1])) for row in cursor)
+        finally:
+            conn.close()
+        
+        return found
+    
+    def save_predictions(self, model_name: str, model_version: str, settings: str,
+                         predictions: List[Tuple[str, Dict]]) -> int:
+        """
+        Guarda predicciones en el caché (reemplaza las existentes con la misma clave).
+        
+        Args:
+            model_name: Nombre del modelo
+            model_version: Versión del modelo
+            settings: Ajustes que afectan la predicción
+            predictions: Pares (hash de contenido, predicción)
+            
+        Returns:
+            Número de predicciones guardadas
+        """
+        rows = [
+            (content_hash, model_name, model_version, settings,
+             prediction['species'], prediction['confidence'], json.dumps(prediction))
+            for content_hash, prediction in predictions
+        ]
+        
+        conn = self.get_connection()
+        with conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO predictions
+                (content_hash, model_name, model_version, settings, species_name, confidence, result)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        
+        return len(rows)
+    
+    def invalidate_predictions(self, model_name: str, keep_version: Optional[str] = None) -> int:
+        """
+        Elimina predicciones de un modelo (las de otras versiones si se indica keep_version).
+        
+        Returns:
+            Número de predicciones eliminadas
+        """
+        conn = self.get_connection()
+        with conn:
+            if keep_version is None:
+                cursor = conn.execute("DELETE FROM predictions WHERE model_name = ?", (model_name,))
+            else:
+                cursor = conn.execute(
+                    "DELETE FROM predictions WHERE model_name = ? AND model_version != ?",
+                    (model_name, keep_version)
+                )
+        
+        return cursor.rowcount
+    
+    # Métodos para cola de validación
+    
+    def save_validation_queue(self, project_id: int, items: pd.DataFrame, replace: bool = True) -> int:
+        """
+        Guarda predicciones en la cola de validación del proyecto.
+        
+        Las fotos ya validadas por una persona conservan su validación aunque
+        vuelvan a llegar en items (ej: al reclasificar con otro modelo).
+        
+        Args:
+            project_id: ID del proyecto
+            items: DataFrame con path, photo_index, site_name, camera_name, taken_at,
+                event_id, priority, predicted_species, confidence, status, validated_species
+            replace: Quitar antes las fotos del proyecto que no estén validadas
+        
+        Returns:
+            Número de fotos escritas
+        """
+        columns = ['path', 'photo_index', 'site_name', 'camera_name', 'taken_at', 'event_id', 'priority',
+                   'predicted_species', 'confidence', 'status', 'validated_species']
+        values = items[columns].astype(object)
+        values = values.where(values.notna(), None)
+        rows = [
+            (project_id, *row, row[-1])
+            for row in values.itertuples(index=False, name=None)
+        ]
+        
+        conn = self.get_connection()
+        with conn:
+            if replace:
+                conn.execute(
+                    "DELETE FROM validation_queue WHERE project_id = ? AND status != 'validada'",
+                    (project_id,)
+                )
+            conn.executemany("""
+                INSERT INTO validation_queue
+                (project_id, path, photo_index, site_name, camera_name, taken_at, event_id, priority,
+                 predicted_species, confidence, status, validated_species, validated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                        CASE WHEN ? IS NULL THEN NULL ELSE CURRENT_TIMESTAMP END)
+                ON CONFLICT(project_id, path) DO UPDATE SET
+                    photo_index = excluded.photo_index,
+                    site_name = excluded.site_name,
+                    camera_name = excluded.camera_name,
+                    taken_at = excluded.taken_at,
+                    event_id = excluded.event_id,
+                    priority = excluded.priority,
+                    predicted_species = excluded.predicted_species,
+                    confidence = excluded.confidence,
+                    status = CASE WHEN status = 'validada' THEN status ELSE excluded.status END,
+                    validated_species = CASE WHEN status = 'validada'
+                        THEN validated_species ELSE excluded.validated_species END,
+                    validated_at = CASE WHEN status = 'validada'
+                        THEN validated_at ELSE excluded.validated_at END
+            """, rows)
+            self._update_validation_counts(conn, project_id)
+        
+        return len(rows)
+    
+    def get_validation_page(self, project_id: int, limit_events: int, offset_events: int = 0) -> pd.DataFrame:
+        """
+        Fotos pendientes de los siguientes eventos de la cola, en orden de prioridad.
+        
+        Los eventos se ordenan por prioridad (menor confianza primero) y, a
+        igual prioridad, los de más fotos primero: una etiqueta cubre más fotos.
+        
+        Args:
+            project_id: ID del proyecto
+            limit_events: Eventos por página
+            offset_events: Eventos pendientes a saltar
+        
+        Returns:
+            DataFrame con path, photo_index, site_name, camera_name, taken_at,
+            event_id, priority, predicted_species, confidence (una fila por foto)
+        """
+        query = """
+            WITH events AS (
+                SELECT event_id, MIN(priority) AS event_priority, COUNT(*) AS photos
+                FROM validation_queue
+                WHERE project_id = ? AND status = 'pendiente'
+                GROUP BY event_id
+                ORDER BY event_priority, photos DESC, event_id
+                LIMIT ? OFFSET ?
+            )
+            SELECT q.path, q.photo_index, q.site_name, q.camera_name, q.taken_at, q.event_id,
+                   q.priority, q.predicted_species, q.confidence
+            FROM events e
+            JOIN validation_queue q ON q.project_id = ? AND q.event_id = e.event_id
+            WHERE q.status = 'pendiente'
+            ORDER BY e.event_priority, e.photos DESC, e.event_id, q.taken_at, q.path
+        """
+        
+        conn = self.get_connection()
+        try:
+            return pd.read_sql_query(
+                query, conn, params=[project_id, limit_events, offset_events, project_id]
+            )
+        finally:
+            conn.close()
+    
+    def save_validations(self, project_id: int, validations: List[Tuple[str, str]]) -> int:
+        """
+        Registra validaciones humanas en una sola transacción.
+        
+        La especie validada se copia también a la foto del proyecto (por su
+        photo_index), en la misma transacción que la cola.
+        
+        Args:
+            project_id: ID del proyecto
+            validations: Pares (ruta de la foto, especie validada)
+        
+        Returns:
+            Número de fotos validadas
+        """
+        rows = [(species, project_id, path) for path, species in validations]
+        
+        conn = self.get_connection()
+        with conn:
+            conn.executemany("""
+                UPDATE validation_queue
+                SET status = 'validada', validated_species = ?, validated_at = CURRENT_TIMESTAMP
+                WHERE project_id = ? AND path = ?
+            """, rows)
+            conn.executemany("""
+                UPDATE photos SET species_name = ?1
+                WHERE project_id = ?2 AND photo_index = (
+                    SELECT photo_index FROM validation_queue WHERE project_id = ?2 AND path = ?3
+                )
+            """, rows)
+            self._update_validation_counts(conn, project_id)
+        
+        return len(rows)
+    
+    def get_validation_summary(self, project_id: int) -> Dict[str, int]:
+        """Fotos de la cola por estado (pendiente, validada, automatica)."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT status, COUNT(*) FROM validation_queue
+            WHERE project_id = ?
+            GROUP BY status
+        """, (project_id,))
+        
+        summary = {'pendiente': 0, 'validada': 0, 'automatica': 0}
+        summary.update((row[0], row[1]) for row in cursor.fetchall())
+        conn.close()
+        
+        return summary
+    
+    @staticmethod
+    def _update_validation_counts(conn: sqlite3.Connection, project_id: int):
+        """Copia los conteos de la cola al último registro de procesamiento del proyecto."""
+        total, validated = conn.execute("""
+            SELECT COUNT(*), COALESCE(SUM(status != 'pendiente'), 0)
+            FROM validation_queue WHERE project_id = ?
+        """, (project_id,)).fetchone()
+        
+        cursor = conn.execute("""
+            UPDATE processing_history SET ai_predictions = ?, validated_predictions = ?
+            WHERE id = (
+                SELECT id FROM processing_history WHERE project_id = ?
+                ORDER BY processed_at DESC, id DESC LIMIT 1
+            )
+        """, (total, validated, project_id))
+        
+        # Proyectos importados no tienen registro de procesamiento
+        if cursor.rowcount == 0:
+            conn.execute("""
+                INSERT INTO processing_history
+                (project_id, total_photos, ai_predictions, validated_predictions, processing_time_seconds)
+                VALUES (?, ?, ?, ?, 0)
+            """, (project_id, total, total, validated))
+    
     # Métodos para historial de procesamiento
     
     def add_processing_record(self, project_id: int, total_photos: int, 
@@ -242,6 +1097,57 @@ class DatabaseManager:
         conn.commit()
         conn.close()
     
+    def add_species_counts(self, project_id: int, counts: Mapping[str, int], replace: bool = False) -> int:
+        """
+        Suma conteos por especie al catálogo en una sola transacción.
+        
+        Args:
+            project_id: ID del proyecto
+            counts: Conteo por especie (ej: df['ESPECIE'].value_counts())
+            replace: Reemplazar el catálogo del proyecto en vez de sumar
+            
+        Returns:
+            Número de especies escritas
+        """
+        rows = [(project_id, str(name), int(count)) for name, count in counts.items() if count]
+        
+        conn = self.get_connection()
+        with conn:
+            if replace:
+                conn.execute("DELETE FROM species_catalog WHERE project_id = ?", (project_id,))
+            conn.executemany("""
+                INSERT INTO species_catalog (project_id, species_name, count, last_seen)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(project_id, species_name) DO UPDATE SET
+                    count = count + excluded.count,
+                    last_seen = CURRENT_TIMESTAMP
+            """, rows)
+        
+        return len(rows)
+    
+    def rebuild_species_catalog(self, project_id: int) -> int:
+        """
+        Recalcula el catálogo del proyecto a partir de la tabla photos.
+        
+        El conteo se hace dentro de SQLite recorriendo el índice
+        (project_id, species_name, taken_at), sin leer las filas.
+        
+        Returns:
+            Número de especies en el catálogo
+        """
+        conn = self.get_connection()
+        with conn:
+            conn.execute("DELETE FROM species_catalog WHERE project_id = ?", (project_id,))
+            cursor = conn.execute("""
+                INSERT INTO species_catalog (project_id, species_name, count, last_seen)
+                SELECT project_id, species_name, COUNT(*), CURRENT_TIMESTAMP
+                FROM photos
+                WHERE project_id = ?
+                GROUP BY species_name
+            """, (project_id,))
+        
+        return cursor.rowcount
+    
     def get_species_catalog(self, project_id: int) -> List[Dict]:
         """Obtiene catálogo de especies del proyecto."""
         conn = self.get_connection()
@@ -257,6 +1163,18 @@ class DatabaseManager:
         conn.close()
         
         return [dict(row) for row in rows]
+    
+    def get_known_species_names(self) -> List[str]:
+        """Obtiene los nombres de especies registrados en todos los proyectos."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT DISTINCT species_name FROM species_catalog ORDER BY species_name")
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [row['species_name'] for row in rows]
 
 
 # Instancia global del gestor de base de datos
@@ -0,0 +1,157 @@
+"""
+Detección de fotos duplicadas entre carpetas (misma tarjeta copiada dos veces).
+Filtra candidatos por fecha-hora EXIF y tamaño antes de leer contenido.
+"""
+
+import hashlib
+import os
+from typing import Optional
+
+import pandas as pd
+
+
+class DuplicatePhotoDetector:
+    """Detector de fotos duplicadas por etapas (fecha-hora, tamaño, hash parcial, hash completo)."""
+
+    # Bytes leídos al inicio y al final del archivo para el hash parcial
+    PARTIAL_BYTES = 64 * 1024
+    CHUNK_BYTES = 1024 * 1024
+
+    @staticmethod
+    def partial_hash(path: str, size: int) -> Optional[str]:
+        """
+        Hash de los primeros y últimos PARTIAL_BYTES del archivo.
+
+        Args:
+            path: Ruta al archivo
+            size: Tamaño del archivo en bytes
+
+        Returns:
+            Hash hexadecimal o None si no se puede leer
+        """
+        block = DuplicatePhotoDetector.PARTIAL_BYTES
+        try:
+            digest = hashlib.blake2b(digest_size=16)
+            with open(path, 'rb') as f:
+                digest.update(f.read(block))
+                if size > 2 * block:
+                    f.seek(size - block)
+                    digest.update(f.read(block))
+            return digest.hexdigest()
+        except OSError:
+            return None
+
+    @staticmethod
+    def full_hash(path: str) -> Optional[str]:
+        """Hash del contenido completo del archivo (o None si no se puede leer)."""
+        try:
+            digest = hashlib.blake2b(digest_size=20)
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(DuplicatePhotoDetector.CHUNK_BYTES), b''):
+                    digest.update(chunk)
+            return digest.hexdigest()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _file_size(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return None
+
+    @staticmethod
+    def find_duplicates(df: pd.DataFrame, path_column: str = 'RUTA') -> pd.DataFrame:
+        """
+        Encuentra grupos de fotos idénticas.
+
+        Etapas (cada una solo sobre los candidatos que sobreviven a la anterior):
+        1. Misma FECHA y HORA EXIF (sin E/S)
+        2. Mismo tamaño de archivo (un stat por candidato)
+        3. Mismo hash parcial (inicio y fin del archivo)
+        4. Mismo hash completo (confirmación)
+
+        Args:
+            df: DataFrame con columnas SITIO, CAMARA, ESPECIE, FECHA, HORA y ruta
+            path_column: Columna con la ruta completa del archivo
+
+        Returns:
+            DataFrame con CLUSTER, SITIO, CAMARA, ESPECIE, FECHA, HORA, RUTA y
+            ES_ORIGINAL (la primera foto del grupo se conserva); índice alineado con df
+        """
+        columns = ['CLUSTER', 'SITIO', 'CAMARA', 'ESPECIE', 'FECHA', 'HORA', 'RUTA', 'ES_ORIGINAL']
+        empty = pd.DataFrame(columns=columns)
+
+        if len(df) == 0 or path_column not in df.columns:
+            return empty
+
+        # 1) Fecha-hora repetida
+        keys = ['FECHA', 'HORA']
+        candidates = df[df.duplicated(keys, keep=False)]
+        if len(candidates) == 0:
+            return empty
+
+        # 2) Tamaño
+        candidates = candidates.assign(
+            _SIZE=[DuplicatePhotoDetector._file_size(p) for p in candidates[path_column]]
+        ).dropna(subset=['_SIZE'])
+        keys = keys + ['_SIZE']
+        candidates = candidates[candidates.duplicated(keys, keep=False)]
+        if len(candidates) == 0:
+            return empty
+
+        # 3) Hash parcial
+        candidates = candidates.assign(
+            _PARTIAL=[
+                DuplicatePhotoDetector.partial_hash(p, int(s))
+                for p, s in zip(candidates[path_column], candidates['_SIZE'])
+            ]
+        ).dropna(subset=['_PARTIAL'])
+        keys = keys + ['_PARTIAL']
+        candidates = candidates[candidates.duplicated(keys, keep=False)]
+        if len(candidates) == 0:
+            return empty
+
+        # 4) Hash completo para confirmar
+        candidates = candidates.assign(
+            _FULL=[DuplicatePhotoDetector.full_hash(p) for p in candidates[path_column]]
+        ).dropna(subset=['_FULL'])
+        candidates = candidates[candidates.duplicated(['_SIZE', '_FULL'], keep=False)]
+        if len(candidates) == 0:
+            return empty
+
+        result = candidates[['SITIO', 'CAMARA', 'ESPECIE', 'FECHA', 'HORA']].copy()
+        result['RUTA'] = candidates[path_column].astype(str)
+        result['CLUSTER'] = candidates.groupby(['_SIZE', '_FULL'], sort=False).ngroup() + 1
+        result['ES_ORIGINAL'] = ~candidates.duplicated(['_SIZE', '_FULL'], keep='first')
+
+        return result.sort_values(['CLUSTER', 'RUTA'], kind='stable')[columns]
+
+    @staticmethod
+    def exclude_duplicates(df: pd.DataFrame, clusters: pd.DataFrame) -> pd.DataFrame:
+        """
+        Elimina las copias, conservando una foto por grupo.
+
+        Args:
+            df: DataFrame original
+            clusters: Resultado de find_duplicates (índice alineado con df)
+
+        Returns:
+            DataFrame sin duplicados
+        """
+        if len(clusters) == 0:
+            return df
+
+        copies = clusters.index[~clusters['ES_ORIGINAL'].astype(bool)]
+        return df.drop(index=copies).reset_index(drop=True)
+
+    @staticmethod
+    def summarize(clusters: pd.DataFrame) -> dict:
+        """Resume grupos de duplicados para mostrar en la interfaz."""
+        if len(clusters) == 0:
+            return {'clusters': 0, 'duplicate_photos': 0}
+
+        return {
+            'clusters': int(clusters['CLUSTER'].nunique()),
+            'duplicate_photos': int((~clusters['ES_ORIGINAL'].astype(bool)).sum())
+        }
@@ -0,0 +1,263 @@
+"""
+Índice de búsqueda aproximada (fuzzy) para nombres de especies y cámaras.
+Usa un índice invertido de bigramas con distancia de edición real
+(Levenshtein) sobre nombres normalizados sin acentos.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normaliza un nombre para comparación: mayúsculas, sin acentos y
+    espacios simples.
+
+    Args:
+        name: Nombre a normalizar
+
+    Returns:
+        Nombre normalizado (ej: 'Coatí  ' -> 'COATI')
+    """
+    if not name:
+        return ""
+
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    # Ñ se conserva: es una letra distinta en español
+    decomposed = decomposed.replace('N\u0303', 'Ñ').replace('n\u0303', 'ñ')
+    without_accents = ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+    return re.sub(r'\s+', ' ', without_accents.upper()).strip()
+
+
+def levenshtein_distance(s1: str, s2: str, max_distance: Optional[int] = None) -> int:
+    """
+    Calcula la distancia de edición (inserción, borrado, sustitución).
+
+    Args:
+        s1: Primera cadena
+        s2: Segunda cadena
+        max_distance: Si se indica, corta el cálculo al superar este valor
+            y retorna max_distance + 1
+
+    Returns:
+        Distancia de edición
+    """
+    if s1 == s2:
+        return 0
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if max_distance is not None and len(s1) - len(s2) > max_distance:
+        return max_distance + 1
+    if not s2:
+        return len(s1)
+
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1, 1):
+        current = [i]
+        row_min = i
+        for j, c2 in enumerate(s2, 1):
+            cost = previous[j - 1] + (c1 != c2)
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current.append(cost)
+            if cost < row_min:
+                row_min = cost
+        if max_distance is not None and row_min > max_distance:
+            return max_distance + 1
+        previous = current
+
+    return previous[-1]
+
+
+class FuzzyNameIndex:
+    """
+    Índice invertido de bigramas para búsqueda por distancia de edición.
+
+    Cada edición destruye a lo más 2 bigramas distintos, así que un nombre a
+    distancia <= k de la consulta comparte al menos |bigramas| - 2k bigramas
+    con ella. Solo esos candidatos (y con diferencia de longitud <= k) se
+    verifican con Levenshtein.
+    """
+
+    NGRAM = 2
+
+    def __init__(self, names: Optional[Iterable[str]] = None):
+        """
+        Inicializa el índice.
+
+        Args:
+            names: Nombres iniciales (forma canónica a mostrar)
+        """
+        self._keys: List[str] = []
+        self._grams: List[frozenset] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        # Nombre normalizado -> forma canónica (primera agregada)
+        self._canonical: Dict[str, str] = {}
+        # El índice global se comparte entre sesiones de Streamlit (hilos)
+        self._lock = threading.Lock()
+
+        if names:
+            self.add_many(names)
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_name(name) in self._canonical
+
+    @classmethod
+    def _ngrams(cls, key: str) -> frozenset:
+        """Bigramas distintos del nombre con relleno en los extremos."""
+        padded = f"^{key}$"
+        return frozenset(padded[i:i + cls.NGRAM] for i in range(len(padded) - cls.NGRAM + 1))
+
+    def add(self, name: str) -> bool:
+        """
+        Agrega un nombre al índice.
+
+        Returns:
+            True si el nombre era nuevo
+        """
+        key = normalize_name(name)
+        if not key:
+            return False
+        grams = self._ngrams(key)
+
+        with self._lock:
+            if key in self._canonical:
+                return False
+
+            self._canonical[key] = name
+
+            name_id = len(self._keys)
+            self._keys.append(key)
+            self._grams.append(grams)
+            for gram in grams:
+                self._postings[gram].append(name_id)
+
+        return True
+
+    def add_many(self, names: Iterable[str]) -> int:
+        """Agrega varios nombres. Retorna cuántos eran nuevos."""
+        return sum(1 for name in names if self.add(name))
+
+    def search(self, query: str, max_distance: int = 2) -> List[Tuple[str, int]]:
+        """
+        Busca nombres a distancia de edición <= max_distance.
+
+        Args:
+            query: Nombre a buscar
+            max_distance: Distancia máxima permitida
+
+        Returns:
+            Lista de (nombre canónico, distancia) ordenada por distancia y nombre
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+
+        query_grams = self._ngrams(key)
+        min_shared = len(query_grams) - self.NGRAM * max_distance
+
+        with self._lock:
+            if not self._keys:
+                return []
+
+            if min_shared > 0:
+                # Contar bigramas compartidos solo en las listas de la consulta
+                shared = defaultdict(int)
+                for gram in query_grams:
+                    for name_id in self._postings.get(gram, ()):
+                        shared[name_id] += 1
+                candidates = [
+                    name_id for name_id, count in shared.items()
+                    if count >= min_shared
+                    and count >= len(self._grams[name_id]) - self.NGRAM * max_distance
+                ]
+            else:
+                # Consulta muy corta para filtrar por bigramas: revisar todos
+                candidates = range(len(self._keys))
+
+            results = []
+            for name_id in candidates:
+                candidate = self._keys[name_id]
+                if abs(len(candidate) - len(key)) > max_distance:
+                    continue
+                distance = levenshtein_distance(key, candidate, max_distance)
+                if distance <= max_distance:
+                    results.append((self._canonical[candidate], distance))
+
+        results.sort(key=lambda item: (item[1], item[0]))
+        return results
+
+    def best_match(self, query: str, max_distance: Optional[int] = None) -> Optional[str]:
+        """
+        Retorna el nombre más cercano dentro del radio permitido.
+
+        Args:
+            query: Nombre a buscar
+            max_distance: Radio; por defecto 1 para nombres cortos (<= 5
+                letras) y 2 para el resto
+
+        Returns:
+            Nombre canónico o None si no hay coincidencia
+        """
+        key = normalize_name(query)
+        if not key:
+            return None
+
+        # Coincidencia exacta (ignorando acentos y espacios): sin buscar candidatos
+        if key in self._canonical:
+            return self._canonical[key]
+
+        if max_distance is None:
+            max_distance = 1 if len(key) <= 5 else 2
+
+        matches = self.search(key, max_distance)
+        if not matches:
+            return None
+
+        # Empate entre dos candidatos distintos: no es seguro sugerir
+        if len(matches) > 1 and matches[0][1] == matches[1][1]:
+            return None
+
+        return matches[0][0]
+
+
+# Índice global de especies (catálogo común + historial de proyectos)
+_global_species_index: Optional[FuzzyNameIndex] = None
+_global_species_index_lock = threading.Lock()
+
+
+def get_species_index() -> FuzzyNameIndex:
+    """
+    Obtiene el índice global de especies.
+
+    Se construye una sola vez con las especies comunes de México y los
+    nombres ya registrados en el catálogo de especies de la base de datos.
+
+    Returns:
+        Instancia del FuzzyNameIndex
+    """
+    global _global_species_index
+    with _global_species_index_lock:
+        if _global_species_index is None:
+            from utils import get_common_species_mexico
+
+            index = FuzzyNameIndex(get_common_species_mexico())
+
+            try:
+                from database_manager import get_database
+                index.add_many(get_database().get_known_species_names())
+            except Exception:
+                # Sin base de datos disponible se usa solo el catálogo común
+                pass
+
+            _global_species_index = index
+    return _global_species_index
@@ -3,106 +3,250 @@ Extractor avanzado de metadatos EXIF y gestor de coordenadas UTM.
 """
 
 from PIL import Image
-from PIL.ExifTags import TAGS
+from PIL.ExifTags import TAGS, GPSTAGS
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List
+import numpy as np
+import pandas as pd
 import streamlit as st
 from database_manager import get_database
 from config_manager import get_config
+from utils import parse_gps_coordinate, latlon_to_utm
 
 
 class AdvancedMetadataExtractor:
     """Extractor de metadatos EXIF avanzado."""
     
     @staticmethod
-    def extract_datetime(image_path: Path) -> Tuple[Optional[str], Optional[str]]:
+    def read_exif(image_path: Path) -> Dict:
         """
-        Extrae fecha y hora de captura de EXIF.
+        Lee el EXIF de una imagen una sola vez.
+        
+        Returns:
+            Dict nombre de tag -> valor (vacío si no hay EXIF o no se puede leer)
+        """
+        try:
+            with Image.open(image_path) as image:
+                exif_data = image._getexif()
+        except Exception:
+            return {}
+        
+        if not exif_data:
+            return {}
+        return {TAGS.get(tag_id, tag_id): value for tag_id, value in exif_data.items()}
+    
+    @staticmethod
+    def parse_datetime(exif: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Fecha y hora de captura (DateTimeOriginal) de un EXIF ya leído.
         
         Returns:
             Tupla (fecha, hora) en formato (YYYY-MM-DD, HH:MM:SS)
         """
         try:
-            image = Image.open(image_path)
-            exif_data = image._getexif()
-            
-            if exif_data:
-                for tag_id, value in exif_data.items():
-                    tag = TAGS.get(tag_id, tag_id)
-                    if tag == "DateTimeOriginal":
-                        dt = datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
-                        return dt.strftime("%Y-%m-%d"), dt.strftime("%H:%M:%S")
+            value = exif.get("DateTimeOriginal")
+            if value:
+                dt = datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
+                return dt.strftime("%Y-%m-%d"), dt.strftime("%H:%M:%S")
             
             return None, None
         except Exception:
             return None, None
     
     @staticmethod
-    def extract_camera_model(image_path: Path) -> Optional[str]:
-        """Extrae modelo de cámara de EXIF."""
-        try:
-            image = Image.open(image_path)
-            exif_data = image._getexif()
-            
-            if exif_data:
-                make = None
-                model = None
+    def parse_camera_model(exif: Dict) -> Optional[str]:
+        """Modelo de cámara de un EXIF ya leído."""
+        make = exif.get("Make")
+        model = exif.get("Model")
                 
-                for tag_id, value in exif_data.items():
-                    tag = TAGS.get(tag_id, tag_id)
-                    if tag == "Make":
-                        make = value
-                    elif tag == "Model":
-                        model = value
-                
-                if make and model:
-                    return f"{make} {model}"
-                elif model:
-                    return model
+        if make and model:
+            return f"{make} {model}"
+        elif model:
+            return model
             
-            return None
-        except Exception:
-            return None
+        return None
     
     @staticmethod
-    def extract_temperature(image_path: Path) -> Optional[float]:
-        """Extrae temperatura de EXIF si está disponible."""
-        try:
-            image = Image.open(image_path)
-            exif_data = image._getexif()
+    def parse_temperature(exif: Dict) -> Optional[float]:
+        """Temperatura de un EXIF ya leído, si está disponible."""
+        # Algunos modelos de cámaras trampa guardan temperatura
+        # en tags personalizados (varía por fabricante)
+        for tag, value in exif.items():
+            if "Temperature" in str(tag) or "Temp" in str(tag):
+                try:
+                    return float(value)
+                except:
+                    pass
             
-            if exif_data:
-                # Algunos modelos de cámaras trampa guardan temperatura
-                # en tags personalizados (varía por fabricante)
-                for tag_id, value in exif_data.items():
-                    tag = TAGS.get(tag_id, tag_id)
-                    if "Temperature" in str(tag) or "Temp" in str(tag):
-                        try:
-                            return float(value)
-                        except:
-                            pass
+        return None
+    
+    @staticmethod
+    def parse_gps(exif: Dict) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Posición GPS (GPSInfo) de un EXIF ya leído.
+        
+        Returns:
+            Tupla (latitud, longitud) en grados decimales
+        """
+        try:
+            value = exif.get("GPSInfo")
+            if isinstance(value, dict):
+                gps = {GPSTAGS.get(k, k): v for k, v in value.items()}
+                        
+                lat = parse_gps_coordinate(gps.get("GPSLatitude"), gps.get("GPSLatitudeRef"))
+                lon = parse_gps_coordinate(gps.get("GPSLongitude"), gps.get("GPSLongitudeRef"))
+                        
+                # Cámaras sin señal GPS escriben 0,0
+                if lat is None or lon is None or (lat == 0 and lon == 0):
+                    return None, None
+                return lat, lon
             
-            return None
+            return None, None
         except Exception:
-            return None
+            return None, None
+    
+    @staticmethod
+    def extract_datetime(image_path: Path) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Extrae fecha y hora de captura de EXIF.
+        
+        Returns:
+            Tupla (fecha, hora) en formato (YYYY-MM-DD, HH:MM:SS)
+        """
+        return AdvancedMetadataExtractor.parse_datetime(AdvancedMetadataExtractor.read_exif(image_path))
+    
+    @staticmethod
+    def extract_camera_model(image_path: Path) -> Optional[str]:
+        """Extrae modelo de cámara de EXIF."""
+        return AdvancedMetadataExtractor.parse_camera_model(AdvancedMetadataExtractor.read_exif(image_path))
+    
+    @staticmethod
+    def extract_temperature(image_path: Path) -> Optional[float]:
+        """Extrae temperatura de EXIF si está disponible."""
+        return AdvancedMetadataExtractor.parse_temperature(AdvancedMetadataExtractor.read_exif(image_path))
+    
+    @staticmethod
+    def extract_gps(image_path: Path) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Extrae posición GPS (GPSInfo) de EXIF.
+        
+        Returns:
+            Tupla (latitud, longitud) en grados decimales
+        """
+        return AdvancedMetadataExtractor.parse_gps(AdvancedMetadataExtractor.read_exif(image_path))
     
     @staticmethod
     def extract_all_metadata(image_path: Path) -> Dict:
-        """Extrae todos los metadatos relevantes."""
-        fecha, hora = AdvancedMetadataExtractor.extract_datetime(image_path)
-        camera = AdvancedMetadataExtractor.extract_camera_model(image_path)
-        temp = AdvancedMetadataExtractor.extract_temperature(image_path)
+        """Extrae todos los metadatos relevantes (el EXIF se lee una sola vez)."""
+        exif = AdvancedMetadataExtractor.read_exif(image_path)
+        fecha, hora = AdvancedMetadataExtractor.parse_datetime(exif)
+        camera = AdvancedMetadataExtractor.parse_camera_model(exif)
+        temp = AdvancedMetadataExtractor.parse_temperature(exif)
+        lat, lon = AdvancedMetadataExtractor.parse_gps(exif)
         
         return {
             'fecha': fecha,
             'hora': hora,
             'camera_model': camera,
             'temperature': temp,
+            'latitude': lat,
+            'longitude': lon,
             'has_exif': fecha is not None
         }
 
 
+class GPSPositionAggregator:
+    """Agregador robusto de posiciones GPS por cámara."""
+    
+    # Radio terrestre medio (m) para distancias locales
+    EARTH_RADIUS_M = 6371008.8
+    
+    @staticmethod
+    def aggregate_camera_positions(gps_df: pd.DataFrame, mad_factor: float = 3.0,
+                                   min_tolerance_m: float = 25.0) -> pd.DataFrame:
+        """
+        Calcula la posición de cada cámara a partir de las lecturas GPS por foto.
+        
+        Usa la mediana de latitud/longitud, descarta lecturas cuya distancia a la
+        mediana supere mad_factor * MAD (o min_tolerance_m, lo que sea mayor) y
+        recalcula la mediana con las lecturas restantes.
+        
+        Args:
+            gps_df: DataFrame con columnas SITIO, CAMARA, LATITUD, LONGITUD
+            mad_factor: Número de desviaciones MAD para considerar outlier
+            min_tolerance_m: Tolerancia mínima en metros (ruido normal del GPS)
+            
+        Returns:
+            DataFrame con SITIO, CAMARA, LATITUD, LONGITUD, ZONA_UTM, ESTE, NORTE,
+            LECTURAS_GPS, LECTURAS_DESCARTADAS, DISPERSION_M
+        """
+        columns = ['SITIO', 'CAMARA', 'LATITUD', 'LONGITUD', 'ZONA_UTM', 'ESTE', 'NORTE',
+                   'LECTURAS_GPS', 'LECTURAS_DESCARTADAS', 'DISPERSION_M']
+        
+        if gps_df is None or len(gps_df) == 0:
+            return pd.DataFrame(columns=columns)
+        
+        gps = gps_df.dropna(subset=['LATITUD', 'LONGITUD'])
+        if len(gps) == 0:
+            return pd.DataFrame(columns=columns)
+        
+        keys = ['SITIO', 'CAMARA']
+        grouped = gps.groupby(keys)
+        
+        # Distancia de cada lectura a la mediana de su cámara (aprox. equirectangular)
+        med_lat = grouped['LATITUD'].transform('median')
+        med_lon = grouped['LONGITUD'].transform('median')
+        lat_rad = np.radians(gps['LATITUD'].to_numpy())
+        dlat = np.radians(gps['LATITUD'].to_numpy() - med_lat.to_numpy())
+        dlon = np.radians(gps['LONGITUD'].to_numpy() - med_lon.to_numpy()) * np.cos(lat_rad)
+        dist = pd.Series(
+            np.hypot(dlat, dlon) * GPSPositionAggregator.EARTH_RADIUS_M,
+            index=gps.index
+        )
+        
+        mad = dist.groupby([gps['SITIO'], gps['CAMARA']]).transform('median')
+        tolerance = np.maximum(mad_factor * 1.4826 * mad, min_tolerance_m)
+        inliers = dist <= tolerance
+        
+        kept = gps[inliers]
+        result = kept.groupby(keys).agg(
+            LATITUD=('LATITUD', 'median'),
+            LONGITUD=('LONGITUD', 'median')
+        )
+        result['LECTURAS_GPS'] = grouped.size()
+        result['LECTURAS_DESCARTADAS'] = result['LECTURAS_GPS'] - kept.groupby(keys).size()
+        result['DISPERSION_M'] = dist[inliers].groupby([kept['SITIO'], kept['CAMARA']]).median().round(1)
+        result = result.reset_index()
+        
+        utm_rows = [latlon_to_utm(lat, lon) for lat, lon in zip(result['LATITUD'], result['LONGITUD'])]
+        result['ZONA_UTM'] = [zone for zone, _, _ in utm_rows]
+        result['ESTE'] = [round(easting, 1) for _, easting, _ in utm_rows]
+        result['NORTE'] = [round(northing, 1) for _, _, northing in utm_rows]
+        
+        return result[columns]
+    
+    @staticmethod
+    def to_coordinate_rows(positions_df: pd.DataFrame, datum: str = "WGS84") -> List[Dict]:
+        """
+        Convierte posiciones agregadas a filas compatibles con camera_coordinates.
+        
+        Returns:
+            Lista de dicts con site_name, camera_name, utm_zone, easting, northing, datum
+        """
+        rows = []
+        for _, row in positions_df.iterrows():
+            rows.append({
+                'site_name': row['SITIO'],
+                'camera_name': row['CAMARA'],
+                'utm_zone': row['ZONA_UTM'],
+                'easting': float(row['ESTE']),
+                'northing': float(row['NORTE']),
+                'datum': datum
+            })
+        return rows
+
+
 class UTMCoordinateManager:
     """Gestor de coordenadas UTM para cámaras."""
     
@@ -115,6 +259,10 @@ class UTMCoordinateManager:
         "16Q", "16P"
     ]
     
+    # Rangos aceptados para México (también son los límites del formulario)
+    EASTING_RANGE = (100000.0, 900000.0)
+    NORTHING_RANGE = (900000.0, 3700000.0)
+    
     @staticmethod
     def validate_utm_zone(zone: str) -> bool:
         """Valida que la zona UTM sea válida para México."""
@@ -133,20 +281,26 @@ class UTMCoordinateManager:
             return False, f"Zona UTM '{zone}' no válida para México. Zonas válidas: {', '.join(UTMCoordinateManager.VALID_UTM_ZONES_MEXICO)}"
         
         # Validar rango de Este (Easting)
-        if not (100000 <= easting <= 900000):
+        min_easting, max_easting = UTMCoordinateManager.EASTING_RANGE
+        if not (min_easting <= easting <= max_easting):
             return False, f"Este (Easting) fuera de rango. Debe estar entre 100,000 y 900,000 m. Valor: {easting:,.0f}"
         
         # Validar rango de Norte (Northing) para México
-        if not (900000 <= northing <= 3700000):
+        min_northing, max_northing = UTMCoordinateManager.NORTHING_RANGE
+        if not (min_northing <= northing <= max_northing):
             return False, f"Norte (Northing) fuera de rango. Debe estar entre 900,000 y 3,700,000 m. Valor: {northing:,.0f}"
         
         return True, "Coordenadas válidas"
     
     @staticmethod
-    def request_camera_coordinates_ui(project_id: int, site_name: str, camera_name: str) -> Optional[Dict]:
+    def request_camera_coordinates_ui(project_id: int, site_name: str, camera_name: str,
+                                      gps_suggestion: Optional[Dict] = None) -> Optional[Dict]:
         """
         Muestra interfaz de Streamlit para ingresar coordenadas UTM.
         
+        Args:
+            gps_suggestion: Fila derivada de GPS EXIF para pre-llenar el formulario
+        
         Returns:
             Dict con coordenadas o None si se cancela
         """
@@ -171,6 +325,18 @@ class UTMCoordinateManager:
                 )
             else:
                 return existing
+        elif gps_suggestion:
+            st.info(
+                f"🛰️ Posición derivada de GPS EXIF: {gps_suggestion['utm_zone']} "
+                f"{gps_suggestion['easting']:,.0f}E {gps_suggestion['northing']:,.0f}N"
+            )
+            return UTMCoordinateManager._show_coordinate_form(
+                project_id, site_name, camera_name,
+                default_zone=gps_suggestion['utm_zone'],
+                default_easting=gps_suggestion['easting'],
+                default_northing=gps_suggestion['northing'],
+                default_datum=gps_suggestion['datum']
+            )
         else:
             st.warning("⚠️ No hay coordenadas guardadas para esta cámara")
             return UTMCoordinateManager._show_coordinate_form(project_id, site_name, camera_name)
@@ -182,6 +348,16 @@ class UTMCoordinateManager:
         """Muestra formulario de ingreso de coordenadas."""
         config = get_config()
         
+        # number_input falla si el valor inicial queda fuera de sus límites
+        min_easting, max_easting = UTMCoordinateManager.EASTING_RANGE
+        min_northing, max_northing = UTMCoordinateManager.NORTHING_RANGE
+        if default_easting > 0 and not (min_easting <= default_easting <= max_easting):
+            st.warning(f"⚠️ Este sugerido ({default_easting:,.0f}) fuera de rango para México; ingrésalo manualmente")
+            default_easting = 0
+        if default_northing > 0 and not (min_northing <= default_northing <= max_northing):
+            st.warning(f"⚠️ Norte sugerido ({default_northing:,.0f}) fuera de rango para México; ingrésalo manualmente")
+            default_northing = 0
+        
         col1, col2 = st.columns(2)
         
         with col1:
@@ -195,8 +371,8 @@ class UTMCoordinateManager:
             
             easting = st.number_input(
                 "Este (Easting) en metros",
-                min_value=100000.0,
-                max_value=900000.0,
+                min_value=min_easting,
+                max_value=max_easting,
                 value=float(default_easting) if default_easting > 0 else 500000.0,
                 step=1.0,
                 key=f"east_{site_name}_{camera_name}",
@@ -206,8 +382,8 @@ class UTMCoordinateManager:
         with col2:
             northing = st.number_input(
                 "Norte (Northing) en metros",
-                min_value=900000.0,
-                max_value=3700000.0,
+                min_value=min_northing,
+                max_value=max_northing,
                 value=float(default_northing) if default_northing > 0 else 2000000.0,
                 step=1.0,
                 key=f"north_{site_name}_{camera_name}",
@@ -248,6 +424,43 @@ class UTMCoordinateManager:
         
         return None
     
+    @staticmethod
+    def save_gps_derived_coordinates(project_id: int, coordinate_rows: List[Dict],
+                                     overwrite: bool = False) -> Tuple[int, List[Dict]]:
+        """
+        Guarda coordenadas derivadas de GPS EXIF.
+        
+        Args:
+            project_id: ID del proyecto
+            coordinate_rows: Filas generadas por GPSPositionAggregator.to_coordinate_rows
+            overwrite: Si reemplazar coordenadas ya capturadas manualmente
+            
+        Returns:
+            Tupla (cámaras guardadas, filas rechazadas con su motivo en 'message')
+        """
+        db = get_database()
+        saved = 0
+        rejected = []
+        
+        for row in coordinate_rows:
+            if not overwrite and db.get_camera_coordinates(project_id, row['site_name'], row['camera_name']):
+                continue
+            
+            valid, message = UTMCoordinateManager.validate_utm_coordinates(
+                row['utm_zone'], row['easting'], row['northing']
+            )
+            if not valid:
+                rejected.append({**row, 'message': message})
+                continue
+            
+            db.save_camera_coordinates(
+                project_id, row['site_name'], row['camera_name'],
+                row['utm_zone'], row['easting'], row['northing'], row['datum']
+            )
+            saved += 1
+        
+        return saved, rejected
+    
     @staticmethod
     def get_all_coordinates_for_export(project_id: int) -> list:
         """Obtiene todas las coordenadas formateadas para exportación."""
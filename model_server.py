@@ -0,0 +1,383 @@
+"""
+Servidor local del modelo de IA compartido por todas las sesiones de la app.
+
+El servidor es un proceso aparte que carga el detector una sola vez, lo
+calienta y atiende peticiones por un socket local (multiprocessing.connection,
+funciona igual en Windows y Linux). Las peticiones de varias sesiones se
+juntan en micro-lotes: se espera como máximo max_wait_ms a completar un lote.
+
+Uso manual:
+    python model_server.py            (usa config.json del directorio actual)
+"""
+
+import queue
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config_manager import get_config
+from logger import get_logger
+
+logger = get_logger()
+
+
+AUTHKEY_PATH = Path("database/model_server.key")
+STDERR_PATH = Path("logs/model_server_stderr.log")
+STARTUP_TIMEOUT_SECONDS = 180
+
+
+def _authkey() -> bytes:
+    """Clave compartida entre la app y el servidor (se crea la primera vez)."""
+    if not AUTHKEY_PATH.exists():
+        AUTHKEY_PATH.parent.mkdir(parents=True, exist_ok=True)
+        AUTHKEY_PATH.write_bytes(secrets.token_bytes(32))
+    return AUTHKEY_PATH.read_bytes()
+
+
+def _server_address() -> Tuple[str, int]:
+    return ('127.0.0.1', get_config().get("ai.server_port", 47621))
+
+
+def detector_settings() -> Dict:
+    """Ajustes de config.json con los que se construye el detector del servidor."""
+    config = get_config()
+    return {
+        'backend': config.get_inference_backend(),
+        'model_path': config.get_model_path(),
+        'batch_size': config.get_ai_batch_size(),
+        'input_size': config.get("ai.input_size", 640),
+        'decode_workers': config.get("ai.decode_workers", 4),
+        'detection_threshold': config.get("ai.detection_threshold", 0.20),
+        'confidence_threshold': config.get_confidence_threshold(),
+        'quantize_int8': config.get("ai.quantize_int8", False),
+        'cpu_threads': config.get("ai.cpu_threads", 0),
+    }
+
+
+class MicroBatcher:
+    """
+    Junta peticiones concurrentes en lotes para un solo detector.
+
+    El primer pedido de un lote espera como máximo max_wait_seconds a que
+    lleguen otros; el lote se despacha antes si alcanza max_batch imágenes.
+    """
+
+    def __init__(self, detector, max_batch: int, max_wait_seconds: float):
+        self.detector = detector
+        self.max_batch = max_batch
+        self.max_wait_seconds = max_wait_seconds
+        self.requests: "queue.Queue[Optional[Tuple[List[str], Future]]]" = queue.Queue()
+        self.last_request = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image_paths: List[str]) -> Future:
+        """Encola imágenes; el Future entrega sus predicciones en el mismo orden."""
+        future = Future()
+        self.last_request = time.monotonic()
+        self.requests.put((image_paths, future))
+        return future
+
+    def stop(self):
+        self.requests.put(None)
+        self._thread.join()
+
+    def _collect(self, first: Tuple[List[str], Future]) -> Tuple[List[Tuple[List[str], Future]], bool]:
+        """Junta pedidos hasta llenar el lote o agotar la espera."""
+        items = [first]
+        total = len(first[0])
+        deadline = time.monotonic() + self.max_wait_seconds
+
+        while total < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return items, True
+            items.append(item)
+            total += len(item[0])
+
+        return items, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self.requests.get()
+            if first is None:
+                break
+            items, stopping = self._collect(first)
+
+            paths = [path for item_paths, _ in items for path in item_paths]
+            try:
+                predictions = list(self.detector.iter_classify(paths))
+            except Exception as e:
+                logger.error(f"Error en el servidor de modelo: {e}")
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for item_paths, future in items:
+                future.set_result(predictions[offset:offset + len(item_paths)])
+                offset += len(item_paths)
+
+
+class ModelServer:
+    """Proceso servidor: un detector, un micro-lote, muchas conexiones."""
+
+    def __init__(self, detector, settings: Dict, max_wait_ms: int = 50, idle_minutes: float = 30):
+        """
+        Args:
+            detector: Detector ya cargado (ver ai_classifier.create_detector)
+            settings: Ajustes con los que se creó el detector (ver detector_settings)
+            max_wait_ms: Espera máxima para completar un micro-lote
+            idle_minutes: Minutos sin peticiones tras los que el servidor se cierra
+        """
+        self.detector = detector
+        self.settings = settings
+        # El hash del modelo se calcula una vez, no en cada conexión
+        self.identity = detector.model_identity()
+        self.batcher = MicroBatcher(detector, detector.batch_size, max_wait_ms / 1000)
+        self.idle_seconds = idle_minutes * 60
+        self._stop = threading.Event()
+
+    def warm_up(self):
+        """Primera inferencia (asignación de memoria, compilación de kernels) antes de atender."""
+        start = time.perf_counter()
+        size = self.detector.input_size
+        self.detector._forward(np.zeros((self.detector.batch_size, size, size, 3), dtype=np.uint8))
+        logger.info(f"Servidor de modelo listo (calentamiento {time.perf_counter() - start:.1f}s)")
+
+    def _handle(self, conn: Connection):
+        """Atiende una conexión (una sesión de la app) hasta que se cierre."""
+        with conn:
+            while not self._stop.is_set():
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                command = message[0]
+                if command == 'identity':
+                    conn.send(('ok', {
+                        'identity': self.identity,
+                        'settings': self.settings,
+                        'model_path': str(self.detector.model_path),
+                        'batch_size': self.detector.batch_size,
+                        'decode_workers': self.detector.decode_workers,
+                        'input_size': self.detector.input_size,
+                    }))
+                elif command == 'classify':
+                    try:
+                        conn.send(('ok', self.batcher.submit(message[1]).result()))
+                    except Exception as e:
+                        conn.send(('error', str(e)))
+                elif command == 'stats':
+                    conn.send(('ok', self.detector.last_stats))
+                elif command == 'shutdown':
+                    conn.send(('ok', None))
+                    self._stop.set()
+                    return
+                else:
+                    conn.send(('error', f"Comando desconocido: {command}"))
+
+    def serve(self, address: Tuple[str, int], authkey: bytes):
+        """Acepta conexiones hasta recibir 'shutdown' o pasar idle_minutes sin peticiones."""
+        self.warm_up()
+        with Listener(address, authkey=authkey) as listener:
+            # accept() bloquea: un hilo aparte revisa la inactividad y el cierre
+            threading.Thread(target=self._watch, args=(address, authkey), daemon=True).start()
+            while not self._stop.is_set():
+                try:
+                    conn = listener.accept()
+                except (OSError, AuthenticationError):
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+        self.batcher.stop()
+        logger.info("Servidor de modelo detenido")
+
+    def _watch(self, address: Tuple[str, int], authkey: bytes):
+        while not self._stop.wait(30):
+            if time.monotonic() - self.batcher.last_request > self.idle_seconds:
+                logger.info("Servidor de modelo inactivo: cerrando")
+                self._stop.set()
+        # Despertar a accept() para que el bucle principal termine
+        try:
+            Client(address, authkey=authkey).close()
+        except OSError:
+            pass
+
+
+class ModelServerClient:
+    """
+    Conexión de una sesión con el servidor de modelo.
+
+    Expone la misma interfaz que los detectores locales (iter_classify,
+    classify_image, batch_classify, model_identity), así que funciona
+    detrás de PredictionCache y de AIClassifierStub.
+    """
+
+    def __init__(self, address: Tuple[str, int], authkey: bytes):
+        self._conn = Client(address, authkey=authkey)
+        self._lock = threading.Lock()
+        info = self._request('identity')
+        self._identity = tuple(info['identity'])
+        self.settings = info['settings']
+        self.model_path = Path(info['model_path'])
+        self.batch_size = info['batch_size']
+        self.decode_workers = info['decode_workers']
+        self.input_size = info['input_size']
+
+    def _request(self, *message):
+        with self._lock:
+            self._conn.send(message)
+            status, payload = self._conn.recv()
+        if status != 'ok':
+            raise RuntimeError(f"Servidor de modelo: {payload}")
+        return payload
+
+    def model_identity(self) -> Tuple[str, str, str]:
+        return self._identity
+
+    @property
+    def last_stats(self) -> Dict[str, float]:
+        return self._request('stats')
+
+    def iter_classify(self, image_paths: Iterable[Path]) -> Iterator[Dict]:
+        """Envía las imágenes en pedidos de batch_size y entrega las predicciones en orden."""
+        paths = [str(p) for p in image_paths]
+        for start in range(0, len(paths), self.batch_size):
+            yield from self._request('classify', paths[start:start + self.batch_size])
+
+    def classify_image(self, image_path: Path) -> Dict:
+        """Clasifica una imagen."""
+        return self._request('classify', [str(image_path)])[0]
+
+    def batch_classify(self, image_paths: List[Path], progress_callback=None) -> List[Dict]:
+        """Clasifica múltiples imágenes en el servidor."""
+        results = []
+
+        for prediction in self.iter_classify(image_paths):
+            results.append(prediction)
+
+            if progress_callback:
+                progress_callback(len(results), len(image_paths))
+
+        return results
+
+    def shutdown(self):
+        """Detiene el servidor (afecta a todas las sesiones)."""
+        self._request('shutdown')
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+
+def _connect(address: Tuple[str, int], authkey: bytes) -> ModelServerClient:
+    """Conecta con el servidor; una clave distinta se reporta como ConnectionError."""
+    try:
+        return ModelServerClient(address, authkey)
+    except AuthenticationError as e:
+        raise ConnectionError(
+            f"El servidor de modelo en {address[0]}:{address[1]} rechazó la clave "
+            f"({AUTHKEY_PATH}); detenlo para que se reinicie con la actual: {e}"
+        ) from e
+
+
+def _stderr_tail(max_chars: int = 2000) -> str:
+    try:
+        return STDERR_PATH.read_text(errors='replace')[-max_chars:].strip()
+    except OSError:
+        return ""
+
+
+def connect_model_server(start: bool = True) -> ModelServerClient:
+    """
+    Conecta con el servidor de modelo, iniciándolo si no está corriendo.
+
+    Si el servidor activo usa otro modelo u otros ajustes que los de
+    config.json, se reinicia.
+
+    Args:
+        start: Iniciar el servidor si no responde
+
+    Returns:
+        Cliente conectado
+
+    Raises:
+        RuntimeError: Si el servidor termina al iniciar (ej: falta el modelo)
+        ConnectionError: Si el servidor activo no acepta la clave
+        TimeoutError: Si el servidor no responde a tiempo
+    """
+    address = _server_address()
+    authkey = _authkey()
+
+    try:
+        client = _connect(address, authkey)
+        if client.settings == detector_settings():
+            return client
+        logger.info("El servidor de modelo usa otra configuración: reiniciando")
+        client.shutdown()
+        time.sleep(0.5)
+    except ConnectionRefusedError:
+        if not start:
+            raise
+
+    logger.info("Iniciando servidor de modelo")
+    STDERR_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(STDERR_PATH, 'wb') as stderr:
+        process = subprocess.Popen([sys.executable, str(Path(__file__).resolve())], stderr=stderr)
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while True:
+        try:
+            return _connect(address, authkey)
+        except ConnectionRefusedError:
+            # Si el proceso ya terminó (modelo faltante, puerto ocupado...) no tiene caso esperar
+            if process.poll() is not None:
+                raise RuntimeError(
+                    f"El servidor de modelo terminó al iniciar (código {process.returncode}): "
+                    f"{_stderr_tail() or 'sin mensaje'}"
+                )
+            if time.monotonic() > deadline:
+                process.kill()
+                raise TimeoutError("El servidor de modelo no respondió a tiempo")
+            time.sleep(0.5)
+
+
+def main():
+    from ai_classifier import create_detector
+
+    config = get_config()
+    settings = detector_settings()
+    if not settings['model_path']:
+        sys.exit("No hay modelo configurado (ai.model_path)")
+
+    options = dict(settings)
+    detector = create_detector(options.pop('backend'), options.pop('model_path'), **options)
+    server = ModelServer(
+        detector,
+        settings,
+        max_wait_ms=config.get("ai.server_max_wait_ms", 50),
+        idle_minutes=config.get("ai.server_idle_minutes", 30)
+    )
+    server.serve(_server_address(), _authkey())
+
+
+if __name__ == "__main__":
+    main()
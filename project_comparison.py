@@ -0,0 +1,221 @@
+"""
+Consultas agregadas entre proyectos (temporadas, regiones) sobre la base de datos.
+Todo se calcula en SQLite sobre daily_detections y photos; solo los
+resultados agregados llegan a pandas.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from analysis_engine import DailyDetectionAggregator
+from database_manager import DatabaseManager, get_database
+
+
+class ProjectComparison:
+    """Comparación de proyectos con filtros aplicados en SQL."""
+
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        """
+        Args:
+            db: Gestor de base de datos (por defecto la instancia global)
+        """
+        self.db = db or get_database()
+
+    @staticmethod
+    def _date_range(start: Optional[str], end: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Normaliza el rango de fechas a 'YYYY-MM-DD'.
+
+        day se compara como texto en SQLite: '2024-1-5' o '2024-01-05 10:00'
+        darían resultados distintos sin normalizar.
+
+        Raises:
+            ValueError: Si una fecha no se puede interpretar o start > end
+        """
+        days = []
+        for value in (start, end):
+            if value is None:
+                days.append(None)
+                continue
+            try:
+                timestamp = pd.Timestamp(value)
+            except (ValueError, TypeError):
+                timestamp = pd.NaT
+            if pd.isna(timestamp):
+                raise ValueError(f"Fecha no válida: {value!r} (se espera YYYY-MM-DD)")
+            days.append(timestamp.strftime('%Y-%m-%d'))
+
+        if days[0] is not None and days[1] is not None and days[0] > days[1]:
+            raise ValueError(f"La fecha inicial {days[0]} es posterior a la final {days[1]}")
+        return days[0], days[1]
+
+    @staticmethod
+    def _filters(project_ids: Optional[Sequence[int]], species: Optional[Sequence[str]],
+                 start: Optional[str], end: Optional[str], day_column: str,
+                 exclude_categories: bool = False, alias: str = "") -> Tuple[str, List]:
+        """Construye la cláusula WHERE y sus parámetros."""
+        prefix = f"{alias}." if alias else ""
+        conditions = []
+        params: List = []
+
+        if project_ids:
+            conditions.append(f"{prefix}project_id IN ({', '.join('?' * len(project_ids))})")
+            params.extend(project_ids)
+        if species:
+            conditions.append(f"{prefix}species_name IN ({', '.join('?' * len(species))})")
+            params.extend(species)
+        if exclude_categories:
+            categories = sorted(DailyDetectionAggregator.NON_SPECIES)
+            conditions.append(f"{prefix}species_name NOT IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        if start is not None:
+            conditions.append(f"{day_column} >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append(f"{day_column} <= ?")
+            params.append(end)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+
+    def _query(self, query: str, params: List) -> pd.DataFrame:
+        return pd.read_sql_query(query, self.db.get_connection(), params=params)
+
+    def species_totals(self, project_ids: Optional[Sequence[int]] = None,
+                       species: Optional[Sequence[str]] = None,
+                       start: Optional[str] = None, end: Optional[str] = None,
+                       exclude_categories: bool = True) -> pd.DataFrame:
+        """
+        Fotos, eventos independientes y cámaras con detección por proyecto y especie.
+
+        Args:
+            project_ids: Proyectos a comparar (None = todos)
+            species: Especies a incluir (None = todas)
+            start: Fecha inicial incluida ('YYYY-MM-DD')
+            end: Fecha final incluida ('YYYY-MM-DD')
+            exclude_categories: Omitir VACIO, HUMANO y CLASIFICACION_PENDIENTE
+
+        Returns:
+            DataFrame con PROYECTO, ESPECIE, FOTOS, EVENTOS, CAMARAS_DETECTADO
+        """
+        start, end = self._date_range(start, end)
+        where, params = self._filters(project_ids, species, start, end, "d.day", exclude_categories, "d")
+        return self._query(f"""
+            SELECT p.name AS PROYECTO, d.species_name AS ESPECIE,
+                   SUM(d.photos) AS FOTOS, SUM(d.events) AS EVENTOS,
+                   COUNT(DISTINCT d.site_name || '/' || d.camera_name) AS CAMARAS_DETECTADO
+            FROM daily_detections d
+            JOIN projects p ON p.id = d.project_id
+            {where}
+            GROUP BY d.project_id, d.species_name
+            ORDER BY p.name, EVENTOS DESC
+        """, params)
+
+    def trap_days(self, project_ids: Optional[Sequence[int]] = None,
+                  start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Esfuerzo de muestreo por proyecto.
+
+        Cada cámara aporta de su primera a su última captura (mismo criterio
+        que TrapEffortCalculator), dentro del rango de fechas indicado.
+
+        Returns:
+            DataFrame con PROYECTO, CAMARAS, TRAMPAS_DIA, PRIMERA_CAPTURA, ULTIMA_CAPTURA
+        """
+        start, end = self._date_range(start, end)
+        where, params = self._filters(project_ids, None, start, end, "day")
+        return self._query(f"""
+            WITH cameras AS (
+                SELECT project_id, MIN(day) AS first_day, MAX(day) AS last_day,
+                       CAST(julianday(MAX(day)) - julianday(MIN(day)) AS INTEGER) + 1 AS trap_days
+                FROM daily_detections
+                {where}
+                GROUP BY project_id, site_name, camera_name
+            )
+            SELECT p.name AS PROYECTO, COUNT(*) AS CAMARAS, SUM(c.trap_days) AS TRAMPAS_DIA,
+                   MIN(c.first_day) AS PRIMERA_CAPTURA, MAX(c.last_day) AS ULTIMA_CAPTURA
+            FROM cameras c
+            JOIN projects p ON p.id = c.project_id
+            GROUP BY c.project_id
+            ORDER BY p.name
+        """, params)
+
+    def rai_by_project(self, project_ids: Optional[Sequence[int]] = None,
+                       species: Optional[Sequence[str]] = None,
+                       start: Optional[str] = None, end: Optional[str] = None,
+                       exclude_categories: bool = True) -> pd.DataFrame:
+        """
+        RAI por proyecto y especie: eventos independientes / trampas-día * 100.
+
+        Returns:
+            DataFrame con PROYECTO, ESPECIE, EVENTOS, TRAMPAS_DIA, RAI
+        """
+        start, end = self._date_range(start, end)
+        effort_where, effort_params = self._filters(project_ids, None, start, end, "day")
+        events_where, events_params = self._filters(
+            project_ids, species, start, end, "day", exclude_categories
+        )
+        return self._query(f"""
+            WITH cameras AS (
+                SELECT project_id,
+                       CAST(julianday(MAX(day)) - julianday(MIN(day)) AS INTEGER) + 1 AS trap_days
+                FROM daily_detections
+                {effort_where}
+                GROUP BY project_id, site_name, camera_name
+            ),
+            effort AS (
+                SELECT project_id, SUM(trap_days) AS trap_days FROM cameras GROUP BY project_id
+            ),
+            events AS (
+                SELECT project_id, species_name, SUM(events) AS events
+                FROM daily_detections
+                {events_where}
+                GROUP BY project_id, species_name
+            )
+            SELECT p.name AS PROYECTO, e.species_name AS ESPECIE, e.events AS EVENTOS,
+                   f.trap_days AS TRAMPAS_DIA,
+                   ROUND(e.events * 100.0 / f.trap_days, 2) AS RAI
+            FROM events e
+            JOIN effort f ON f.project_id = e.project_id
+            JOIN projects p ON p.id = e.project_id
+            ORDER BY e.species_name, p.name
+        """, effort_params + events_params)
+
+    def first_last_detection(self, project_ids: Optional[Sequence[int]] = None,
+                             species: Optional[Sequence[str]] = None,
+                             start: Optional[str] = None, end: Optional[str] = None,
+                             exclude_categories: bool = True) -> pd.DataFrame:
+        """
+        Primera y última detección (fecha-hora) por proyecto y especie.
+
+        Se resuelve con el índice (project_id, species_name, taken_at) de photos.
+
+        Returns:
+            DataFrame con PROYECTO, ESPECIE, PRIMERA_DETECCION, ULTIMA_DETECCION
+        """
+        start, end = self._date_range(start, end)
+        start_epoch = int(pd.Timestamp(start).timestamp()) if start is not None else None
+        # end es un día incluido: hasta el final de ese día
+        end_epoch = int((pd.Timestamp(end) + pd.Timedelta(days=1)).timestamp()) - 1 if end is not None else None
+        where, params = self._filters(
+            project_ids, species, start_epoch, end_epoch, "ph.taken_at", exclude_categories, "ph"
+        )
+        return self._query(f"""
+            SELECT p.name AS PROYECTO, ph.species_name AS ESPECIE,
+                   datetime(MIN(ph.taken_at), 'unixepoch') AS PRIMERA_DETECCION,
+                   datetime(MAX(ph.taken_at), 'unixepoch') AS ULTIMA_DETECCION
+            FROM photos ph
+            JOIN projects p ON p.id = ph.project_id
+            {where}
+            GROUP BY ph.project_id, ph.species_name
+            ORDER BY ph.species_name, p.name
+        """, params)
+
+    def available_species(self, project_ids: Optional[Sequence[int]] = None) -> List[str]:
+        """Especies presentes en los agregados diarios de los proyectos indicados."""
+        where, params = self._filters(project_ids, None, None, None, "day")
+        rows = self.db.get_connection().execute(f"""
+            SELECT DISTINCT species_name FROM daily_detections {where} ORDER BY species_name
+        """, params).fetchall()
+        return [row[0] for row in rows]
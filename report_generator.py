@@ -3,21 +3,42 @@ Generador de reportes y exportación dual de Excel.
 Genera Excel básico (FORXIME/2) y completo (con trazabilidad IA).
 """
 
+import hashlib
+import io
+import os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils.dataframe import dataframe_to_rows
+from typing import TYPE_CHECKING, BinaryIO, Dict, List, Optional, Tuple, Union
+from logger import get_logger
+
+# openpyxl se importa al generar el primer Excel, no al iniciar la app
+if TYPE_CHECKING:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+logger = get_logger()
 
 
 class ExcelExporter:
     """Exportador de datos a Excel con formato dual."""
     
+    # Filas usadas para estimar anchos de columna en hojas grandes
+    WIDTH_SAMPLE_ROWS = 200000
+    MAX_COLUMN_WIDTH = 50
+    
+    # Límite de Excel: 1,048,576 filas por hoja, incluyendo el encabezado
+    MAX_ROWS_PER_SHEET = 1048575
+    
+    # Columnas del formato FORXIME/2
+    BASIC_COLUMNS = ['SITIO', 'CAMARA', 'ESPECIE', 'FECHA', 'HORA']
+    
     @staticmethod
-    def export_basic_excel(df: pd.DataFrame, output_path: Path, 
-                          coordinates_df: Optional[pd.DataFrame] = None) -> Path:
+    def export_basic_excel(df: pd.DataFrame, output_path: Union[Path, BinaryIO], 
+                          coordinates_df: Optional[pd.DataFrame] = None) -> Union[Path, BinaryIO]:
         """
         Exporta Excel básico compatible con FORXIME/2.
         
@@ -25,48 +46,42 @@ class ExcelExporter:
         
         Args:
             df: DataFrame con datos validados
-            output_path: Ruta de salida
+            output_path: Ruta de salida o buffer binario
             coordinates_df: DataFrame opcional con coordenadas
             
         Returns:
             Path al archivo generado
         """
-        # Seleccionar solo columnas obligatorias para FORXIME/2
-        basic_columns = ['SITIO', 'CAMARA', 'ESPECIE', 'FECHA', 'HORA']
+        df_basic = ExcelExporter._basic_dataframe(df)
         
-        # Asegurar que existan todas las columnas
-        for col in basic_columns:
-            if col not in df.columns:
-                raise ValueError(f"Columna requerida '{col}' no encontrada en DataFrame")
+        return ExcelExporter._write_basic_workbook(df_basic, output_path, coordinates_df)
+    
+    @staticmethod
+    def _write_basic_workbook(df_basic: pd.DataFrame, output_path: Union[Path, BinaryIO],
+                              coordinates_df: Optional[pd.DataFrame] = None) -> Union[Path, BinaryIO]:
+        """Escribe el Excel básico a partir de columnas FORXIME/2 ya limpias."""
+        # Libro en modo solo escritura: las filas se vuelcan a disco al agregarse
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
         
-        df_basic = df[basic_columns].copy()
+        # Hoja principal de datos
+        ExcelExporter._write_sheet(wb, 'Datos', df_basic)
         
-        # Limpiar datos
-        df_basic = ExcelExporter._clean_dataframe(df_basic)
+        # Hoja de coordenadas si está disponible
+        if coordinates_df is not None and len(coordinates_df) > 0:
+            ExcelExporter._write_sheet(wb, 'Coordenadas', coordinates_df)
         
-        # Crear archivo Excel
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            # Hoja principal de datos
-            df_basic.to_excel(writer, sheet_name='Datos', index=False)
-            
-            # Hoja de coordenadas si está disponible
-            if coordinates_df is not None and len(coordinates_df) > 0:
-                coordinates_df.to_excel(writer, sheet_name='Coordenadas', index=False)
-            
-            # Formatear hojas
-            ExcelExporter._format_worksheet(writer.sheets['Datos'], df_basic)
-            if 'Coordenadas' in writer.sheets:
-                ExcelExporter._format_worksheet(writer.sheets['Coordenadas'], coordinates_df)
+        wb.save(output_path)
         
         return output_path
     
     @staticmethod
-    def export_complete_excel(df: pd.DataFrame, output_path: Path,
+    def export_complete_excel(df: pd.DataFrame, output_path: Union[Path, BinaryIO],
                              effort_df: Optional[pd.DataFrame] = None,
                              events_df: Optional[pd.DataFrame] = None,
                              temporal_df: Optional[pd.DataFrame] = None,
                              coordinates_df: Optional[pd.DataFrame] = None,
-                             summary: Optional[Dict] = None) -> Path:
+                             summary: Optional[Dict] = None) -> Union[Path, BinaryIO]:
         """
         Exporta Excel completo con todas las columnas y análisis.
         
@@ -75,7 +90,7 @@ class ExcelExporter:
         
         Args:
             df: DataFrame con datos completos (incluye predicciones IA si existen)
-            output_path: Ruta de salida
+            output_path: Ruta de salida o buffer binario
             effort_df: DataFrame de esfuerzo de muestreo
             events_df: DataFrame de eventos independientes
             temporal_df: DataFrame de análisis temporal
@@ -88,37 +103,76 @@ class ExcelExporter:
         # Limpiar datos
         df_clean = ExcelExporter._clean_dataframe(df)
         
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            # Hoja 1: Datos completos
-            df_clean.to_excel(writer, sheet_name='Datos', index=False)
-            ExcelExporter._format_worksheet(writer.sheets['Datos'], df_clean)
-            
-            # Hoja 2: Coordenadas
-            if coordinates_df is not None and len(coordinates_df) > 0:
-                coordinates_df.to_excel(writer, sheet_name='Coordenadas', index=False)
-                ExcelExporter._format_worksheet(writer.sheets['Coordenadas'], coordinates_df)
-            
-            # Hoja 3: Esfuerzo de muestreo
-            if effort_df is not None and len(effort_df) > 0:
-                effort_df.to_excel(writer, sheet_name='Esfuerzo', index=False)
-                ExcelExporter._format_worksheet(writer.sheets['Esfuerzo'], effort_df)
-            
-            # Hoja 4: Eventos independientes
-            if events_df is not None and len(events_df) > 0:
-                events_df.to_excel(writer, sheet_name='Eventos_Independientes', index=False)
-                ExcelExporter._format_worksheet(writer.sheets['Eventos_Independientes'], events_df)
-            
-            # Hoja 5: Análisis temporal
-            if temporal_df is not None and len(temporal_df) > 0:
-                temporal_df.to_excel(writer, sheet_name='Analisis_Temporal', index=False)
-                ExcelExporter._format_worksheet(writer.sheets['Analisis_Temporal'], temporal_df)
-            
-            # Hoja 6: Resumen ejecutivo
-            if summary:
-                ExcelExporter._create_summary_sheet(writer, summary)
+        return ExcelExporter._write_complete_workbook(
+            df_clean, output_path, effort_df, events_df,
+            temporal_df, coordinates_df, summary
+        )
+    
+    @staticmethod
+    def _write_complete_workbook(df_clean: pd.DataFrame, output_path: Union[Path, BinaryIO],
+                                 effort_df: Optional[pd.DataFrame] = None,
+                                 events_df: Optional[pd.DataFrame] = None,
+                                 temporal_df: Optional[pd.DataFrame] = None,
+                                 coordinates_df: Optional[pd.DataFrame] = None,
+                                 summary: Optional[Dict] = None) -> Union[Path, BinaryIO]:
+        """Escribe el Excel completo a partir de datos ya limpios."""
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        
+        # Hoja 1: Datos completos
+        ExcelExporter._write_sheet(wb, 'Datos', df_clean)
+        
+        # Hoja 2: Coordenadas
+        if coordinates_df is not None and len(coordinates_df) > 0:
+            ExcelExporter._write_sheet(wb, 'Coordenadas', coordinates_df)
+        
+        # Hoja 3: Esfuerzo de muestreo
+        if effort_df is not None and len(effort_df) > 0:
+            ExcelExporter._write_sheet(wb, 'Esfuerzo', effort_df)
+        
+        # Hoja 4: Eventos independientes
+        if events_df is not None and len(events_df) > 0:
+            ExcelExporter._write_sheet(wb, 'Eventos_Independientes', events_df)
+        
+        # Hoja 5: Análisis temporal
+        if temporal_df is not None and len(temporal_df) > 0:
+            ExcelExporter._write_sheet(wb, 'Analisis_Temporal', temporal_df)
+        
+        # Hoja 6: Resumen ejecutivo
+        if summary:
+            ExcelExporter._create_summary_sheet(wb, summary)
+        
+        wb.save(output_path)
         
         return output_path
     
+    @staticmethod
+    def _basic_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+        """Selecciona y limpia las columnas obligatorias para FORXIME/2."""
+        # Asegurar que existan todas las columnas
+        for col in ExcelExporter.BASIC_COLUMNS:
+            if col not in df.columns:
+                raise ValueError(f"Columna requerida '{col}' no encontrada en DataFrame")
+        
+        df_basic = df[ExcelExporter.BASIC_COLUMNS].copy()
+        
+        # Limpiar datos
+        return ExcelExporter._clean_dataframe(df_basic)
+    
+    @staticmethod
+    def _select_basic_columns(df_clean: pd.DataFrame) -> pd.DataFrame:
+        """
+        Toma las columnas FORXIME/2 de un DataFrame ya limpio.
+        
+        La limpieza es columna a columna, así que el resultado es igual a
+        limpiar solo esas columnas.
+        """
+        for col in ExcelExporter.BASIC_COLUMNS:
+            if col not in df_clean.columns:
+                raise ValueError(f"Columna requerida '{col}' no encontrada en DataFrame")
+        
+        return df_clean[ExcelExporter.BASIC_COLUMNS]
+    
     @staticmethod
     def _clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
         """Limpia DataFrame para exportación."""
@@ -134,51 +188,97 @@ class ExcelExporter:
         return df_clean
     
     @staticmethod
-    def _format_worksheet(ws, df: pd.DataFrame):
-        """Aplica formato a hoja de Excel."""
+    def _column_widths(df: pd.DataFrame) -> List[float]:
+        """
+        Calcula anchos de columna a partir de la longitud de texto de cada valor.
+        
+        En hojas con más de WIDTH_SAMPLE_ROWS filas se usa una muestra
+        equiespaciada de filas.
+        """
+        sample = df
+        if len(df) > ExcelExporter.WIDTH_SAMPLE_ROWS:
+            step = len(df) // ExcelExporter.WIDTH_SAMPLE_ROWS + 1
+            sample = df.iloc[::step]
+        
+        widths = []
+        for position, column in enumerate(df.columns):
+            values = sample.iloc[:, position]
+            max_length = len(str(column))
+            if len(values) > 0:
+                max_length = max(max_length, int(values.astype(str).str.len().max()))
+            widths.append(min(max_length + 2, ExcelExporter.MAX_COLUMN_WIDTH))
+        
+        return widths
+    
+    @staticmethod
+    def _write_sheet(wb: 'Workbook', sheet_name: str, df: pd.DataFrame):
+        """
+        Escribe un DataFrame en una hoja nueva de un libro de solo escritura.
+        
+        Aplica el formato estándar: encabezado verde en negritas centrado,
+        anchos de columna ajustados y primera fila congelada. Si el DataFrame
+        excede MAX_ROWS_PER_SHEET, se divide en partes numeradas
+        ('Datos', 'Datos_2', 'Datos_3', ...).
+        """
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Font, PatternFill
+        from openpyxl.utils import get_column_letter
+        
+        widths = ExcelExporter._column_widths(df)
+        
         # Formato de encabezados
         header_fill = PatternFill(start_color="2E7D32", end_color="2E7D32", fill_type="solid")
         header_font = Font(bold=True, color="FFFFFF")
+        header_alignment = Alignment(horizontal='center', vertical='center')
         
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+        max_rows = ExcelExporter.MAX_ROWS_PER_SHEET
+        starts = range(0, max(len(df), 1), max_rows)
         
-        # Ajustar ancho de columnas
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
+        for part, start in enumerate(starts, start=1):
+            ws = wb.create_sheet(sheet_name if part == 1 else f"{sheet_name}_{part}")
             
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
+            # Anchos y paneles deben definirse antes de escribir filas
+            for position, width in enumerate(widths, start=1):
+                ws.column_dimensions[get_column_letter(position)].width = width
             
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Congelar primera fila
-        ws.freeze_panes = 'A2'
+            # Congelar primera fila
+            ws.freeze_panes = 'A2'
+            
+            header = []
+            for column in df.columns:
+                cell = WriteOnlyCell(ws, value=column)
+                cell.fill = header_fill
+                cell.font = header_font
+                cell.alignment = header_alignment
+                header.append(cell)
+            ws.append(header)
+            
+            for row in df.iloc[start:start + max_rows].itertuples(index=False, name=None):
+                ws.append(row)
     
     @staticmethod
-    def _create_summary_sheet(writer, summary: Dict):
+    def _create_summary_sheet(wb: 'Workbook', summary: Dict):
         """Crea hoja de resumen ejecutivo."""
-        wb = writer.book
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+        
         ws = wb.create_sheet('Resumen')
         
-        # Título
-        ws['A1'] = 'RESUMEN EJECUTIVO'
-        ws['A1'].font = Font(size=16, bold=True, color="2E7D32")
+        # Ajustar anchos
+        ws.column_dimensions['A'].width = 35
+        ws.column_dimensions['B'].width = 20
         
-        row = 3
+        def styled(value, font: 'Font') -> 'WriteOnlyCell':
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font = font
+            return cell
+        
+        # Título
+        ws.append([styled('RESUMEN EJECUTIVO', Font(size=16, bold=True, color="2E7D32"))])
+        ws.append([])
         
         # Información general
-        ws[f'A{row}'] = 'INFORMACIÓN GENERAL'
-        ws[f'A{row}'].font = Font(size=12, bold=True)
-        row += 1
+        ws.append([styled('INFORMACIÓN GENERAL', Font(size=12, bold=True))])
         
         general_info = [
             ('Total de sitios:', summary.get('total_sites', 0)),
@@ -189,17 +289,13 @@ class ExcelExporter:
         ]
         
         for label, value in general_info:
-            ws[f'A{row}'] = label
-            ws[f'B{row}'] = value
-            row += 1
+            ws.append([label, value])
         
-        row += 1
+        ws.append([])
         
         # Información de IA si existe
         if 'ai_predictions' in summary:
-            ws[f'A{row}'] = 'CLASIFICACIÓN CON IA'
-            ws[f'A{row}'].font = Font(size=12, bold=True)
-            row += 1
+            ws.append([styled('CLASIFICACIÓN CON IA', Font(size=12, bold=True))])
             
             ai_info = [
                 ('Total de predicciones IA:', summary.get('ai_predictions', 0)),
@@ -209,32 +305,100 @@ class ExcelExporter:
             ]
             
             for label, value in ai_info:
-                ws[f'A{row}'] = label
-                ws[f'B{row}'] = value
-                row += 1
+                ws.append([label, value])
             
-            row += 1
+            ws.append([])
         
         # Especies más frecuentes
         if 'top_species' in summary:
-            ws[f'A{row}'] = 'ESPECIES MÁS FRECUENTES'
-            ws[f'A{row}'].font = Font(size=12, bold=True)
-            row += 1
-            
-            ws[f'A{row}'] = 'Especie'
-            ws[f'B{row}'] = 'Capturas'
-            ws[f'A{row}'].font = Font(bold=True)
-            ws[f'B{row}'].font = Font(bold=True)
-            row += 1
+            ws.append([styled('ESPECIES MÁS FRECUENTES', Font(size=12, bold=True))])
+            ws.append([styled('Especie', Font(bold=True)), styled('Capturas', Font(bold=True))])
             
             for species, count in summary['top_species']:
-                ws[f'A{row}'] = species
-                ws[f'B{row}'] = count
-                row += 1
+                ws.append([species, count])
+
+
+class ColumnarExporter:
+    """Exportador a formatos columnares (Parquet, CSV comprimido) para R/Python."""
+    
+    SUPPORTED_FORMATS = ('parquet', 'csv.gz')
+    
+    @staticmethod
+    def export_parquet(df: pd.DataFrame, output_path: Union[Path, BinaryIO]) -> Union[Path, BinaryIO]:
+        """
+        Exporta a Parquet (requiere pyarrow).
         
-        # Ajustar anchos
-        ws.column_dimensions['A'].width = 35
-        ws.column_dimensions['B'].width = 20
+        Raises:
+            ImportError: Si no hay motor de Parquet instalado
+        """
+        df.to_parquet(output_path, index=False, compression='snappy')
+        return output_path
+    
+    @staticmethod
+    def export_csv_gz(df: pd.DataFrame, output_path: Union[Path, BinaryIO]) -> Union[Path, BinaryIO]:
+        """Exporta a CSV UTF-8 comprimido con gzip."""
+        df.to_csv(output_path, index=False, encoding='utf-8',
+                  compression='gzip', chunksize=100000)
+        return output_path
+    
+    @staticmethod
+    def export_basic_to_buffers(df: pd.DataFrame, base_name: str,
+                                formats: List[str]) -> Dict[str, bytes]:
+        """
+        Genera las columnas FORXIME/2 en formatos columnares, en memoria.
+        
+        Args:
+            df: DataFrame con datos validados
+            base_name: Nombre base sin extensión
+            formats: Formatos a generar ('parquet', 'csv.gz')
+            
+        Returns:
+            Dict nombre de archivo -> contenido (los formatos que fallen se omiten)
+        """
+        df_basic = ExcelExporter._basic_dataframe(df)
+        outputs = {}
+        
+        for fmt in formats:
+            buffer = io.BytesIO()
+            try:
+                if fmt == 'parquet':
+                    ColumnarExporter.export_parquet(df_basic, buffer)
+                elif fmt == 'csv.gz':
+                    ColumnarExporter.export_csv_gz(df_basic, buffer)
+                else:
+                    logger.warning(f"Formato de exportación no soportado: {fmt}")
+                    continue
+            except ImportError as e:
+                logger.warning(f"No se pudo exportar {fmt} (instala pyarrow): {e}")
+                continue
+            outputs[f"{base_name}.{fmt}"] = buffer.getvalue()
+        
+        return outputs
+    
+    @staticmethod
+    def export_basic(df: pd.DataFrame, output_dir: Path, base_name: str,
+                     formats: List[str]) -> Dict[str, Path]:
+        """
+        Exporta las columnas FORXIME/2 en los formatos columnares indicados.
+        
+        Args:
+            df: DataFrame con datos validados
+            output_dir: Carpeta de salida
+            base_name: Nombre base sin extensión (ej: 'proyecto_FORXIME2_20260101_120000')
+            formats: Formatos a generar ('parquet', 'csv.gz')
+            
+        Returns:
+            Dict formato -> Path de los archivos generados (los que fallen se omiten)
+        """
+        outputs = {}
+        
+        buffers = ColumnarExporter.export_basic_to_buffers(df, base_name, formats)
+        for filename, content in buffers.items():
+            output_path = Path(output_dir) / filename
+            output_path.write_bytes(content)
+            outputs[filename[len(base_name) + 1:]] = output_path
+        
+        return outputs
 
 
 class ExecutiveSummaryGenerator:
@@ -262,7 +426,7 @@ class ExecutiveSummaryGenerator:
             'total_species': df['ESPECIE'].nunique(),
             'total_captures': len(df),
             'total_trap_days': effort_df['TRAMPAS_DIA'].sum() if effort_df is not None else 0,
-            'top_species': df['ESPECIE'].value_counts().head(10).items(),
+            'top_species': list(df['ESPECIE'].value_counts().head(10).items()),
             'date_range': {
                 'start': df['FECHA'].min(),
                 'end': df['FECHA'].max()
@@ -280,34 +444,178 @@ class ExecutiveSummaryGenerator:
         return summary
 
 
+class ExportError(Exception):
+    """Error en la generación de uno o más archivos de exportación."""
+    
+    def __init__(self, errors: Dict[str, str], outputs: Dict[str, bytes]):
+        """
+        Args:
+            errors: Archivo -> mensaje de error
+            outputs: Archivo -> contenido de los archivos que sí se generaron
+        """
+        self.errors = errors
+        self.outputs = outputs
+        details = "; ".join(f"{name}: {msg}" for name, msg in errors.items())
+        super().__init__(f"Fallo al generar {len(errors)} archivo(s): {details}")
+
+
+def dataset_fingerprint(*frames: Optional[pd.DataFrame]) -> str:
+    """
+    Calcula una huella del contenido de uno o más DataFrames.
+    
+    Sirve como clave de caché: cambia si cambia cualquier valor, columna o
+    número de filas.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    
+    for frame in frames:
+        if frame is None:
+            digest.update(b'<none>')
+            continue
+        digest.update(repr(list(frame.columns)).encode('utf-8'))
+        digest.update(str(len(frame)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    
+    return digest.hexdigest()
+
+
+def export_dual_excel_to_buffers(df: pd.DataFrame, project_name: str,
+                                 effort_df: Optional[pd.DataFrame] = None,
+                                 events_df: Optional[pd.DataFrame] = None,
+                                 temporal_df: Optional[pd.DataFrame] = None,
+                                 coordinates_df: Optional[pd.DataFrame] = None,
+                                 ai_stats: Optional[Dict] = None,
+                                 parallel: bool = True) -> Dict[str, bytes]:
+    """
+    Genera ambos archivos Excel (básico y completo) en memoria.
+    
+    Los datos se limpian una sola vez y cada libro se escribe en un proceso
+    separado (si parallel=True).
+    
+    Args:
+        parallel: Si escribir los libros en procesos en paralelo
+    
+    Returns:
+        Dict nombre de archivo -> contenido, en orden (básico, completo)
+        
+    Raises:
+        ExportError: Si falla algún archivo (los demás se generan igualmente)
+    """
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    # Generar resumen
+    summary = ExecutiveSummaryGenerator.generate_summary(df, effort_df, events_df, ai_stats)
+    
+    # Limpieza compartida por ambos libros
+    df_clean = ExcelExporter._clean_dataframe(df)
+    
+    # Archivo básico (FORXIME/2) y completo
+    basic_filename = f"{project_name}_FORXIME2_{timestamp}.xlsx"
+    complete_filename = f"{project_name}_COMPLETO_{timestamp}.xlsx"
+    
+    tasks = {
+        complete_filename: (
+            _render_workbook,
+            (ExcelExporter._write_complete_workbook, df_clean, effort_df, events_df,
+             temporal_df, coordinates_df, summary)
+        ),
+    }
+    
+    errors = {}
+    try:
+        tasks[basic_filename] = (
+            _render_workbook,
+            (ExcelExporter._write_basic_workbook,
+             ExcelExporter._select_basic_columns(df_clean), coordinates_df)
+        )
+    except ValueError as e:
+        logger.error(f"Error generando {basic_filename}: {e}")
+        errors[basic_filename] = str(e)
+    
+    outputs, task_errors = _run_export_tasks(tasks, parallel)
+    errors.update(task_errors)
+    
+    if errors:
+        raise ExportError(errors, outputs)
+    
+    return {name: outputs[name] for name in (basic_filename, complete_filename)}
+
+
 def export_dual_excel(df: pd.DataFrame, project_path: Path, project_name: str,
                      effort_df: Optional[pd.DataFrame] = None,
                      events_df: Optional[pd.DataFrame] = None,
                      temporal_df: Optional[pd.DataFrame] = None,
                      coordinates_df: Optional[pd.DataFrame] = None,
-                     ai_stats: Optional[Dict] = None) -> Tuple[Path, Path]:
+                     ai_stats: Optional[Dict] = None,
+                     parallel: bool = True) -> Tuple[Path, Path]:
     """
     Exporta ambos archivos Excel: básico y completo.
     
     Returns:
         Tupla (path_basic, path_complete)
+        
+    Raises:
+        ExportError: Si falla algún archivo
     """
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    buffers = export_dual_excel_to_buffers(
+        df, project_name, effort_df, events_df,
+        temporal_df, coordinates_df, ai_stats, parallel
+    )
     
-    # Generar resumen
-    summary = ExecutiveSummaryGenerator.generate_summary(df, effort_df, events_df, ai_stats)
+    paths = []
+    for filename, content in buffers.items():
+        path = Path(project_path) / filename
+        path.write_bytes(content)
+        paths.append(path)
     
-    # Archivo básico (FORXIME/2)
-    basic_filename = f"{project_name}_FORXIME2_{timestamp}.xlsx"
-    basic_path = project_path / basic_filename
-    ExcelExporter.export_basic_excel(df, basic_path, coordinates_df)
+    basic_path, complete_path = paths
+    return basic_path, complete_path
+
+
+def _render_workbook(write_func, df: pd.DataFrame, *args) -> bytes:
+    """Escribe un libro en memoria con write_func y retorna su contenido."""
+    buffer = io.BytesIO()
+    write_func(df, buffer, *args)
+    return buffer.getvalue()
+
+
+def _run_export_tasks(tasks: Dict[str, Tuple], parallel: bool) -> Tuple[Dict[str, bytes], Dict[str, str]]:
+    """
+    Ejecuta tareas de exportación, en procesos separados si se solicita.
     
-    # Archivo completo
-    complete_filename = f"{project_name}_COMPLETO_{timestamp}.xlsx"
-    complete_path = project_path / complete_filename
-    ExcelExporter.export_complete_excel(
-        df, complete_path, effort_df, events_df, 
-        temporal_df, coordinates_df, summary
-    )
+    Args:
+        tasks: Nombre de archivo -> (función, argumentos)
+        parallel: Si usar un proceso por tarea
+        
+    Returns:
+        Tupla (resultados por archivo, errores por archivo)
+    """
+    outputs = {}
+    errors = {}
     
-    return basic_path, complete_path
+    if parallel and len(tasks) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as pool:
+                futures = {name: pool.submit(func, *args) for name, (func, args) in tasks.items()}
+                for name, future in futures.items():
+                    try:
+                        outputs[name] = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Error generando {name}: {e}")
+                        errors[name] = str(e)
+            return outputs, errors
+        except (OSError, BrokenProcessPool) as e:
+            # Sin procesos disponibles: repetir de forma secuencial
+            logger.warning(f"Exportación en paralelo no disponible ({e}); usando modo secuencial")
+            outputs, errors = {}, {}
+    
+    for name, (func, args) in tasks.items():
+        try:
+            outputs[name] = func(*args)
+        except Exception as e:
+            logger.error(f"Error generando {name}: {e}")
+            errors[name] = str(e)
+    
+    return outputs, errors
@@ -2,11 +2,14 @@
 Utilidades y funciones auxiliares para la plataforma de cámaras trampa.
 """
 
+import math
 import re
 from datetime import datetime, timedelta
 from typing import Optional, Tuple, List
 from pathlib import Path
 
+import pandas as pd
+
 
 def clean_species_name(name: str) -> str:
     """
@@ -149,26 +152,162 @@ def validate_date_range(date_str: str, min_year: int = 2010, max_year: int = 203
         return False
 
 
-def parse_gps_coordinate(coord_tuple: Tuple) -> Optional[float]:
+def parse_gps_coordinate(coord_tuple: Tuple, ref: Optional[str] = None) -> Optional[float]:
     """
     Convierte coordenadas GPS de EXIF a decimal.
     
     Args:
         coord_tuple: Tupla de coordenadas EXIF ((degrees, 1), (minutes, 1), (seconds, 100))
+            o tupla de racionales de Pillow (IFDRational)
+        ref: Referencia de hemisferio ('N', 'S', 'E', 'W'); 'S' y 'W' son negativos
         
     Returns:
         Coordenada en formato decimal o None
     """
+    def _to_float(value) -> float:
+        # Versiones antiguas de Pillow entregan (numerador, denominador)
+        if isinstance(value, tuple):
+            return value[0] / value[1]
+        return float(value)
+    
     try:
-        degrees = coord_tuple[0][0] / coord_tuple[0][1]
-        minutes = coord_tuple[1][0] / coord_tuple[1][1]
-        seconds = coord_tuple[2][0] / coord_tuple[2][1]
+        degrees = _to_float(coord_tuple[0])
+        minutes = _to_float(coord_tuple[1])
+        seconds = _to_float(coord_tuple[2])
+        
+        decimal = degrees + (minutes / 60.0) + (seconds / 3600.0)
+        
+        if ref and str(ref).strip().upper() in ('S', 'W'):
+            decimal = -decimal
         
-        return degrees + (minutes / 60.0) + (seconds / 3600.0)
+        return decimal
     except:
         return None
 
 
+def latlon_to_utm(latitude: float, longitude: float) -> Tuple[str, float, float]:
+    """
+    Convierte coordenadas geográficas WGS84 a UTM.
+    
+    Usa las series de Krüger estándar (precisión submétrica dentro de la zona).
+    
+    Args:
+        latitude: Latitud en grados decimales
+        longitude: Longitud en grados decimales
+        
+    Returns:
+        Tupla (zona, este, norte), con zona en formato '13Q'
+    """
+    a = 6378137.0
+    f = 1 / 298.257223563
+    k0 = 0.9996
+    e2 = f * (2 - f)
+    ep2 = e2 / (1 - e2)
+    
+    zone_number = int((longitude + 180) / 6) + 1
+    lon0 = math.radians((zone_number - 1) * 6 - 180 + 3)
+    
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    
+    n = a / math.sqrt(1 - e2 * math.sin(lat) ** 2)
+    t = math.tan(lat) ** 2
+    c = ep2 * math.cos(lat) ** 2
+    a_ = math.cos(lat) * (lon - lon0)
+    
+    e4 = e2 * e2
+    e6 = e4 * e2
+    m = a * (
+        (1 - e2 / 4 - 3 * e4 / 64 - 5 * e6 / 256) * lat
+        - (3 * e2 / 8 + 3 * e4 / 32 + 45 * e6 / 1024) * math.sin(2 * lat)
+        + (15 * e4 / 256 + 45 * e6 / 1024) * math.sin(4 * lat)
+        - (35 * e6 / 3072) * math.sin(6 * lat)
+    )
+    
+    easting = k0 * n * (
+        a_
+        + (1 - t + c) * a_ ** 3 / 6
+        + (5 - 18 * t + t ** 2 + 72 * c - 58 * ep2) * a_ ** 5 / 120
+    ) + 500000.0
+    
+    northing = k0 * (
+        m + n * math.tan(lat) * (
+            a_ ** 2 / 2
+            + (5 - t + 9 * c + 4 * c ** 2) * a_ ** 4 / 24
+            + (61 - 58 * t + t ** 2 + 600 * c - 330 * ep2) * a_ ** 6 / 720
+        )
+    )
+    
+    if latitude < 0:
+        northing += 10000000.0
+    
+    # Banda de latitud (C..X, sin I ni O, bandas de 8 grados desde -80)
+    bands = "CDEFGHJKLMNPQRSTUVWXX"
+    band_index = int((min(max(latitude, -80.0), 84.0) + 80) / 8)
+    zone = f"{zone_number}{bands[band_index]}"
+    
+    return zone, easting, northing
+
+
+def utm_to_latlon(zone: str, easting: float, northing: float) -> Tuple[float, float]:
+    """
+    Convierte coordenadas UTM (WGS84) a geográficas.
+    
+    Args:
+        zone: Zona UTM con banda de latitud (ej: '13Q'); bandas C-M son hemisferio sur
+        easting: Este en metros
+        northing: Norte en metros
+        
+    Returns:
+        Tupla (latitud, longitud) en grados decimales
+    """
+    a = 6378137.0
+    f = 1 / 298.257223563
+    k0 = 0.9996
+    e2 = f * (2 - f)
+    ep2 = e2 / (1 - e2)
+    e1 = (1 - math.sqrt(1 - e2)) / (1 + math.sqrt(1 - e2))
+    
+    zone = zone.strip().upper()
+    zone_number = int(re.match(r'\d+', zone).group())
+    band = zone[len(str(zone_number)):]
+    if band and band < 'N':
+        northing -= 10000000.0
+    
+    x = easting - 500000.0
+    m = northing / k0
+    mu = m / (a * (1 - e2 / 4 - 3 * e2 ** 2 / 64 - 5 * e2 ** 3 / 256))
+    
+    # Latitud del pie de la perpendicular
+    phi1 = (
+        mu
+        + (3 * e1 / 2 - 27 * e1 ** 3 / 32) * math.sin(2 * mu)
+        + (21 * e1 ** 2 / 16 - 55 * e1 ** 4 / 32) * math.sin(4 * mu)
+        + (151 * e1 ** 3 / 96) * math.sin(6 * mu)
+        + (1097 * e1 ** 4 / 512) * math.sin(8 * mu)
+    )
+    
+    n1 = a / math.sqrt(1 - e2 * math.sin(phi1) ** 2)
+    t1 = math.tan(phi1) ** 2
+    c1 = ep2 * math.cos(phi1) ** 2
+    r1 = a * (1 - e2) / (1 - e2 * math.sin(phi1) ** 2) ** 1.5
+    d = x / (n1 * k0)
+    
+    lat = phi1 - (n1 * math.tan(phi1) / r1) * (
+        d ** 2 / 2
+        - (5 + 3 * t1 + 10 * c1 - 4 * c1 ** 2 - 9 * ep2) * d ** 4 / 24
+        + (61 + 90 * t1 + 298 * c1 + 45 * t1 ** 2 - 252 * ep2 - 3 * c1 ** 2) * d ** 6 / 720
+    )
+    lon = (
+        d
+        - (1 + 2 * t1 + c1) * d ** 3 / 6
+        + (5 - 2 * c1 + 28 * t1 - 3 * c1 ** 2 + 8 * ep2 + 24 * t1 ** 2) * d ** 5 / 120
+    ) / math.cos(phi1)
+    
+    lon0 = (zone_number - 1) * 6 - 180 + 3
+    return math.degrees(lat), lon0 + math.degrees(lon)
+
+
 def format_file_size(size_bytes: int) -> str:
     """
     Formatea tamaño de archivo a formato legible.
@@ -264,7 +403,49 @@ def suggest_species_correction(species: str) -> Optional[str]:
         'PERSONA': 'HUMANO',
     }
     
-    return corrections.get(species)
+    if species in corrections:
+        return corrections[species]
+    
+    # Errores de tipeo/acentos: buscar en el índice de especies conocidas
+    from fuzzy_matcher import get_species_index
+    return get_species_index().best_match(species)
+
+
+REMOTE_MEDIA_PREFIXES = ('http://', 'https://', 'gs://', 's3://')
+
+
+def resolve_media_locations(locations: pd.Series, base_dir: Optional[Path] = None) -> Tuple[pd.Series, pd.Series]:
+    """
+    Separa ubicaciones de fotos en rutas locales y URLs remotas.
+    
+    RUTA solo debe tener rutas que PIL pueda abrir: las URLs (ej: gs:// de
+    Wildlife Insights) van aparte y las rutas relativas se resuelven contra
+    base_dir (ej: la carpeta del CSV o del paquete).
+    
+    Args:
+        locations: Rutas o URLs de las fotos
+        base_dir: Carpeta contra la que se resuelven las rutas relativas
+    
+    Returns:
+        Tupla (RUTA, URL) de Series alineadas con locations ('' donde no aplica)
+    """
+    locations = locations.fillna('').astype(str).str.strip()
+    remote = locations.str.lower().str.startswith(REMOTE_MEDIA_PREFIXES)
+    
+    codes, unique = pd.factorize(locations.where(~remote, ''))
+    resolved = [
+        '' if not value else str(Path(value) if base_dir is None or Path(value).is_absolute() else Path(base_dir) / value)
+        for value in unique
+    ]
+    
+    local = pd.Series([resolved[code] for code in codes], index=locations.index, dtype=object)
+    return local, locations.where(remote, '')
+
+
+def any_path_exists(paths: pd.Series, sample_size: int = 20) -> bool:
+    """Revisa si existe alguna de las primeras sample_size rutas distintas no vacías."""
+    sample = paths[paths != ''].drop_duplicates().head(sample_size)
+    return any(Path(path).is_file() for path in sample)
 
 
 def create_folder_structure_template(base_path: Path) -> None:
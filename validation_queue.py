@@ -0,0 +1,245 @@
+"""
+Cola priorizada de validación humana de predicciones de IA.
+
+Las predicciones de un proyecto se guardan en la base (tabla
+validation_queue) agrupadas en eventos: fotos de la misma cámara separadas
+por menos de burst_gap_seconds. Cada evento recibe la prioridad de su foto
+más dudosa, así que la cola entrega primero los eventos donde una etiqueta
+humana aporta más (baja confianza, especie sin clasificar) y una sola
+etiqueta cubre toda la ráfaga. Las miniaturas de la página siguiente se
+decodifican en segundo plano mientras se valida la actual.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from analysis_engine import IndependentEventDetector
+from database_manager import DatabaseManager, get_database
+from logger import get_logger
+
+logger = get_logger()
+
+
+STATUS_PENDING = 'pendiente'
+STATUS_VALIDATED = 'validada'
+STATUS_AUTO = 'automatica'
+
+
+def build_queue_items(df: pd.DataFrame, predictions: List[Dict], burst_gap_seconds: float = 10,
+                      confidence_threshold: float = 0.80, auto_validate: bool = False) -> pd.DataFrame:
+    """
+    Arma las filas de la cola a partir de las predicciones de un proyecto.
+
+    La certeza de una foto es su confianza, menos 1 si requiere clasificación
+    manual (ej: animal sin especie): esas van antes que cualquier otra y,
+    entre ellas, también las de menor confianza primero. La prioridad de un
+    evento es la menor certeza de sus fotos (menor = se valida antes).
+
+    Args:
+        df: DataFrame con RUTA, SITIO, CAMARA, FECHA, HORA; su índice es el photo_index
+            de cada foto (ver DatabaseManager.save_photos)
+        predictions: Predicciones alineadas con las filas de df (ver AIClassifierStub.classify_frames)
+        burst_gap_seconds: Segundos sin fotos que separan dos eventos
+        confidence_threshold: Confianza desde la que una predicción puede validarse sola
+        auto_validate: Validar automáticamente las predicciones de alta confianza
+
+    Returns:
+        DataFrame con las columnas de DatabaseManager.save_validation_queue
+    """
+    species = [p.get('species', 'CLASIFICACION_PENDIENTE') for p in predictions]
+    confidence = np.array([float(p.get('confidence', 0.0)) for p in predictions])
+    manual = np.array([bool(p.get('requires_manual_classification', True)) for p in predictions])
+    certainty = confidence - manual
+
+    detector = IndependentEventDetector(time_threshold_minutes=burst_gap_seconds / 60)
+    events = detector.assign_event_ids(df, ('SITIO', 'CAMARA'))
+
+    taken_at = pd.to_datetime(
+        df['FECHA'].astype(str) + ' ' + df['HORA'].astype(str),
+        format='%Y-%m-%d %H:%M:%S', errors='coerce'
+    )
+    epoch = taken_at.to_numpy(dtype='datetime64[s]').astype('int64')
+
+    items = pd.DataFrame({
+        'path': df['RUTA'].astype(str).to_numpy(),
+        'photo_index': df.index.to_numpy().astype('int64'),
+        'site_name': df['SITIO'].astype(str).to_numpy(),
+        'camera_name': df['CAMARA'].astype(str).to_numpy(),
+        'taken_at': np.where(taken_at.isna().to_numpy(), None, epoch),
+        'event_id': events.to_numpy(),
+        'predicted_species': species,
+        'confidence': confidence,
+    })
+    items['priority'] = pd.Series(certainty).groupby(items['event_id']).transform('min').to_numpy()
+
+    auto = (~manual) & (confidence >= confidence_threshold) if auto_validate else np.zeros(len(items), bool)
+    items['status'] = np.where(auto, STATUS_AUTO, STATUS_PENDING)
+    items['validated_species'] = np.where(auto, items['predicted_species'], None)
+
+    return items
+
+
+class ValidationQueue:
+    """Página a página sobre la cola de validación de un proyecto."""
+
+    THUMBNAIL_SIZE = (320, 240)
+    # Miniaturas guardadas en memoria (unas cuantas páginas)
+    MAX_THUMBNAILS = 512
+
+    def __init__(self, project_id: int, db: Optional[DatabaseManager] = None,
+                 events_per_page: int = 10, decode_workers: int = 4):
+        """
+        Args:
+            project_id: ID del proyecto
+            db: Gestor de base de datos (por defecto la instancia global)
+            events_per_page: Eventos por página
+            decode_workers: Hilos para decodificar miniaturas
+        """
+        self.project_id = project_id
+        self.db = db or get_database()
+        self.events_per_page = max(1, int(events_per_page))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(decode_workers)), thread_name_prefix="thumbnails")
+        self._thumbnails: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Validaciones aún no escritas (o en escritura): no deben volver a aparecer en las páginas
+        self._buffer: Dict[str, str] = {}
+        self._in_flight: Dict[str, str] = {}
+
+    def enqueue(self, df: pd.DataFrame, predictions: List[Dict], **options) -> Dict[str, int]:
+        """
+        Reemplaza la cola del proyecto con nuevas predicciones.
+
+        Args:
+            df: DataFrame con RUTA, SITIO, CAMARA, FECHA, HORA
+            predictions: Predicciones alineadas con df
+            **options: Opciones de build_queue_items (burst_gap_seconds, ...)
+
+        Returns:
+            Resumen de la cola por estado
+        """
+        items = build_queue_items(df, predictions, **options)
+        self.db.submit_write(self.db.save_validation_queue, self.project_id, items).result()
+        logger.info(f"Cola de validación: {len(items):,} fotos en {items['event_id'].nunique():,} eventos")
+        return self.summary()
+
+    def summary(self) -> Dict[str, int]:
+        """Fotos por estado, contando como validadas las que aún se están escribiendo."""
+        summary = self.db.get_validation_summary(self.project_id)
+        with self._lock:
+            unsaved = len(self._buffer) + len(self._in_flight)
+        summary[STATUS_PENDING] = max(0, summary[STATUS_PENDING] - unsaved)
+        summary[STATUS_VALIDATED] += unsaved
+        return summary
+
+    def _query_page(self, page_number: int) -> pd.DataFrame:
+        with self._lock:
+            skipped = {**self._in_flight, **self._buffer}
+
+        if not skipped:
+            return self.db.get_validation_page(
+                self.project_id, self.events_per_page, page_number * self.events_per_page
+            )
+
+        # Los eventos aún sin escribir siguen pendientes en la base: se piden
+        # de más y se descartan, sin cambiar qué eventos caen en cada página
+        page = self.db.get_validation_page(
+            self.project_id, (page_number + 1) * self.events_per_page + len(skipped)
+        )
+        page = page[~page['path'].isin(skipped)]
+        events = page['event_id'].drop_duplicates().iloc[
+            page_number * self.events_per_page:(page_number + 1) * self.events_per_page
+        ]
+        return page[page['event_id'].isin(events)].reset_index(drop=True)
+
+    def page(self, page_number: int = 0) -> pd.DataFrame:
+        """
+        Fotos pendientes de una página de eventos; precarga las miniaturas de la siguiente.
+
+        Returns:
+            DataFrame de DatabaseManager.get_validation_page
+        """
+        page = self._query_page(page_number)
+        self.prefetch(page['path'])
+        self.prefetch(self._query_page(page_number + 1)['path'])
+        return page
+
+    @staticmethod
+    def load_thumbnail(image_path: str) -> Optional[bytes]:
+        """Miniatura JPEG de una foto (None si no se puede leer)."""
+        try:
+            with Image.open(image_path) as img:
+                img.draft('RGB', ValidationQueue.THUMBNAIL_SIZE)
+                img = img.convert('RGB')
+                img.thumbnail(ValidationQueue.THUMBNAIL_SIZE)
+                buffer = io.BytesIO()
+                img.save(buffer, format='JPEG', quality=85)
+                return buffer.getvalue()
+        except (OSError, ValueError):
+            return None
+
+    def prefetch(self, paths):
+        """Encola la decodificación de miniaturas que aún no están en memoria."""
+        with self._lock:
+            for path in paths:
+                if path in self._thumbnails:
+                    self._thumbnails.move_to_end(path)
+                else:
+                    self._thumbnails[path] = self._pool.submit(self.load_thumbnail, path)
+            while len(self._thumbnails) > self.MAX_THUMBNAILS:
+                self._thumbnails.popitem(last=False)
+
+    def thumbnail(self, path: str) -> Optional[bytes]:
+        """Miniatura de una foto (espera a que termine de decodificarse si hace falta)."""
+        self.prefetch([path])
+        with self._lock:
+            future = self._thumbnails[path]
+        return future.result()
+
+    def validate(self, labels: Mapping[str, str]):
+        """
+        Anota validaciones (ruta -> especie); se escriben en lote con flush().
+
+        Las fotos anotadas dejan de aparecer en las páginas de inmediato. Al
+        escribirse, la especie pasa también a las fotos del proyecto.
+        """
+        with self._lock:
+            self._buffer.update(labels)
+
+    def flush(self) -> Optional[Future]:
+        """
+        Escribe las validaciones anotadas en una sola transacción (hilo escritor).
+
+        Returns:
+            Future de la escritura, o None si no había nada que escribir
+        """
+        with self._lock:
+            if not self._buffer:
+                return None
+            batch, self._buffer = self._buffer, {}
+            self._in_flight.update(batch)
+
+        future = self.db.submit_write(self.db.save_validations, self.project_id, list(batch.items()))
+        future.add_done_callback(lambda f: self._written(batch, f))
+        return future
+
+    def _written(self, batch: Dict[str, str], future: Future):
+        with self._lock:
+            for path in batch:
+                self._in_flight.pop(path, None)
+            # Si la escritura falló, las validaciones vuelven al buffer para reintentarse
+            if future.exception() is not None:
+                self._buffer.update({path: batch[path] for path in batch if path not in self._buffer})
+
+    def close(self):
+        """Escribe lo pendiente y libera los hilos de miniaturas."""
+        future = self.flush()
+        if future is not None:
+            future.result()
+        self._pool.shutdown(wait=False, cancel_futures=True)